@@ -0,0 +1,214 @@
+import asyncio
+import atexit
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--start-maximized'
+]
+
+
+class _PooledBrowser:
+    """Navegador del pool junto con su contador de usos"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.uses = 0
+        self.in_use = 0
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium calientes para la API sincrónica de Playwright.
+
+    Mantiene el driver de Playwright y uno o más navegadores abiertos entre búsquedas.
+    Cada `page()` entrega un contexto aislado (cookies, caché y storage propios) que se
+    cierra al terminar. Los navegadores se reciclan tras `max_uses` contextos o si se caen.
+    Los objetos de Playwright sincrónico no se pueden compartir entre hilos, por eso
+    `get_pool()` entrega un pool por hilo.
+    """
+
+    def __init__(self, headless=False, max_browsers=1, max_uses=50, launch_args=None):
+        self.headless = headless
+        self.max_browsers = max_browsers
+        self.max_uses = max_uses
+        self.launch_args = launch_args if launch_args is not None else LAUNCH_ARGS
+        self._playwright = None
+        self._browsers = []
+        self.launches = 0
+
+    def _launch(self):
+        if self._playwright is None:
+            from playwright.sync_api import sync_playwright  # Se importa al lanzar el primer navegador
+            self._playwright = sync_playwright().start()
+        browser = self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        self.launches += 1
+        entry = _PooledBrowser(browser)
+        self._browsers.append(entry)
+        return entry
+
+    def _recycle(self, entry):
+        """Cierra un navegador agotado o caído y lo saca del pool"""
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+        try:
+            entry.browser.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        for entry in list(self._browsers):
+            if not entry.browser.is_connected():
+                print("♻️ Navegador caído, se reemplaza")
+                self._recycle(entry)
+        libres = [b for b in self._browsers if b.uses + b.in_use < self.max_uses]
+        if not libres or (len(self._browsers) < self.max_browsers and all(b.in_use for b in libres)):
+            return self._launch()
+        return min(libres, key=lambda b: (b.in_use, b.uses))
+
+    @contextmanager
+    def page(self, **context_options):
+        """Entrega una página dentro de un contexto nuevo y aislado"""
+        entry = self._acquire()
+        entry.in_use += 1
+        context = None
+        try:
+            context = entry.browser.new_context(**context_options)
+            yield context.new_page()
+        finally:
+            if context is not None:
+                try:
+                    context.close()
+                except Exception:
+                    pass
+            entry.in_use -= 1
+            entry.uses += 1
+            if entry.in_use == 0 and (entry.uses >= self.max_uses or not entry.browser.is_connected()):
+                self._recycle(entry)
+
+    def close(self):
+        """Cierra todos los navegadores y detiene el driver de Playwright"""
+        for entry in list(self._browsers):
+            self._recycle(entry)
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+class AsyncBrowserPool:
+    """
+    Equivalente de `BrowserPool` para la API asincrónica de Playwright.
+
+    Vive dentro de un event loop: debe cerrarse con `await pool.close()` antes de que
+    termine `asyncio.run`.
+    """
+
+    def __init__(self, headless=False, max_browsers=1, max_uses=50, launch_args=None):
+        self.headless = headless
+        self.max_browsers = max_browsers
+        self.max_uses = max_uses
+        self.launch_args = launch_args if launch_args is not None else LAUNCH_ARGS
+        self._playwright = None
+        self._browsers = []
+        self._lock = asyncio.Lock()
+        self.launches = 0
+
+    async def _launch(self):
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+        self.launches += 1
+        entry = _PooledBrowser(browser)
+        self._browsers.append(entry)
+        return entry
+
+    async def _recycle(self, entry):
+        if entry in self._browsers:
+            self._browsers.remove(entry)
+        try:
+            await entry.browser.close()
+        except Exception:
+            pass
+
+    async def _acquire(self):
+        async with self._lock:
+            for entry in list(self._browsers):
+                if not entry.browser.is_connected():
+                    print("♻️ Navegador caído, se reemplaza")
+                    await self._recycle(entry)
+            libres = [b for b in self._browsers if b.uses + b.in_use < self.max_uses]
+            if not libres or (len(self._browsers) < self.max_browsers and all(b.in_use for b in libres)):
+                entry = await self._launch()
+            else:
+                entry = min(libres, key=lambda b: (b.in_use, b.uses))
+            entry.in_use += 1
+            return entry
+
+    @asynccontextmanager
+    async def page(self, **context_options):
+        """Entrega una página dentro de un contexto nuevo y aislado"""
+        entry = await self._acquire()
+        context = None
+        try:
+            context = await entry.browser.new_context(**context_options)
+            yield await context.new_page()
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+            entry.in_use -= 1
+            entry.uses += 1
+            if entry.in_use == 0 and (entry.uses >= self.max_uses or not entry.browser.is_connected()):
+                await self._recycle(entry)
+
+    async def close(self):
+        for entry in list(self._browsers):
+            await self._recycle(entry)
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+
+_local = threading.local()
+_pools = []
+
+
+def get_pool(**options):
+    """Devuelve el pool sincrónico del hilo actual, creándolo en el primer uso"""
+    pool = getattr(_local, "pool", None)
+    if pool is None:
+        pool = BrowserPool(**options)
+        _local.pool = pool
+        _pools.append(pool)
+    return pool
+
+
+def close_pool():
+    """Cierra el pool del hilo actual"""
+    pool = getattr(_local, "pool", None)
+    if pool is not None:
+        pool.close()
+        _local.pool = None
+        if pool in _pools:
+            _pools.remove(pool)
+
+
+@atexit.register
+def _close_all():
+    for pool in list(_pools):
+        try:
+            pool.close()
+        except Exception:
+            pass
+    _pools.clear()
@@ -0,0 +1,84 @@
+import json
+import os
+import re
+import time
+
+
+class Checkpoint:
+    """
+    Punto de control de un trabajo largo, guardado como JSON en `{directorio}/{job_id}.json`.
+
+    Registra los parámetros del trabajo (por ejemplo sitio y consulta), las unidades ya
+    completadas (páginas, palabras clave...), el último cursor de paginación (URL) y datos
+    propios de cada scraper en `extra`. Cada cambio se escribe en un archivo temporal que
+    reemplaza al anterior con `os.replace`, así que un fallo nunca deja el JSON a medias.
+    """
+
+    def __init__(self, job_id, directorio="checkpoints", **params):
+        self.job_id = job_id
+        nombre = re.sub(r"[^\w.-]+", "_", job_id)
+        self.path = os.path.join(directorio, f"{nombre}.json")
+        self.params = params
+        self.completed = []
+        self.cursor = None
+        self.extra = {}
+
+        previo = self._leer()
+        if previo is None:
+            return
+        if previo.get("params") != params:
+            print(f"⚠️ El trabajo '{job_id}' existía con otros parámetros; se empieza de cero")
+            return
+        self.completed = previo.get("completed", [])
+        self.cursor = previo.get("cursor")
+        self.extra = previo.get("extra", {})
+
+    def _leer(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Checkpoint ilegible en {self.path}: {e}")
+            return None
+
+    @property
+    def resumed(self):
+        """True si el trabajo ya tenía unidades completadas"""
+        return bool(self.completed)
+
+    def is_done(self, unidad):
+        return unidad in self.completed
+
+    def mark_done(self, unidad, cursor=None, **extra):
+        """Marca una unidad como completada y guarda el checkpoint"""
+        if unidad not in self.completed:
+            self.completed.append(unidad)
+        if cursor is not None:
+            self.cursor = cursor
+        self.extra.update(extra)
+        self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        temporal = self.path + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({
+                "job_id": self.job_id,
+                "params": self.params,
+                "completed": self.completed,
+                "cursor": self.cursor,
+                "extra": self.extra,
+                "updated": time.time(),
+            }, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, self.path)
+
+    def finish(self):
+        """Elimina el checkpoint de un trabajo terminado"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
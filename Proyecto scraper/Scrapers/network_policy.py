@@ -0,0 +1,107 @@
+from collections import Counter
+from fnmatch import fnmatchcase
+
+
+# Dominios de publicidad y analítica que no aportan texto ni precios
+TRACKER_PATTERNS = [
+    "*doubleclick.net*", "*googlesyndication.com*", "*google-analytics.com*",
+    "*googletagmanager.com*", "*googletagservices.com*", "*facebook.net*",
+    "*hotjar.com*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+    "*scorecardresearch.com*", "*adnxs.com*", "*amazon-adsystem.com*",
+]
+
+
+class NetworkPolicy:
+    """
+    Política de red aplicada con `context.route` para no descargar recursos innecesarios.
+
+    - `block_types`: tipos de recurso de Playwright a bloquear (image, media, font...).
+    - `block_patterns`: patrones glob de URL a bloquear.
+    - `allow_patterns`: patrones glob que siempre pasan, aunque coincidan con lo anterior.
+
+    Los bytes de lo bloqueado no se pueden conocer sin descargarlo; se cuentan las
+    peticiones bloqueadas por tipo y los bytes de las respuestas que sí pasaron. Los
+    contadores acumulan todos los contextos donde se aplicó la política; para reportar
+    una sola ejecución se usa `since(snapshot())`.
+    """
+
+    def __init__(self, block_types=(), block_patterns=(), allow_patterns=()):
+        self.block_types = set(block_types)
+        self.block_patterns = list(block_patterns)
+        self.allow_patterns = list(allow_patterns)
+        self.blocked = Counter()
+        self.allowed = 0
+        self.allowed_bytes = 0
+
+    def should_block(self, url, resource_type):
+        if any(fnmatchcase(url, pattern) for pattern in self.allow_patterns):
+            return False
+        return resource_type in self.block_types or any(fnmatchcase(url, pattern) for pattern in self.block_patterns)
+
+    def _decide(self, route):
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked[request.resource_type] += 1
+            return True
+        self.allowed += 1
+        return False
+
+    def _count_response(self, response):
+        try:
+            self.allowed_bytes += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+    def _handle(self, route):
+        if self._decide(route):
+            route.abort()
+        else:
+            route.continue_()
+
+    async def _handle_async(self, route):
+        if self._decide(route):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    def apply(self, context):
+        """Aplica la política a un contexto de la API sincrónica"""
+        context.route("**/*", self._handle)
+        context.on("response", self._count_response)
+
+    async def apply_async(self, context):
+        """Aplica la política a un contexto de la API asincrónica"""
+        await context.route("**/*", self._handle_async)
+        context.on("response", self._count_response)
+
+    def snapshot(self):
+        """Copia de los contadores actuales, para medir una ejecución con `since`"""
+        return Counter(self.blocked), self.allowed, self.allowed_bytes
+
+    def since(self, snapshot):
+        """Política con solo lo contado desde `snapshot` (no se aplica a ningún contexto)"""
+        blocked, allowed, allowed_bytes = snapshot
+        delta = NetworkPolicy(self.block_types, self.block_patterns, self.allow_patterns)
+        delta.blocked = self.blocked - blocked
+        delta.allowed = self.allowed - allowed
+        delta.allowed_bytes = self.allowed_bytes - allowed_bytes
+        return delta
+
+    @property
+    def blocked_total(self):
+        return sum(self.blocked.values())
+
+    def summary(self):
+        detail = ", ".join(f"{tipo}={n}" for tipo, n in self.blocked.most_common())
+        return (f"{self.blocked_total} peticiones bloqueadas ({detail or 'ninguna'}), "
+                f"{self.allowed} permitidas, {self.allowed_bytes / 1024:.0f} KB descargados")
+
+
+def text_only(allow_patterns=()):
+    """Preset "solo texto": sin imágenes, video, fuentes ni rastreadores.
+    Las hojas de estilo se dejan pasar porque `innerText` y la visibilidad dependen de ellas."""
+    return NetworkPolicy(
+        block_types={"image", "media", "font", "ping"},
+        block_patterns=TRACKER_PATTERNS,
+        allow_patterns=allow_patterns
+    )
@@ -1,6 +1,60 @@
 import asyncio
-from playwright.async_api import async_playwright
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, asdict
+from cache import get_result_cache
 from herramientas import process_text
+from Scrapers.browser_pool import AsyncBrowserPool
+from Scrapers.checkpoints import Checkpoint
+from Scrapers.network_policy import text_only
+from Scrapers.scheduler import PRIORITY_HIGH, PRIORITY_LOW, get_scheduler
+from Scrapers.seen_index import get_seen_index
+from search_index import get_search_index
+from tracing import count, span, traced
+
+
+# Lee un artículo completo en una sola ida y vuelta al navegador.
+# Para autor y fecha acepta <meta content>, <time datetime> o texto visible.
+ARTICLE_JS = """
+({title, body, byline, published}) => {
+    const read = selector => {
+        const el = selector ? document.querySelector(selector) : null;
+        if (!el) return "";
+        return (el.getAttribute("content") || el.getAttribute("datetime") || el.innerText || "").trim();
+    };
+    return {
+        title: read(title),
+        paragraphs: Array.from(document.querySelectorAll(body))
+            .map(el => el.innerText.trim())
+            .filter(text => text),
+        byline: read(byline),
+        published: read(published),
+    };
+}
+"""
+
+
+@dataclass
+class Article:
+    """Artículo de noticia extraído"""
+    outlet: str
+    url: str
+    title: str
+    paragraphs: list
+    byline: str = ""
+    published: str = ""
+
+    @property
+    def text(self):
+        return "\n\n".join(self.paragraphs)
+
+
+@dataclass
+class NewsResult:
+    """Resultado de búsqueda de un medio"""
+    outlet: str
+    title: str
+    url: str
+    rank: int
 
 
 class NewScraper:
@@ -12,182 +66,337 @@ class NewScraper:
     """
     
     TIMEOUT = 30000
+    DEADLINE = 40000  # Plazo global de una búsqueda en todos los medios
     MAX_RESULTS = 3
     HEADLESS = False
-
-    # 🔍 Scraper para El Tiempo
-    async def eltiempo_scraper(self, page, keyword):
-        search_url = f"https://www.eltiempo.com/buscar?q={self.normalize_keyword(keyword, 'eltiempo')}"
-        await page.goto(search_url, timeout=self.TIMEOUT)
+    CACHE_TTL = 10 * 60  # Vigencia de los resultados en caché (segundos)
+    CHECKPOINT_DIR = "checkpoints"
+
+    # Configuración de búsqueda y de artículos por medio; agregar un medio es agregar una entrada
+    OUTLETS = {
+        "eltiempo": {
+            "name": "El Tiempo",
+            "base_url": "https://www.eltiempo.com",
+            "search_url": "https://www.eltiempo.com/buscar?q={keyword}",
+            "result_selector": "h3.c-article__title a",
+            "title_selector": None,
+            "domain": "eltiempo.com",
+            "article_title": "h1",
+            "article_body": "div.paragraph",
+            "article_byline": "meta[name='author']",
+            "article_date": "meta[property='article:published_time']",
+        },
+        "semana": {
+            "name": "Semana",
+            "base_url": "https://www.semana.com",
+            "search_url": "https://www.semana.com/buscador/?query={keyword}",
+            "result_selector": "a:has(div.queryly_item_title)",
+            "title_selector": "div.queryly_item_title",
+            "domain": "semana.com",
+            "article_title": "h1.text-smoke-700",
+            "article_body": "p[data-type='text']",
+            "article_byline": "meta[name='author']",
+            "article_date": "meta[property='article:published_time']",
+        },
+        "elespectador": {
+            "name": "El Espectador",
+            "base_url": "https://www.elespectador.com",
+            "search_url": "https://www.elespectador.com/buscador/{keyword}",
+            "result_selector": "h2.Card-Title > a",
+            "title_selector": None,
+            "domain": "elespectador.com",
+            "article_title": "h1.Title",
+            "article_body": "div.Article-Content p",
+            "article_byline": "meta[name='author']",
+            "article_date": "meta[property='article:published_time']",
+        },
+    }
+
+    def __init__(self, pool=None, seen_index=None):
+        # Pool de navegadores compartido; si no se entrega se crea uno al primer uso
+        self.pool = pool
+        self._owns_pool = False
+        self.network_policy = text_only()  # None descarga todos los recursos
+        self.seen_index = seen_index  # Índice de noticias vistas; None usa el del proceso
+
+    def _get_seen_index(self):
+        if self.seen_index is None:
+            self.seen_index = get_seen_index()
+        return self.seen_index
+
+    def _get_pool(self):
+        if self.pool is None:
+            self.pool = AsyncBrowserPool(headless=self.HEADLESS)
+            self._owns_pool = True
+        return self.pool
+
+    @asynccontextmanager
+    async def _page(self):
+        """Página del pool con la política de red aplicada"""
+        async with self._get_pool().page() as page:
+            if self.network_policy is not None:
+                await self.network_policy.apply_async(page.context)
+            yield page
+
+    async def close(self):
+        """Cierra el pool de navegadores si fue creado por este scraper"""
+        if self.pool is not None and self._owns_pool:
+            await self.pool.close()
+            self.pool = None
+            self._owns_pool = False
+
+    # 🔍 Búsqueda genérica en un medio según su configuración en OUTLETS
+    @traced("noticias.busqueda")
+    async def search_outlet(self, page, outlet, keyword):
+        config = self.OUTLETS[outlet]
+        search_url = config["search_url"].format(keyword=self.normalize_keyword(keyword, outlet))
+        async with get_scheduler().slot_async(search_url, PRIORITY_HIGH) as permiso:
+            with span("noticias.goto"):
+                response = await page.goto(search_url, timeout=self.TIMEOUT)
+            permiso.report(response.status if response else None)
+        count("paginas", medio=outlet)
 
         try:
-            await page.wait_for_selector("h3.c-article__title a", timeout=self.TIMEOUT)
+            await page.wait_for_selector(config["result_selector"], timeout=self.TIMEOUT)
         except:
-            print("\n🕵️ No se encontraron resultados en El Tiempo.")
-            return
-
-        items = await page.locator("h3.c-article__title a").all()
-        print("=" * 197)
-        print(f"\n📰 Resultados de El Tiempo para: {keyword}")
-        count = 0
-
-        for item in items:
+            return []
+
+        results = []
+        for item in await page.locator(config["result_selector"]).all():
+            if config["title_selector"]:
+                title_el = item.locator(config["title_selector"])
+                title = await title_el.inner_text() if await title_el.count() else None
+            else:
+                title = await item.inner_text()
             href = await item.get_attribute("href")
-            title = await item.inner_text()
 
             if href and title:
-                full_url = href if href.startswith("http") else f"https://www.eltiempo.com{href}"
-                print(f"\n🔗 {title}")
-                print(f"🌐 {full_url}")
-                count += 1
-                if count >= self.MAX_RESULTS:
-                    print("\n" + "=" * 197)
+                full_url = href if href.startswith("http") else f"{config['base_url']}{href}"
+                results.append(NewsResult(outlet, title.strip(), full_url, len(results) + 1))
+                if len(results) >= self.MAX_RESULTS:
                     break
+        count("items", len(results), medio=outlet)
+        return results
+
+    # 🔍 Scraper para El Tiempo
+    async def eltiempo_scraper(self, page, keyword):
+        return await self.search_outlet(page, "eltiempo", keyword)
 
     # 🔍 Scraper para Semana
     async def semana_scraper(self, page, keyword):
-        search_url = f"https://www.semana.com/buscador/?query={self.normalize_keyword(keyword, 'semana')}"
-        await page.goto(search_url, timeout=self.TIMEOUT)
-
-        try:
-            await page.wait_for_selector("a:has(div.queryly_item_title)", timeout=self.TIMEOUT)
-        except:
-            print("\n🕵️ No se encontraron resultados en Semana.")
-            return
-
-        items = await page.locator("a:has(div.queryly_item_title)").all()
-        print(f"\n📰 Resultados de Semana para: {keyword}")
-        count = 0
-
-        for item in items:
-            title_el = item.locator("div.queryly_item_title")
-            title = await title_el.inner_text() if await title_el.count() else None
-            href = await item.get_attribute("href")
-
-            if href and title:
-                full_url = href if href.startswith("http") else f"https://www.semana.com{href}"
-                print(f"\n🔗 {title}")
-                print(f"🌐 {full_url}")
-                count += 1
-                if count >= self.MAX_RESULTS:
-                    print("\n" + "=" * 197)
-                    break
+        return await self.search_outlet(page, "semana", keyword)
 
     # 🔍 Scraper para El Espectador
     async def elespectador_scraper(self, page, keyword):
-        search_url = f"https://www.elespectador.com/buscador/{self.normalize_keyword(keyword, 'elespectador')}"
-        await page.goto(search_url, timeout=self.TIMEOUT)
-
-        try:
-            await page.wait_for_selector("h2.Card-Title > a", timeout=self.TIMEOUT)
-        except:
-            print("\n🕵️ No se encontraron resultados en El Espectador.")
-            return
-
-        items = await page.locator("h2.Card-Title > a").all()
-        print(f"\n📰 Resultados de El Espectador para: {keyword}")
-        count = 0
+        return await self.search_outlet(page, "elespectador", keyword)
+
+    # 🧵 Busca en todos los medios a la vez, cada uno en su propia página
+    async def search(self, keyword, outlets=None, force_refresh=False, only_new=False):
+        """Con `only_new` retorna solo los resultados que no aparecieron en búsquedas anteriores"""
+        per_outlet = await self._search_outlets(keyword, list(outlets or self.OUTLETS), force_refresh)
+        results = [result for results in per_outlet.values() for result in results or []]
+        if only_new:
+            results = self._get_seen_index().filter_new(results)
+        return results
+
+    # 🧵 {medio: resultados}; None en los medios que fallaron o superaron el plazo
+    async def _search_outlets(self, keyword, outlets, force_refresh=False):
+        cache = get_result_cache()
+
+        # Medios con resultados vigentes en caché no abren página
+        cached = {}
+        if not force_refresh:
+            for outlet in outlets:
+                records = cache.get(outlet, keyword, 1, self.CACHE_TTL)
+                if records is not None:
+                    cached[outlet] = [NewsResult(**record) for record in records]
+                    count("paginas_cache", medio=outlet)
+        if cached:
+            print(f"\n⚡ Resultados en caché: {', '.join(self.OUTLETS[o]['name'] for o in cached)}")
+
+        async def run(outlet):
+            if outlet in cached:
+                return cached[outlet]
+            async def in_own_page():
+                async with self._page() as page:
+                    results = await self.search_outlet(page, outlet, keyword)
+                # Una lista vacía puede ser un bloqueo o una carga lenta (plazo del selector):
+                # no se guarda para no ocultar al medio durante todo CACHE_TTL
+                if results:
+                    cache.put(outlet, keyword, 1, [asdict(result) for result in results])
+                return results
+            try:
+                # Todas las tareas arrancan juntas, así que el límite por tarea es un plazo global
+                return await asyncio.wait_for(in_own_page(), timeout=self.DEADLINE / 1000)
+            except asyncio.TimeoutError:
+                print(f"\n⌛ {self.OUTLETS[outlet]['name']} superó el plazo de búsqueda.")
+                count("fallos", medio=outlet, motivo="plazo")
+            except Exception as e:
+                print(f"\n❌ Error buscando en {self.OUTLETS[outlet]['name']}: {e}")
+                count("fallos", medio=outlet, motivo="error")
+            return None
+
+        per_outlet = await asyncio.gather(*(run(outlet) for outlet in outlets))
+        return dict(zip(outlets, per_outlet))
+
+    # 📚 Busca varias palabras clave; con job_id una ejecución interrumpida continúa donde quedó
+    async def search_many(self, keywords, outlets=None, job_id=None, force_refresh=False):
+        """
+        Retorna {palabra clave: resultados}. Con `job_id` cada par (palabra, medio) exitoso
+        queda en un checkpoint junto con sus resultados, así que repetir la llamada con el
+        mismo `job_id` solo consulta lo que faltó o falló.
+        """
+        outlets = list(outlets or self.OUTLETS)
+        checkpoint = None
+        if job_id:
+            checkpoint = Checkpoint(job_id, self.CHECKPOINT_DIR, keywords=list(keywords), outlets=outlets)
+            if checkpoint.resumed:
+                print(f"\n↩️ Reanudando '{job_id}': {len(checkpoint.completed)} búsquedas ya completadas")
+
+        results = {}
+        for keyword in keywords:
+            # Bajo una clave fija: la palabra del usuario no puede chocar con los campos del checkpoint
+            saved = checkpoint.extra.setdefault("resultados", {}).setdefault(keyword, {}) if checkpoint else {}
+            pending = [o for o in outlets if not (checkpoint and checkpoint.is_done(f"{keyword}|{o}"))]
+            per_outlet = await self._search_outlets(keyword, pending, force_refresh) if pending else {}
+            for outlet, outlet_results in per_outlet.items():
+                if outlet_results is not None and checkpoint is not None:
+                    saved[outlet] = [asdict(result) for result in outlet_results]
+                    checkpoint.mark_done(f"{keyword}|{outlet}")
+            results[keyword] = [
+                result
+                for outlet in outlets
+                for result in (per_outlet.get(outlet) or [NewsResult(**r) for r in saved.get(outlet, [])])
+            ]
 
-        for item in items:
-            href = await item.get_attribute("href")
-            title = await item.inner_text()
+        if checkpoint is not None and len(checkpoint.completed) == len(keywords) * len(outlets):
+            checkpoint.finish()
+        return results
 
-            if href and title:
-                full_url = href if href.startswith("http") else f"https://www.elespectador.com{href}"
-                print(f"\n🔗 {title}")
-                print(f"🌐 {full_url}")
-                count += 1
-                if count >= self.MAX_RESULTS:
-                    print("\n" + "=" * 197)
-                    break
+    # 🖨️ Muestra los resultados agrupados por medio
+    def print_results(self, keyword, results, outlets=None):
+        print("=" * 197)
+        for outlet in outlets or self.OUTLETS:
+            name = self.OUTLETS[outlet]["name"]
+            outlet_results = [r for r in results if r.outlet == outlet]
+            if not outlet_results:
+                print(f"\n🕵️ No se encontraron resultados en {name}.")
+                continue
+            print(f"\n📰 Resultados de {name} para: {keyword}")
+            for result in outlet_results:
+                print(f"\n🔗 {result.title}")
+                print(f"🌐 {result.url}")
+        print("\n" + "=" * 197)
 
     # 🧩 Ejecuta todos los scrapers para una palabra clave
-    async def scraper(self, keyword):
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.HEADLESS)
-            page = await browser.new_page()
-
-            await self.eltiempo_scraper(page, keyword)
-            await self.semana_scraper(page, keyword)
-            await self.elespectador_scraper(page, keyword)
+    async def scraper(self, keyword, force_refresh=False, only_new=False):
+        results = await self.search(keyword, force_refresh=force_refresh, only_new=only_new)
+        self.print_results(keyword, results)
+        return results
+
+    # 📄 Extrae título, párrafos, autor y fecha de un artículo en una sola llamada
+    @traced("noticias.extraccion")
+    async def extract_article(self, page, outlet):
+        config = self.OUTLETS[outlet]
+        await page.wait_for_selector(config["article_title"], timeout=self.TIMEOUT)
+        data = await page.evaluate(ARTICLE_JS, {
+            "title": config["article_title"],
+            "body": config["article_body"],
+            "byline": config["article_byline"],
+            "published": config["article_date"],
+        })
+        count("articulos", medio=outlet)
+        return Article(outlet, page.url, data["title"], data["paragraphs"], data["byline"], data["published"])
+
+    # 📄 Extrae y procesa un artículo de cualquier medio configurado
+    async def scrape_outlet_article(self, page, outlet, validators=None, reprocess=True):
+        """
+        Registra el artículo en el índice de vistas (hash del contenido y `validators`
+        HTTP). Con `reprocess=False` un artículo cuyo contenido no cambió no se vuelve a procesar.
+        """
+        try:
+            article = await self.extract_article(page, outlet)
+            print(f"\n📰 {article.title}\n")
+            changed = self._get_seen_index().mark(page.url, article.text, **(validators or {}))
+            get_search_index().add("noticia", page.url, article.title, article.text, url=page.url,
+                                   sitio=outlet, fecha=article.published)
+            if not changed and not reprocess:
+                print("♻️ El contenido no cambió desde la última lectura; no se vuelve a procesar.")
+                return article
+            process_text(page.url, "Noticia", article.text)
+            return article
 
-            await browser.close()
+        except Exception as e:
+            print(f"❌ No se pudo extraer la noticia de {self.OUTLETS[outlet]['name']}. Error: {e}")
 
     # 📄 Extrae contenido de un artículo de El Tiempo
     async def scrape_eltiempo_article(self, page):
-        try:
-            await page.wait_for_selector("h1", timeout=self.TIMEOUT)
-            title = await page.locator("h1").first.inner_text()
-
-            paragraph_elements = page.locator("div.paragraph")
-            count = await paragraph_elements.count()
-            paragraphs = [
-                await paragraph_elements.nth(i).inner_text()
-                for i in range(count)
-                if await paragraph_elements.nth(i).inner_text()
-            ]
-
-            full_text = "\n\n".join(paragraphs)
-            print(f"\n📰 {title}\n")
-            process_text(page.url, "Noticia", full_text)
-
-        except Exception as e:
-            print(f"❌ No se pudo extraer la noticia de El Tiempo. Error: {e}")
+        return await self.scrape_outlet_article(page, "eltiempo")
 
     # 📄 Extrae contenido de un artículo de Semana
     async def scrape_semana_article(self, page):
-        try:
-            await page.wait_for_selector("h1.text-smoke-700", timeout=self.TIMEOUT)
-            title = await page.locator("h1.text-smoke-700").first.inner_text()
-
-            paragraph_elements = page.locator("p[data-type='text']")
-            count = await paragraph_elements.count()
-            paragraphs = [
-                await paragraph_elements.nth(i).inner_text()
-                for i in range(count)
-                if await paragraph_elements.nth(i).inner_text()
-            ]
-
-            full_text = "\n\n".join(paragraphs)
-            print(f"\n📰 {title}\n")
-            process_text(page.url, "Noticia", full_text)
-
-        except Exception as e:
-            print(f"❌ No se pudo extraer la noticia de Semana. Error: {e}")
+        return await self.scrape_outlet_article(page, "semana")
 
     # 📄 Extrae contenido de un artículo de El Espectador
     async def scrape_elespectador_article(self, page):
-        try:
-            await page.wait_for_selector("h1.Title", timeout=self.TIMEOUT)
-            title = await page.locator("h1.Title").inner_text()
-
-            paragraph_elements = page.locator("div.Article-Content p")
-            count = await paragraph_elements.count()
-            paragraphs = [
-                await paragraph_elements.nth(i).inner_text()
-                for i in range(count)
-                if await paragraph_elements.nth(i).inner_text()
-            ]
-
-            full_text = "\n\n".join(paragraphs)
-            print(f"\n📰 {title}\n")
-            process_text(page.url, "Noticia", full_text)
-
-        except Exception as e:
-            print(f"❌ No se pudo extraer la noticia de El Espectador. Error: {e}")
+        return await self.scrape_outlet_article(page, "elespectador")
 
     # 🔀 Escoge scraper según el dominio del URL
-    async def scrape_article(self, page, url):
-        await page.goto(url, timeout=self.TIMEOUT)
-
-        if "eltiempo.com" in url:
-            await self.scrape_eltiempo_article(page)
-        elif "semana.com" in url:
-            await self.scrape_semana_article(page)
-        elif "elespectador.com" in url:
-            await self.scrape_elespectador_article(page)
-        else:
+    def outlet_for_url(self, url):
+        for outlet, config in self.OUTLETS.items():
+            if config["domain"] in url:
+                return outlet
+        return None
+
+    async def scrape_article(self, page, url, if_seen="fetch"):
+        """
+        `if_seen` decide qué hacer con un artículo ya descargado antes:
+        "fetch" lo descarga y procesa de nuevo, "skip" lo omite sin tocar la red y
+        "revalidate" hace una petición condicional (ETag / Last-Modified) y solo lo
+        descarga si el servidor indica que cambió.
+        """
+        outlet = self.outlet_for_url(url)
+        if outlet is None:
             print("❌ Sitio no reconocido.")
+            return None
+
+        index = self._get_seen_index()
+        previous = index.get(url) if if_seen != "fetch" else None
+        if previous and previous["hash"]:
+            if if_seen == "skip":
+                print("⏭️ Artículo leído anteriormente; se omite.")
+                index.count_avoided()
+                return None
+            if if_seen == "revalidate" and await self._not_modified(page, url, previous):
+                print("⏭️ El artículo no cambió desde la última lectura; se omite.")
+                index.count_avoided(revalidated=True)
+                return None
+
+        async with get_scheduler().slot_async(url) as permiso:
+            with span("noticias.goto"):
+                response = await page.goto(url, timeout=self.TIMEOUT)
+            permiso.report(response.status if response else None)
+        headers = response.headers if response else {}
+        validators = {"etag": headers.get("etag"), "last_modified": headers.get("last-modified")}
+        return await self.scrape_outlet_article(page, outlet, validators, reprocess=if_seen == "fetch")
+
+    # 🔁 Petición HTTP condicional sin renderizar la página; True si el servidor responde 304
+    @traced("noticias.revalidacion")
+    async def _not_modified(self, page, url, previous):
+        headers = {}
+        if previous["etag"]:
+            headers["If-None-Match"] = previous["etag"]
+        if previous["last_modified"]:
+            headers["If-Modified-Since"] = previous["last_modified"]
+        if not headers:
+            return False
+        try:
+            async with get_scheduler().slot_async(url, PRIORITY_LOW) as permiso:
+                response = await page.context.request.get(url, headers=headers, timeout=self.TIMEOUT)
+                permiso.report(response.status)
+            return response.status == 304
+        except Exception:
+            return False
 
     # 🔧 Normaliza palabras clave para cada sitio
     @staticmethod
@@ -211,18 +420,20 @@ class NewScraper:
             try:
                 if modo == "1":
                     word = input("🔍 ¿Qué término deseas buscar en noticias? ")
-                    await scrap.scraper(word)
+                    only_new = input("🆕 ¿Mostrar solo noticias nuevas? (s/N): ").strip().lower() == "s"
+                    await scrap.scraper(word, only_new=only_new)
                 elif modo == "2":
                     url = input("🔗 Pega el link de la noticia: ")
-                    async with async_playwright() as p:
-                        browser = await p.chromium.launch(headless=scrap.HEADLESS)
-                        page = await browser.new_page()
-                        await scrap.scrape_article(page, url)
-                        await browser.close()
+                    async with scrap._page() as page:
+                        # Un link pedido explícitamente siempre se muestra, aunque ya se haya leído
+                        await scrap.scrape_article(page, url, if_seen="fetch")
                 else:
                     print("❌ Opción inválida.")
             except Exception as e:
                 print(f"\n❌ Error: {e}")
+            finally:
+                await scrap.close()
+                print(f"🧠 Índice de noticias: {scrap._get_seen_index().summary()}")
 
         try:
             asyncio.run(run_scraper())
@@ -0,0 +1,103 @@
+import importlib
+import threading
+
+
+class Registry:
+    """
+    Registro perezoso nombre → "modulo:atributo".
+
+    El módulo se importa en `load()` y el objeto se construye en `get()`, ambos en el
+    primer uso, así que registrar un sitio no cuesta nada al arrancar.
+    Con `group` también se leen los entry points de ese grupo (paquetes instalados que
+    declaran, por ejemplo, `[project.entry-points."proyecto_scrapers.sitios"]
+    mitienda = "mi_paquete.scraper:MiTiendaScraper"`); solo se consultan los metadatos
+    cuando se pide un nombre que no está registrado o la lista completa.
+    """
+
+    def __init__(self, group=None):
+        self.group = group
+        self._targets = {}  # nombre → (objetivo, kwargs)
+        self._loaded = {}
+        self._instances = {}
+        self._discovered = group is None
+        self._lock = threading.RLock()
+
+    def register(self, name, target=None, **kwargs):
+        """
+        Registra `target` ("modulo:atributo" o el objeto) bajo `name`; `kwargs` se pasan al
+        construirlo. Sin `target` funciona como decorador de clase o función.
+        """
+        if target is None:
+            def decorator(obj):
+                self.register(name, obj, **kwargs)
+                return obj
+            return decorator
+        with self._lock:
+            self._targets[name] = (target, kwargs)
+            self._loaded.pop(name, None)
+            self._instances.pop(name, None)
+        return target
+
+    def _discover(self):
+        if self._discovered:
+            return
+        self._discovered = True
+        from importlib.metadata import entry_points
+        for entry_point in entry_points(group=self.group):
+            self._targets.setdefault(entry_point.name, (entry_point.value, {}))
+
+    def names(self):
+        with self._lock:
+            self._discover()
+            return list(self._targets)
+
+    def __contains__(self, name):
+        with self._lock:
+            if name not in self._targets:
+                self._discover()
+            return name in self._targets
+
+    def load(self, name):
+        """Importa y retorna la clase o fábrica registrada (KeyError si no existe)"""
+        with self._lock:
+            if name not in self._loaded:
+                if name not in self:
+                    raise KeyError(name)
+                target, _ = self._targets[name]
+                if isinstance(target, str):
+                    module, _, attribute = target.partition(":")
+                    target = importlib.import_module(module)
+                    for part in attribute.split(".") if attribute else ():
+                        target = getattr(target, part)
+                self._loaded[name] = target
+            return self._loaded[name]
+
+    def get(self, name):
+        """Instancia compartida de `name`, construida en el primer uso"""
+        with self._lock:
+            if name not in self._instances:
+                factory = self.load(name)
+                self._instances[name] = factory(**self._targets[name][1])
+            return self._instances[name]
+
+    def loaded(self):
+        """Nombres ya importados (útil para verificar qué cargó el arranque)"""
+        return list(self._loaded)
+
+
+# Sitios de retail; otros paquetes pueden agregar los suyos con entry points
+SITES = Registry(group="proyecto_scrapers.sitios")
+SITES.register("mercadolibre", "Scrapers.retail_scraper:MercadoLibreScraper")
+SITES.register("exito", "Scrapers.retail_scraper:ExitoScraper")
+
+# Componentes de la aplicación
+COMPONENTS = Registry()
+COMPONENTS.register("retail", "Scrapers.retail_scraper:RetailScraper")
+COMPONENTS.register("wiki", "Scrapers.wikiscraper:WikiScraper", mode="html")
+COMPONENTS.register("noticias", "Scrapers.newscraper:NewScraper")
+COMPONENTS.register("resumidor", "herramientas:get_summarizer")
+
+
+def register_site(name, target=None, **kwargs):
+    """Registra un sitio de retail; se puede usar como decorador de la clase"""
+    return SITES.register(name, target, **kwargs)
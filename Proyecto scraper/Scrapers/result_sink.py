@@ -0,0 +1,84 @@
+import csv
+import io
+import json
+import os
+
+# Esquema fijo de los reportes retail (los campos que falten quedan vacíos)
+CAMPOS = ["producto", "precio_actual", "precio_original", "descuento", "enlace", "sitio", "fecha", "vendedor"]
+
+
+class ResultSink:
+    """
+    Escritor incremental de resultados en JSONL y CSV.
+
+    Cada página se agrega con una sola escritura seguida de flush + fsync sobre archivos
+    `.part`, así que un fallo a mitad de la ejecución conserva las páginas ya escritas.
+    `close()` renombra los `.part` a su nombre final de forma atómica (os.replace).
+    Con `append=True` continúa un reporte existente, publicado o no (para reanudar una ejecución).
+    """
+
+    def __init__(self, directorio, nombre, campos=CAMPOS, append=False):
+        os.makedirs(directorio, exist_ok=True)
+        self.campos = campos
+        self.jsonl_path = os.path.join(directorio, f"{nombre}.jsonl")
+        self.csv_path = os.path.join(directorio, f"{nombre}.csv")
+        self.registros = 0
+        if append:
+            # Un reporte ya publicado por una ejecución anterior vuelve a ser `.part`
+            for destino in (self.jsonl_path, self.csv_path):
+                if os.path.exists(destino) and not os.path.exists(destino + ".part"):
+                    os.replace(destino, destino + ".part")
+        if append and os.path.exists(self.jsonl_path + ".part"):
+            with open(self.jsonl_path + ".part", encoding="utf-8") as previo:
+                self.registros = sum(1 for _ in previo)
+
+        modo = "a" if append else "w"
+        self._jsonl = open(self.jsonl_path + ".part", modo, encoding="utf-8")
+        self._csv = open(self.csv_path + ".part", modo, newline="", encoding="utf-8")
+        if self._csv.tell() == 0:
+            self._escribir(self._csv, self._filas_csv([], encabezado=True))
+
+    def _filas_csv(self, registros, encabezado=False):
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.campos, extrasaction="ignore", restval="")
+        if encabezado:
+            writer.writeheader()
+        writer.writerows(registros)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _escribir(archivo, texto):
+        archivo.write(texto)
+        archivo.flush()
+        os.fsync(archivo.fileno())
+
+    def write(self, registros):
+        """Agrega los registros de una página a ambos archivos"""
+        if not registros:
+            return
+        self._escribir(self._jsonl, "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros))
+        self._escribir(self._csv, self._filas_csv(registros))
+        self.registros += len(registros)
+
+    def read(self):
+        """Registros escritos hasta ahora (incluye los de una ejecución reanudada)"""
+        with open(self.jsonl_path + ".part", encoding="utf-8") as f:
+            return [json.loads(linea) for linea in f if linea.strip()]
+
+    def close(self):
+        """Cierra y publica los archivos; si no hubo registros los elimina"""
+        for archivo, destino in ((self._jsonl, self.jsonl_path), (self._csv, self.csv_path)):
+            if archivo.closed:
+                continue
+            archivo.close()
+            if self.registros:
+                os.replace(destino + ".part", destino)
+            else:
+                os.remove(destino + ".part")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
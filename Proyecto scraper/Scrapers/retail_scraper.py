@@ -1,11 +1,37 @@
-from playwright.sync_api import sync_playwright
-import csv
-import time
-import random
 from datetime import datetime
+import multiprocessing
 import os
-import json
-from abc import ABC, abstractmethod
+from abc import ABC
+from urllib.parse import quote, quote_plus
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from cache import get_result_cache
+from product_matching import get_product_matcher
+from product_record import ProductRecord, discount_pct, format_cop, parse_cop, parse_discount
+from product_store import get_product_store
+from search_index import get_search_index
+from Scrapers.browser_pool import get_pool, close_pool
+from Scrapers.checkpoints import Checkpoint
+from Scrapers.network_policy import text_only
+from Scrapers.registry import SITES
+from Scrapers.result_sink import ResultSink
+from Scrapers.scheduler import PRIORITY_HIGH, PRIORITY_NORMAL, get_scheduler
+from Scrapers.session_state import get_session_store
+from Scrapers.wait_strategy import WaitStrategy
+from tracing import count, get_tracer, span, traced
+
+# Extrae todas las tarjetas de la página en una sola llamada al navegador.
+# Recibe el selector del contenedor y {campo: [selector, atributo]}; atributo null = innerText.
+EXTRACTOR_JS = """
+({contenedor, campos}) => Array.from(document.querySelectorAll(contenedor)).map(card => {
+    const registro = {};
+    for (const [campo, [selector, atributo]] of Object.entries(campos)) {
+        const el = card.querySelector(selector);
+        registro[campo] = el ? (atributo ? el.getAttribute(atributo) : el.innerText.trim()) : null;
+    }
+    return registro;
+})
+"""
 
 class BaseRetailScraper(ABC):
     """Clase base abstracta para scrapers de retail con funcionalidades comunes"""
@@ -17,7 +43,10 @@ class BaseRetailScraper(ABC):
         self.viewport = {"width": 1366, "height": 768}
         self.report_dir = "reportes_retail"
         self.default_wait_time = 3000  # 3 segundos
-        self.tiempo_espera_post_busqueda = 3  # Valor por defecto para todos los sitios
+        self.waits = WaitStrategy()  # Esperas por señales; jitter=True agrega pausas corteses
+        self.paginacion_por_url = True  # Usa url_pagina() si el sitio la implementa
+        self.max_pestanas = 4  # Páginas cargando en paralelo en la paginación por URL
+        self.cache_ttl = 30 * 60  # Vigencia de las páginas de resultados en caché (segundos)
         
         # Selectores (deben definirse en cada clase hija)
         self.search_input_selector = None
@@ -30,24 +59,385 @@ class BaseRetailScraper(ABC):
         self.product_discount_selector = None
         self.next_page_selector = None
         self.cookie_accept_selector = None
-        
-        os.makedirs(self.report_dir, exist_ok=True)
-
-    @abstractmethod
-    def scrape(self, producto: str, paginas: int = 1):
-        """Método principal de scraping a implementar por cada sitio"""
-        pass
-
-    def _setup_browser(self):
-        """Configura el navegador Playwright con opciones anti-detección"""
-        browser = sync_playwright().start().chromium.launch(
-            headless=False,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--start-maximized'
-            ]
-        )
-        context = browser.new_context(
+        self.no_results_selector = None  # Marca de búsqueda sin resultados (evita la carga de control)
+        self.campos_extra = {}  # {campo: (selector, atributo)} propios de cada sitio
+        self.extraccion_por_lotes = True  # Una sola llamada evaluate por página
+        self.network_policy = text_only()  # None descarga todos los recursos
+        self.reusar_sesion = True  # Carga cookies/localStorage guardados y evita la portada y el aviso de cookies
+        self._con_sesion = False  # True mientras la búsqueda actual usa un estado guardado
+        self._escritos = 0  # Registros en el reporte del intento actual (también con acumular=False)
+
+    def scrape(self, producto: str, paginas: int = 1, force_refresh: bool = False, acumular: bool = True,
+               job_id: str = None):
+        """
+        Flujo común de scraping: búsqueda, extracción por página y paginación.
+        Si todas las páginas pedidas están en la caché de resultados no se abre el navegador;
+        `force_refresh` obliga a consultar el sitio. Con `acumular=False` los productos solo
+        se escriben al reporte (memoria constante en crawls grandes) y se retorna una lista vacía.
+        Con `job_id` se guarda un checkpoint por página: si la ejecución falla, otra con el
+        mismo `job_id` continúa desde la última página completada y sobre el mismo reporte.
+        Con `reusar_sesion` el contexto parte del estado guardado del sitio (cookies y
+        localStorage) y cada búsqueda exitosa lo renueva.
+        Si no aparece ningún producto con la política de red o la sesión activas, una carga
+        de control sin ellas decide entre reintentar sin la que falló (solo en esta llamada)
+        o aceptar que la búsqueda no tiene resultados.
+        Ante un error se retornan los productos obtenidos hasta ese momento.
+        Retorna una lista de `ProductRecord`.
+        """
+        cache = get_result_cache()
+        if not force_refresh:
+            cacheadas = cache.get_pages(self.site_name, producto, paginas, self.cache_ttl)
+            if cacheadas is not None:
+                print(f"\n⚡ Resultados de '{producto}' en {self.site_name} obtenidos de la caché")
+                count("paginas_cache", paginas, sitio=self.site_name)
+                return [ProductRecord.from_dict(fila) for registros in cacheadas for fila in registros]
+
+        checkpoint = None
+        if job_id:
+            checkpoint = Checkpoint(f"{job_id}_{self.site_name}", os.path.join(self.report_dir, "checkpoints"),
+                                    sitio=self.site_name, consulta=producto)
+
+        sesiones = get_session_store()
+        politica = self.network_policy
+        estado = sesiones.load(self.site_name) if self.reusar_sesion else None
+        while True:
+            productos, sin_productos = self._scrape_navegador(producto, paginas, cache, acumular, checkpoint,
+                                                              job_id, politica, estado)
+            estado = estado if self._con_sesion else None  # El aviso de cookies ya pudo descartarla
+            if not sin_productos or (politica is None and estado is None):
+                break
+            # No aparecieron productos: una carga de control sin política ni sesión dice si
+            # fueron ellas o si la búsqueda de verdad no tiene resultados
+            control = self._control_listado(producto)
+            if control == "sin_resultados":
+                print(f"ℹ️ '{producto}' no tiene resultados en {self.site_name}")
+                break
+            if control != "productos":
+                print(f"❌ No se pudieron obtener productos de {self.site_name} (ver error_{self.site_name.lower()}.png)")
+                break
+            if estado is not None:
+                sesiones.invalidate(self.site_name, "no aparecieron productos")
+                estado = None
+                count("reintentos", sitio=self.site_name, motivo="sesion")
+            else:
+                # Solo para esta búsqueda: el scraper es compartido por todo el proceso
+                print(f"⚠️ No aparecieron productos en {self.site_name} con la política de red; se reintenta sin bloqueo")
+                politica = None
+                count("reintentos", sitio=self.site_name, motivo="politica_red")
+
+        self._emparejar()
+        return productos
+
+    def _scrape_navegador(self, producto, paginas, cache, acumular, checkpoint, job_id, politica, estado):
+        """
+        Un intento de `scrape` en el navegador con la política de red y el estado de sesión
+        indicados. Retorna (productos, sin_productos): `sin_productos` es True cuando falló
+        antes de escribir ningún registro al reporte, con política o sesión activas, sin
+        tarjetas en la página y sin la marca de "sin resultados" del sitio, es decir, cuando
+        vale la pena comprobar si fueron ellas.
+        """
+        productos = []
+        self._con_sesion = estado is not None
+        self._escritos = 0
+        inicio = politica.snapshot() if politica is not None else None  # La política se comparte entre búsquedas
+        with self._setup_browser(politica, estado) as page:
+            try:
+                self._scrape_en_vivo(page, producto, paginas, cache, productos, acumular, checkpoint)
+                if checkpoint is not None:
+                    checkpoint.finish()
+                if self.reusar_sesion:
+                    get_session_store().save(self.site_name, page.context)
+            except Exception as e:
+                if not self._escritos and self._sin_resultados(page):
+                    print(f"ℹ️ '{producto}' no tiene resultados en {self.site_name}")
+                    return productos, False
+                print(f"\n❌ Error durante scraping: {str(e)}")
+                os.makedirs(self.report_dir, exist_ok=True)
+                page.screenshot(path=os.path.join(self.report_dir, f"error_{self.site_name.lower()}.png"))
+                if (politica is not None or self._con_sesion) and not self._escritos and not self._hay_productos(page):
+                    return productos, True
+                if checkpoint is not None:
+                    print(f"💾 Progreso guardado; repite con job_id='{job_id}' para continuar")
+            finally:
+                if politica is not None:
+                    red = politica.since(inicio)
+                    print(f"🚫 Red: {red.summary()}")
+                    count("bytes", red.allowed_bytes, sitio=self.site_name)
+                    count("peticiones_bloqueadas", red.blocked_total, sitio=self.site_name)
+                print(f"⏱️ Esperas: {self.waits.summary_text()}")
+                print(f"🚦 Planificador: {get_scheduler().summary()}")
+        return productos, False
+
+    @traced("retail.control")
+    def _control_listado(self, producto):
+        """
+        Carga de control del listado en un contexto sin política de red ni sesión guardada.
+        Retorna "productos", "sin_resultados" (la página cargó y muestra la marca del sitio)
+        o None si no se puede saber: un error, un bloqueo o un sitio sin marca.
+        Sin URL de listado se usa el buscador de la portada.
+        """
+        self._con_sesion = False
+        esperado = ", ".join(s for s in (self.product_container_selector, self.no_results_selector) if s)
+        with self._setup_browser() as page:
+            error = None
+            try:
+                url = self.url_pagina(producto, 1)
+                if url:
+                    self._ir_a(page, url, PRIORITY_HIGH)
+                else:
+                    self._ir_a(page, self.base_url, PRIORITY_HIGH)
+                    self._manejar_cookies(page)
+                    self._realizar_busqueda(page, producto)
+                page.wait_for_selector(esperado, timeout=self.waits.timeout)
+            except Exception as e:
+                error = e
+            try:
+                if page.query_selector(self.product_container_selector) is not None:
+                    return "productos"
+            except Exception:
+                pass
+            if self._sin_resultados(page):
+                return "sin_resultados"
+            print(f"⚠️ La carga de control en {self.site_name} no mostró productos ni la marca de "
+                  f"\"sin resultados\"{f': {error}' if error else ''}")
+            return None
+
+    def _emparejar(self):
+        """Enlaza los productos nuevos con sus equivalentes en otros sitios; un fallo no afecta al crawl"""
+        try:
+            with span("retail.emparejamiento"):
+                get_product_matcher().update()
+        except Exception as e:
+            print(f"⚠️ No se pudo actualizar el emparejamiento de productos: {str(e)}")
+
+    def _hay_productos(self, page):
+        try:
+            return page.query_selector(self.product_container_selector) is not None
+        except Exception:
+            return True  # Página caída: no es culpa de la política de red
+
+    def _sin_resultados(self, page):
+        """True si la página muestra la marca de "sin resultados" del sitio"""
+        if not self.no_results_selector:
+            return False
+        try:
+            return page.query_selector(self.no_results_selector) is not None
+        except Exception:
+            return False
+
+    def _scrape_en_vivo(self, page, producto, paginas, cache, productos, acumular=True, checkpoint=None):
+        """
+        Búsqueda y paginación en el navegador; las excepciones las maneja `scrape`.
+        Cada página se escribe al reporte y al almacén de productos apenas se extrae y se
+        agrega a `productos`, así que un fallo conserva las páginas anteriores. Con
+        `acumular=False` no se guardan los productos en memoria.
+        """
+        store = get_product_store()
+        desde = max(checkpoint.completed, default=0) + 1 if checkpoint else 1
+
+        with self._abrir_reporte(producto, checkpoint) as reporte:
+            if desde > 1:
+                print(f"\n↩️ Reanudando '{producto}' en {self.site_name} desde la página {desde}...")
+                if acumular:
+                    productos.extend(ProductRecord.from_dict(fila) for fila in reporte.read())
+            else:
+                print(f"\n🔍 Buscando '{producto}' en {self.site_name}...")
+
+            recorrido = self._recorrer_paginas(page, producto, paginas, desde, checkpoint.cursor if checkpoint else None)
+            for pagina_actual, registros, url in recorrido:
+                print(f"📄 Procesando página {pagina_actual}...")
+                with span("retail.reporte"):
+                    filas = [registro.to_dict() for registro in registros]
+                    reporte.write(filas)
+                    self._escritos = reporte.registros
+                    cache.put(self.site_name, producto, pagina_actual, filas)
+                with span("retail.almacen"):
+                    store.upsert(registros)
+                    get_search_index().add_products(registros)
+                count("paginas", sitio=self.site_name)
+                count("items", len(registros), sitio=self.site_name)
+                if checkpoint is not None:
+                    checkpoint.mark_done(pagina_actual, cursor=url)
+                for registro in registros:
+                    descuento = f" (-{registro.descuento:g}%)" if registro.descuento else ""
+                    print(f"✔ {registro.producto[:30]}... - {format_cop(registro.precio)}{descuento}")
+                if acumular:
+                    productos.extend(registros)
+
+        if reporte.registros:
+            print(f"\n✅ {reporte.registros} resultados guardados en:\n- {reporte.csv_path}\n- {reporte.jsonl_path}")
+        else:
+            print("No hay productos para guardar")
+
+    def url_pagina(self, producto, numero):
+        """URL del listado de la página `numero` (desde 1); None si el sitio no la soporta"""
+        return None
+
+    def _recorrer_paginas(self, page, producto, paginas, desde=1, ultima_url=None):
+        """
+        Genera (número de página, registros, URL de la página) en orden, empezando en `desde`.
+
+        Si el sitio sabe construir URLs de listado se abren las páginas en pestañas
+        paralelas; si ese esquema falla se sigue desde la última página obtenida con la
+        paginación por clics. Para reanudar con clics se abre `ultima_url` (la URL de la
+        página `desde - 1`) y se pasa a la siguiente. Con un estado de sesión guardado la
+        paginación por clics también abre directo el listado, sin pasar por la portada.
+        """
+        siguiente = desde
+        directa = self._con_sesion
+        if siguiente > paginas:
+            return
+        if self.paginacion_por_url and self.url_pagina(producto, 1):
+            try:
+                for numero, registros, url in self._paginas_por_url(page, producto, paginas, desde):
+                    siguiente = numero + 1
+                    ultima_url = url
+                    yield numero, registros, url
+                return
+            except Exception as e:
+                print(f"⚠️ Paginación por URL falló en la página {siguiente}: {str(e)}. Se usa paginación por clics")
+                count("reintentos", sitio=self.site_name, motivo="paginacion_url")
+                directa = False  # El listado por URL falló: se busca desde la portada
+
+        anterior = (self.url_pagina(producto, siguiente - 1) or ultima_url) if siguiente > 1 else None
+        listado = self.url_pagina(producto, 1) if directa and siguiente == 1 else None
+        if listado:
+            self._ir_a(page, listado, PRIORITY_HIGH)
+            self._manejar_cookies(page)
+            self.waits.stable_count(page, self.product_container_selector)
+        elif anterior is None:
+            self._ir_a(page, self.base_url, PRIORITY_HIGH)
+            self._manejar_cookies(page)
+            self._esperar_carga(3, 5)
+            self._realizar_busqueda(page, producto)
+            # Sin URL de la última página completada se avanza por clics hasta `siguiente`
+            for _ in range(1, siguiente):
+                if not self._ir_a_siguiente_pagina(page):
+                    print("No hay más páginas disponibles.")
+                    return
+        else:
+            self._ir_a(page, anterior, PRIORITY_HIGH)
+            self._manejar_cookies(page)
+            self.waits.stable_count(page, self.product_container_selector)
+            if not self._ir_a_siguiente_pagina(page):
+                print("No hay más páginas disponibles.")
+                return
+
+        # Bucle de paginación
+        for pagina_actual in range(siguiente, paginas + 1):
+            yield pagina_actual, self._extraer_pagina(page), page.url
+
+            if pagina_actual < paginas and not self._ir_a_siguiente_pagina(page):
+                print("No hay más páginas disponibles.")
+                break
+
+    def _paginas_por_url(self, page, producto, paginas, desde=1):
+        """
+        Abre la página `desde` en `page` y las siguientes hasta N en pestañas del mismo
+        contexto, con hasta `max_pestanas` cargando a la vez. Las navegaciones se lanzan sin
+        bloquear, así que el tiempo total se acerca al de una sola carga.
+
+        Pedir más páginas de las que tiene el listado no es un fallo del esquema de URLs:
+        una página sin botón "Siguiente" deja de abrir pestañas, y una pestaña posterior
+        vacía (o con la marca de "sin resultados") termina el recorrido sin reintentos ni
+        error para el planificador.
+        """
+        self._ir_a(page, self.url_pagina(producto, desde), PRIORITY_HIGH)
+        self._manejar_cookies(page)
+        # Los listados que se llenan con peticiones XHR pueden verse "estables" a medio cargar
+        self.waits.network_idle(page)
+        self.waits.stable_count(page, self.product_container_selector)
+        yield desde, self._extraer_pagina(page), page.url
+
+        planificador = get_scheduler()
+        ultima = not self._hay_siguiente(page)  # La página anterior ya no tenía "Siguiente"
+        pendientes = [] if ultima else list(range(desde + 1, paginas + 1))
+        abiertas = []
+        try:
+            while pendientes or abiertas:
+                while pendientes and len(abiertas) < self.max_pestanas:
+                    url = self.url_pagina(producto, pendientes[0])
+                    # Sin pestañas cargando se espera un permiso; si hay alguna, solo se abre
+                    # otra cuando el planificador tiene uno libre
+                    permiso = planificador.acquire(url, PRIORITY_NORMAL, block=not abiertas)
+                    if permiso is None:
+                        break
+                    numero = pendientes.pop(0)
+                    pestana = page.context.new_page()
+                    abiertas.append((numero, pestana, permiso))
+                    pestana.evaluate("url => { window.location.href = url; }", url)
+
+                numero, pestana, permiso = abiertas.pop(0)
+                fin = False
+                try:
+                    with span("retail.carga_pestana"):
+                        fin = not self._esperar_listado(pestana, timeout=15000)
+                    if not fin:
+                        registros = self._extraer_pagina(pestana)
+                        url = pestana.url
+                        if not self._hay_siguiente(pestana):
+                            ultima = True
+                            pendientes.clear()
+                except Exception:
+                    fin = ultima or self._sin_resultados(pestana)
+                    if not fin:
+                        permiso.error = True
+                        raise
+                finally:
+                    pestana.close()
+                    planificador.release(permiso)
+                if fin:
+                    print(f"✅ Fin del listado en {self.site_name}: no hay página {numero}")
+                    return
+                yield numero, registros, url
+                if ultima:
+                    return  # Las pestañas abiertas después de la última página se cierran sin esperarlas
+        finally:
+            for _, pestana, permiso in abiertas:
+                pestana.close()
+                planificador.release(permiso)
+
+    def _esperar_listado(self, page, timeout=None):
+        """
+        Espera a que las tarjetas aparezcan y se estabilicen; retorna False si en su lugar
+        aparece la marca de "sin resultados" del sitio (página después del final)
+        """
+        if self.no_results_selector:
+            page.wait_for_selector(f"{self.product_container_selector}, {self.no_results_selector}",
+                                   timeout=timeout or self.waits.timeout)
+            if self._sin_resultados(page):
+                return False
+        self.waits.stable_count(page, self.product_container_selector, timeout=timeout)
+        return True
+
+    def _hay_siguiente(self, page):
+        """True si la página tiene botón "Siguiente" (o si no se puede saber)"""
+        if not self.next_page_selector:
+            return True
+        try:
+            return page.locator(self.next_page_selector).count() > 0
+        except Exception:
+            return True
+
+    def _ir_a(self, page, url, prioridad=PRIORITY_NORMAL):
+        """
+        Navega a `url`. Todas las cargas completas pasan por aquí y por el planificador
+        por dominio (límite de tasa, concurrencia y backoff).
+        """
+        with get_scheduler().slot(url, prioridad) as permiso, span("retail.goto"):
+            respuesta = page.goto(url, timeout=60000)
+            permiso.report(respuesta.status if respuesta else None)
+            return respuesta
+
+    @contextmanager
+    def _setup_browser(self, politica=None, storage_state=None):
+        """
+        Obtiene del pool compartido una página en un contexto aislado con opciones anti-detección
+        y, si se indican, con una política de red (NetworkPolicy) y un estado guardado
+        (ruta o dict de `storage_state` de Playwright).
+        """
+        with get_pool().page(
+            storage_state=storage_state,
             user_agent=self.user_agent,
             viewport=self.viewport,
             locale="es-CO",
@@ -56,34 +446,42 @@ class BaseRetailScraper(ABC):
                 "Accept-Language": "es-CO,es;q=0.9",
                 "Referer": self.base_url
             }
-        )
-        return browser, context.new_page()
-
-    def _guardar_resultados(self, productos: list, producto: str):
-        """Guarda los resultados en CSV y JSON"""
-        if not productos:
-            print("No hay productos para guardar")
-            return
-        
+        ) as page:
+            if politica is not None:
+                politica.apply(page.context)
+            yield page
+
+    def _abrir_reporte(self, producto: str, checkpoint=None):
+        """
+        Abre el reporte incremental (JSONL + CSV) de esta ejecución. Un trabajo con
+        checkpoint continúa el reporte que empezó su primera ejecución.
+        """
+        if checkpoint is not None and "reporte" in checkpoint.extra:
+            return ResultSink(self.report_dir, checkpoint.extra["reporte"], append=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        nombre_archivo = f"{self.site_name}_{producto}_{timestamp}"
-
-        # CSV
-        csv_path = os.path.join(self.report_dir, f"{nombre_archivo}.csv")
-        with open(csv_path, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=productos[0].keys())
-            writer.writeheader()
-            writer.writerows(productos)
-
-        # JSON
-        json_path = os.path.join(self.report_dir, f"{nombre_archivo}.json")
-        with open(json_path, "w", encoding="utf-8") as file:
-            json.dump(productos, file, ensure_ascii=False, indent=2)
-
-        print(f"\n✅ Resultados guardados en:\n- {csv_path}\n- {json_path}")
+        nombre = f"{self.site_name}_{producto}_{timestamp}"
+        if checkpoint is not None:
+            checkpoint.extra["reporte"] = nombre
+            checkpoint.save()
+        return ResultSink(self.report_dir, nombre)
 
+    @traced("retail.cookies")
     def _manejar_cookies(self, page):
-        """Maneja el popup de cookies si aparece"""
+        """
+        Maneja el popup de cookies si aparece. Con un estado de sesión cargado no se espera
+        el popup: solo se revisa si ya está en la página, y si está es que el sitio no
+        reconoció el estado guardado, que se descarta.
+        """
+        if self._con_sesion:
+            try:
+                visible = bool(self.cookie_accept_selector) and page.is_visible(self.cookie_accept_selector)
+            except Exception:
+                visible = False
+            if not visible:
+                return
+            get_session_store().invalidate(self.site_name, "reapareció el aviso de cookies")
+            count("sesiones_rechazadas", sitio=self.site_name)
+            self._con_sesion = False
         try:
             if self.cookie_accept_selector:
                 page.click(self.cookie_accept_selector, timeout=self.default_wait_time)
@@ -92,85 +490,121 @@ class BaseRetailScraper(ABC):
             print("No se encontró popup de cookies")
 
     def _esperar_carga(self, min=2, max=4):
-        """Espera aleatoria entre acciones para parecer humano"""
-        delay = random.uniform(min, max)
-        print(f"⏱️ Esperando {delay:.1f} segundos...")
-        time.sleep(delay)
+        """Pausa cortés aleatoria entre acciones, solo si la estrategia de esperas tiene jitter"""
+        self.waits.polite_pause(min, max)
 
     def _limpiar_precio(self, texto_precio):
-        """Normaliza formato de precios"""
-        if not texto_precio:
-            return "0"
-        return texto_precio.replace("$", "").replace(".", "").replace(",", "").strip()
+        """Precio en COP como entero ('$ 1.234.567' → 1234567); None si no hay precio"""
+        return parse_cop(texto_precio)
 
     def _calcular_descuento(self, precio_original, precio_actual):
-        """Calcula porcentaje de descuento entre dos precios"""
-        try:
-            if precio_original == precio_actual:
-                return ""
-            original = float(precio_original)
-            actual = float(precio_actual)
-            descuento = round(((original - actual) / original) * 100)
-            return f"{descuento}%"
-        except:
-            return ""
+        """Porcentaje de descuento entre dos precios enteros; None si no hay rebaja"""
+        return discount_pct(precio_original, precio_actual)
 
+    @traced("retail.busqueda")
     def _realizar_busqueda(self, page, producto):
-        """Método unificado para realizar búsquedas con espera configurable"""
+        """Método unificado para realizar búsquedas; espera a que los resultados terminen de cargar"""
         search_input = page.wait_for_selector(self.search_input_selector, timeout=15000)
         search_input.fill(producto)
         
-        if self.search_button_selector:
-            search_button = page.wait_for_selector(self.search_button_selector, timeout=5000)
-            search_button.click()
-        else:
-            search_input.press("Enter")
-        
-        # Espera configurable después de la búsqueda
-        print(f"⏳ Esperando {self.tiempo_espera_post_busqueda} segundos para carga...")
-        time.sleep(self.tiempo_espera_post_busqueda)
-        
-        page.wait_for_selector(self.product_container_selector, timeout=20000)
+        # Enviar la búsqueda navega a los resultados: pasa por el planificador
+        with get_scheduler().slot(page.url, PRIORITY_HIGH):
+            if self.search_button_selector:
+                search_button = page.wait_for_selector(self.search_button_selector, timeout=5000)
+                search_button.click()
+            else:
+                search_input.press("Enter")
+            
+            # Esperar a que aparezcan los productos y su cantidad se estabilice
+            print("⏳ Esperando resultados...")
+            self.waits.stable_count(page, self.product_container_selector)
         self._esperar_carga()
 
+    def _campos_producto(self):
+        """Selectores de la tarjeta de producto como {campo: (selector, atributo)}"""
+        campos = {
+            "nombre": (self.product_name_selector, None),
+            "precio": (self.product_price_selector, None),
+            "precio_original": (self.product_original_price_selector, None),
+            "enlace": (self.product_link_selector, "href"),
+            "descuento": (self.product_discount_selector, None),
+        }
+        campos.update(self.campos_extra)
+        return {campo: valor for campo, valor in campos.items() if valor[0]}
+
+    def _leer_campos(self, item):
+        """Lee los campos crudos de una tarjeta con una consulta por campo"""
+        crudo = {}
+        for campo, (selector, atributo) in self._campos_producto().items():
+            element = item.query_selector(selector)
+            if not element:
+                crudo[campo] = None
+            else:
+                crudo[campo] = element.get_attribute(atributo) if atributo else element.inner_text().strip()
+        return crudo
+
+    def _construir_registro(self, crudo):
+        """Convierte los campos crudos de una tarjeta en un `ProductRecord`"""
+        precio = self._limpiar_precio(crudo.get("precio"))
+        precio_original = self._limpiar_precio(crudo.get("precio_original"))
+
+        enlace = crudo.get("enlace") if crudo.get("enlace") is not None else "#"
+        if enlace and not enlace.startswith("http"):
+            enlace = f"{self.base_url}{enlace}"
+
+        descuento = parse_discount(crudo.get("descuento"))
+        if descuento is None:
+            descuento = self._calcular_descuento(precio_original, precio)
+
+        return ProductRecord(
+            producto=crudo.get("nombre") or "Producto sin nombre",
+            precio=precio,
+            enlace=enlace,
+            sitio=self.site_name,
+            precio_original=precio_original,
+            descuento=descuento,
+        )
+
     def _extraer_datos_producto(self, item):
-        """Método unificado para extraer datos de un producto"""
+        """Método unificado para extraer datos de un producto (ruta por tarjeta)"""
         try:
-            # Nombre del producto
-            nombre_element = item.query_selector(self.product_name_selector)
-            nombre = nombre_element.inner_text().strip() if nombre_element else "Producto sin nombre"
-            
-            # Precio actual
-            precio_element = item.query_selector(self.product_price_selector)
-            precio = self._limpiar_precio(precio_element.inner_text().strip() if precio_element else "0")
-            
-            # Precio original
-            precio_original_element = item.query_selector(self.product_original_price_selector) if self.product_original_price_selector else None
-            precio_original = self._limpiar_precio(precio_original_element.inner_text().strip() if precio_original_element else precio)
-            
-            # Enlace del producto
-            enlace_element = item.query_selector(self.product_link_selector)
-            enlace = enlace_element.get_attribute("href") if enlace_element else "#"
-            if enlace and not enlace.startswith("http"):
-                enlace = f"{self.base_url}{enlace}"
-            
-            # Descuento
-            descuento_element = item.query_selector(self.product_discount_selector) if self.product_discount_selector else None
-            descuento = descuento_element.inner_text().strip() if descuento_element else self._calcular_descuento(precio_original, precio)
-            
-            return {
-                "producto": nombre,
-                "precio_actual": f"${precio} COP",
-                "precio_original": f"${precio_original} COP" if precio_original != precio else "",
-                "descuento": descuento,
-                "enlace": enlace,
-                "sitio": self.site_name,
-                "fecha": datetime.now().strftime("%Y-%m-%d %H:%M")
-            }
+            return self._construir_registro(self._leer_campos(item))
         except Exception as e:
             print(f"Error extrayendo producto: {str(e)}")
             return None
 
+    @traced("retail.extraccion")
+    def _extraer_pagina(self, page):
+        """
+        Extrae todos los productos de la página actual.
+
+        Usa una sola llamada `evaluate` para todas las tarjetas; si falla (por ejemplo un
+        selector que no es CSS estándar) vuelve a la extracción tarjeta por tarjeta.
+        """
+        if self.extraccion_por_lotes:
+            try:
+                crudos = page.evaluate(EXTRACTOR_JS, {
+                    "contenedor": self.product_container_selector,
+                    "campos": {campo: list(valor) for campo, valor in self._campos_producto().items()}
+                })
+                registros = []
+                for crudo in crudos:
+                    try:
+                        registros.append(self._construir_registro(crudo))
+                    except Exception as e:
+                        print(f"Error extrayendo producto: {str(e)}")
+                return registros
+            except Exception as e:
+                print(f"⚠️ Extracción por lotes falló, se usa la ruta por tarjeta: {str(e)}")
+
+        registros = []
+        for item in page.query_selector_all(self.product_container_selector):
+            producto_data = self._extraer_datos_producto(item)
+            if producto_data:
+                registros.append(producto_data)
+        return registros
+
+    @traced("retail.paginacion")
     def _ir_a_siguiente_pagina(self, page):
         """Método unificado de paginación con comportamiento robusto"""
         if not self.next_page_selector:
@@ -186,16 +620,18 @@ class BaseRetailScraper(ABC):
                 return False
 
             # 2. Simulación de comportamiento humano
+            primera_tarjeta = self.waits.first_text(page, self.product_container_selector)
             next_btn.hover()
-            page.wait_for_timeout(random.uniform(800, 1200))  # Espera aleatoria
-            
-            # 3. Click forzado para mayor robustez
-            next_btn.click(force=True, timeout=3000)
-            print(f"✔ Avanzando a siguiente página en {self.site_name}")
+            self._esperar_carga(0.8, 1.2)
             
-            # 4. Esperar carga de nueva página
-            page.wait_for_timeout(random.uniform(2000, 3500))
-            page.wait_for_selector(self.product_container_selector, timeout=10000)
+            # 3. Click forzado para mayor robustez; la carga pasa por el planificador
+            with get_scheduler().slot(page.url):
+                next_btn.click(force=True, timeout=3000)
+                print(f"✔ Avanzando a siguiente página en {self.site_name}")
+                
+                # 4. Esperar a que cambie la primera tarjeta y se estabilice la lista
+                self.waits.first_changed(page, self.product_container_selector, primera_tarjeta)
+                self.waits.stable_count(page, self.product_container_selector, timeout=10000)
             return True
 
         except Exception as e:
@@ -219,53 +655,24 @@ class MercadoLibreScraper(BaseRetailScraper):
         self.product_discount_selector = ".andes-money-amount__discount"
         self.next_page_selector = "li.andes-pagination__button--next a"
         self.cookie_accept_selector = "button:has-text('Aceptar cookies')"
+        self.no_results_selector = ".ui-search-rescue"
+        self.listado_url = "https://listado.mercadolibre.com.co"
+        self.productos_por_pagina = 48
 
-    def scrape(self, producto: str, paginas: int = 1):
-        """Implementación principal del scraper para Mercado Libre"""
-        productos = []
-        browser, page = self._setup_browser()
-
-        try:
-            print(f"\n🔍 Buscando '{producto}' en {self.site_name}...")
-            page.goto(self.base_url, timeout=60000)
-            self._manejar_cookies(page)
-            self._esperar_carga(3, 5)
-            
-            self._realizar_busqueda(page, producto)
-
-            # Bucle de paginación
-            for pagina_actual in range(1, paginas + 1):
-                print(f"📄 Procesando página {pagina_actual}...")
-                items = page.query_selector_all(self.product_container_selector)
-                
-                for item in items:
-                    producto_data = self._extraer_datos_producto(item)
-                    if producto_data:
-                        productos.append(producto_data)
-                        print(f"✔ {producto_data['producto'][:30]}... - {producto_data['precio_actual']} {'('+producto_data['descuento']+')' if producto_data['descuento'] else ''}")
-
-                if pagina_actual < paginas and not self._ir_a_siguiente_pagina(page):
-                    print("No hay más páginas disponibles.")
-                    break
-
-            self._guardar_resultados(productos, producto)
-            return productos
-
-        except Exception as e:
-            print(f"\n❌ Error durante scraping: {str(e)}")
-            page.screenshot(path=os.path.join(self.report_dir, f"error_{self.site_name.lower()}.png"))
-            return []
-        finally:
-            page.context.close()
-            browser.close()
+    def url_pagina(self, producto, numero):
+        """Listado de Mercado Libre: /{producto-con-guiones}_Desde_{offset+1}"""
+        slug = quote("-".join(producto.lower().split()))
+        if numero <= 1:
+            return f"{self.listado_url}/{slug}"
+        return f"{self.listado_url}/{slug}_Desde_{(numero - 1) * self.productos_por_pagina + 1}_NoIndex_True"
 
 class ExitoScraper(BaseRetailScraper):
     """Scraper especializado para Éxito Colombia"""
     
     def __init__(self):
         super().__init__("Exito", "https://www.exito.com")
-        # Configurar tiempo de espera más largo para Éxito
-        self.tiempo_espera_post_busqueda = 10  # 10 segundos después de buscar
+        # Éxito renderiza los resultados más lento: más margen para las esperas
+        self.waits = WaitStrategy(timeout=30000, stable_checks=4)
         
         # Definición de selectores específicos
         self.search_input_selector = 'input[data-fs-search-input="true"]'
@@ -278,70 +685,99 @@ class ExitoScraper(BaseRetailScraper):
         self.product_discount_selector = '[class*="priceSection_container-promotion_discount__"] span[data-percentage="true"]'
         self.next_page_selector = 'button:has-text("Siguiente"), button[aria-label="Próxima Pagina"]'
         self.cookie_accept_selector = 'button:has-text("Aceptar cookies"), button#cookie-banner-lgpd-accept'
+        self.campos_extra = {
+            "marca": ('h3[class*="styles_brand__"]', None),
+            "vendedor": ('span[data-fs-product-details-seller__name="true"]', None),
+        }
 
-    def scrape(self, producto: str, paginas: int = 1):
-        """Implementación principal del scraper para Éxito"""
-        productos = []
-        browser, page = self._setup_browser()
+    def url_pagina(self, producto, numero):
+        """Búsqueda de Éxito: /s?q=...&page=N (páginas desde 0)"""
+        return f"{self.base_url}/s?q={quote_plus(producto)}&sort=score_desc&page={numero - 1}"
+
+    def _construir_registro(self, crudo):
+        """Agrega marca y vendedor, específicos de Éxito"""
+        registro = super()._construir_registro(crudo)
+        if crudo.get("marca"):
+            registro.producto = f"{crudo['marca']} {registro.producto}"
+        vendedor = crudo.get("vendedor")
+        registro.vendedor = vendedor.replace("Vendido por:", "").strip() if vendedor else "Éxito"
+        return registro
+
+
+def _scrape_en_proceso(sitio: str, producto: str, paginas: int, force_refresh: bool = False, job_id: str = None,
+                       trazas: bool = False):
+    """
+    Ejecuta un sitio en un proceso aparte, con su propio pool de navegadores.
+    Retorna (productos, trazas del proceso o None) para que el padre las agregue a las suyas.
+    """
+    tracer = get_tracer()
+    tracer.enabled = trazas
+    try:
+        productos = SITES.get(sitio).scrape(producto, paginas, force_refresh, job_id=job_id)
+        return productos, tracer.snapshot() if trazas else None
+    finally:
+        close_pool()
 
-        try:
-            print(f"\n🔍 Buscando '{producto}' en {self.site_name}...")
-            page.goto(self.base_url, timeout=60000)
-            self._manejar_cookies(page)
-            self._esperar_carga(3, 5)
-            
-            self._realizar_busqueda(page, producto)
-
-            # Bucle de paginación
-            for pagina_actual in range(1, paginas + 1):
-                print(f"📄 Procesando página {pagina_actual}...")
-                items = page.query_selector_all(self.product_container_selector)
-                
-                for item in items:
-                    producto_data = self._extraer_datos_producto(item)
-                    if producto_data:
-                        # Añadir marca específica para Éxito
-                        marca_element = item.query_selector('h3[class*="styles_brand__"]')
-                        if marca_element:
-                            producto_data['producto'] = f"{marca_element.inner_text().strip()} {producto_data['producto']}"
-                        
-                        # Añadir vendedor específico para Éxito
-                        vendedor_element = item.query_selector('span[data-fs-product-details-seller__name="true"]')
-                        producto_data['vendedor'] = vendedor_element.inner_text().replace("Vendido por:", "").strip() if vendedor_element else "Éxito"
-                        
-                        productos.append(producto_data)
-                        print(f"✔ {producto_data['producto'][:50]}... - {producto_data['precio_actual']}")
-
-                if pagina_actual < paginas and not self._ir_a_siguiente_pagina(page):
-                    print("No hay más páginas disponibles.")
-                    break
 
-            self._guardar_resultados(productos, producto)
-            return productos
+class RetailScraper:
+    """
+    Orquestador principal de los scrapers.
 
-        except Exception as e:
-            print(f"\n❌ Error durante scraping: {str(e)}")
-            page.screenshot(path=os.path.join(self.report_dir, f"error_{self.site_name.lower()}.png"))
-            return []
-        finally:
-            page.context.close()
-            browser.close()
+    Los sitios salen del registro `Scrapers.registry.SITES`: cada scraper se importa y se
+    construye la primera vez que se usa. Para agregar un sitio basta con
+    `register_site("nombre", "modulo:Clase")` o un entry point del grupo
+    "proyecto_scrapers.sitios".
+    """
 
-class RetailScraper:
-    """Orquestador principal de los scrapers"""
-    
-    def __init__(self):
-        self.scrapers = {
-            "mercadolibre": MercadoLibreScraper(),
-            "exito": ExitoScraper()
-        }
+    SITIOS = SITES
 
-    def scrape(self, producto: str, sitio: str, paginas: int = 1):
-        """Ejecuta el scraping en el sitio especificado"""
+    def scrape(self, producto: str, sitio: str, paginas: int = 1, force_refresh: bool = False, job_id: str = None):
+        """Ejecuta el scraping en el sitio especificado; `job_id` permite reanudarlo si falla"""
         sitio = sitio.lower()
-        if sitio in self.scrapers:
-            return self.scrapers[sitio].scrape(producto, paginas)
+        if sitio in self.SITIOS:
+            return self.SITIOS.get(sitio).scrape(producto, paginas, force_refresh, job_id=job_id)
         else:
-            sitios_disponibles = ", ".join(self.scrapers.keys())
+            sitios_disponibles = ", ".join(self.SITIOS.names())
             print(f"Error: Sitio {sitio} no soportado. Opciones: {sitios_disponibles}")
-            return []
\ No newline at end of file
+            return []
+
+    def scrape_all(self, producto: str, sitios: list = None, paginas: int = 1, force_refresh: bool = False,
+                   job_id: str = None):
+        """
+        Ejecuta la búsqueda en varios sitios al mismo tiempo, cada uno en su propio proceso.
+
+        La latencia total se acerca a la del sitio más lento. Los errores quedan aislados por
+        sitio: uno que falle aporta una lista vacía sin cancelar a los demás.
+        Con `job_id` cada sitio guarda su propio checkpoint y se reanuda por separado.
+        Los procesos arrancan desde cero ("spawn"): un sitio registrado en tiempo de ejecución
+        debe registrarse al importar un módulo o con un entry point para existir en ellos.
+        Retorna una sola lista con los productos de todos los sitios (campo "sitio").
+        """
+        sitios = [s.lower() for s in (sitios or self.SITIOS.names())]
+        no_soportados = [s for s in sitios if s not in self.SITIOS]
+        if no_soportados:
+            sitios_disponibles = ", ".join(self.SITIOS.names())
+            print(f"Error: Sitios {', '.join(no_soportados)} no soportados. Opciones: {sitios_disponibles}")
+            sitios = [s for s in sitios if s in self.SITIOS]
+        if not sitios:
+            return []
+
+        por_sitio = {}
+        # "spawn": con fork el hijo heredaría el pool de Playwright del padre (y lo cerraría al
+        # terminar), sus conexiones SQLite abiertas y los contadores del tracer
+        contexto = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(sitios), mp_context=contexto) as executor:
+            futuros = {executor.submit(_scrape_en_proceso, sitio, producto, paginas, force_refresh, job_id,
+                                       get_tracer().enabled): sitio for sitio in sitios}
+            for futuro in as_completed(futuros):
+                sitio = futuros[futuro]
+                try:
+                    productos, trazas = futuro.result()
+                    por_sitio[sitio] = productos or []
+                    get_tracer().merge(trazas)
+                except Exception as e:
+                    print(f"❌ Error en {sitio}: {str(e)}")
+                    por_sitio[sitio] = []
+                print(f"✅ {sitio}: {len(por_sitio[sitio])} productos")
+
+        return [item for sitio in sitios for item in por_sitio[sitio]]
@@ -0,0 +1,249 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from urllib.parse import urlsplit
+
+from tracing import count, span
+
+# Prioridades: menor número se atiende primero
+PRIORITY_HIGH = 0  # búsqueda inicial, lo que el usuario está esperando
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 9  # prefetch y revalidaciones
+
+
+@dataclass
+class DomainPolicy:
+    """Límites de un dominio: `rate` navegaciones/s con ráfagas de `burst` y `max_concurrent` a la vez"""
+    rate: float = 1.0
+    burst: int = 2
+    max_concurrent: int = 2
+
+
+DEFAULT_POLICIES = {
+    "mercadolibre.com.co": DomainPolicy(rate=2.0, burst=4, max_concurrent=4),
+    "exito.com": DomainPolicy(rate=1.0, burst=2, max_concurrent=2),
+    "eltiempo.com": DomainPolicy(rate=1.0, burst=3, max_concurrent=3),
+    "semana.com": DomainPolicy(rate=1.0, burst=3, max_concurrent=3),
+    "elespectador.com": DomainPolicy(rate=1.0, burst=3, max_concurrent=3),
+    "wikipedia.org": DomainPolicy(rate=5.0, burst=5, max_concurrent=4),
+}
+
+
+class _Domain:
+    def __init__(self, policy):
+        self.policy = policy
+        self.tokens = float(policy.burst)
+        self.refilled = time.monotonic()
+        self.active = 0
+        self.backoff = 1.0  # divide la tasa y la concurrencia; sube con errores o lentitud
+        self.queue = []  # heap de (prioridad, turno)
+        self.requests = 0
+        self.errors = 0
+        self.slow = 0
+        self.waited = 0.0
+
+    def refill(self, now):
+        rate = self.policy.rate / self.backoff
+        self.tokens = min(self.policy.burst, self.tokens + (now - self.refilled) * rate)
+        self.refilled = now
+
+    @property
+    def concurrency(self):
+        return max(1, int(self.policy.max_concurrent / self.backoff))
+
+
+class Ticket:
+    """Permiso para una navegación; `report()` informa el código HTTP para ajustar el backoff"""
+    __slots__ = ("domain", "key", "started", "status", "error")
+
+    def __init__(self, domain, key):
+        self.domain = domain
+        self.key = key
+        self.started = None
+        self.status = None
+        self.error = False
+
+    def report(self, status):
+        self.status = status
+
+
+class Scheduler:
+    """
+    Planificador de navegaciones por dominio.
+
+    - Token bucket por dominio (`DomainPolicy.rate` y `burst`).
+    - Máximo de páginas cargando a la vez por dominio (`max_concurrent`).
+    - Cola de prioridad por dominio: solo el primero de la cola puede tomar un permiso.
+    - Backoff adaptativo: errores, 429/5xx y respuestas más lentas que `slow_threshold`
+      reducen la tasa y la concurrencia del dominio; las respuestas sanas la recuperan.
+
+    Es seguro entre hilos y sirve tanto para la API sincrónica (`slot`) como para la
+    asincrónica (`slot_async`). Cada proceso tiene su propio planificador; `scrape_all`
+    usa un proceso por sitio, así que los límites de cada dominio se siguen respetando.
+    """
+
+    def __init__(self, policies=None, default=DomainPolicy(), slow_threshold=10.0, max_backoff=16.0):
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.default = default
+        self.slow_threshold = slow_threshold
+        self.max_backoff = max_backoff
+        self._domains = {}
+        self._turns = itertools.count()
+        self._cond = threading.Condition()
+
+    def domain_of(self, url):
+        """Dominio configurado al que pertenece `url` (listado.mercadolibre.com.co → mercadolibre.com.co)"""
+        host = (urlsplit(url).hostname or "").lower().removeprefix("www.")
+        for domain in self.policies:
+            if host == domain or host.endswith("." + domain):
+                return domain
+        return host
+
+    def _state(self, domain):
+        if domain not in self._domains:
+            self._domains[domain] = _Domain(self.policies.get(domain, self.default))
+        return self._domains[domain]
+
+    def _enqueue(self, url, priority):
+        with self._cond:
+            domain = self.domain_of(url)
+            key = (priority, next(self._turns))
+            heapq.heappush(self._state(domain).queue, key)
+            return Ticket(domain, key)
+
+    def _try_take(self, ticket):
+        """Toma el permiso si es posible; si no, retorna cuántos segundos conviene esperar"""
+        state = self._state(ticket.domain)
+        now = time.monotonic()
+        state.refill(now)
+        if state.queue[0] != ticket.key or state.active >= state.concurrency:
+            return 0.25  # se despierta al liberarse un permiso
+        if state.tokens < 1:
+            return (1 - state.tokens) * state.backoff / state.policy.rate
+        heapq.heappop(state.queue)
+        state.tokens -= 1
+        state.active += 1
+        state.requests += 1
+        ticket.started = now
+        return 0
+
+    def _abandon(self, ticket):
+        state = self._state(ticket.domain)
+        if ticket.key in state.queue:
+            state.queue.remove(ticket.key)
+            heapq.heapify(state.queue)
+            self._cond.notify_all()
+
+    def acquire(self, url, priority=PRIORITY_NORMAL, block=True):
+        """Espera un permiso para navegar a `url`; con `block=False` retorna None si no hay uno libre ya"""
+        ticket = self._enqueue(url, priority)
+        start = time.monotonic()
+        with self._cond:
+            try:
+                while True:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        break
+                    if not block:
+                        self._abandon(ticket)
+                        return None
+                    self._cond.wait(wait)
+            except BaseException:
+                self._abandon(ticket)
+                raise
+            self._note_wait(ticket, time.monotonic() - start)
+        return ticket
+
+    async def acquire_async(self, url, priority=PRIORITY_NORMAL):
+        """Versión asincrónica de `acquire`; espera sin bloquear el event loop"""
+        ticket = self._enqueue(url, priority)
+        start = time.monotonic()
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_take(ticket)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, 0.05))
+        except BaseException:
+            with self._cond:
+                self._abandon(ticket)
+            raise
+        with self._cond:
+            self._note_wait(ticket, time.monotonic() - start)
+        return ticket
+
+    def _note_wait(self, ticket, waited):
+        self._state(ticket.domain).waited += waited
+        if waited > 0.001:
+            count("esperas_planificador", dominio=ticket.domain)
+
+    def release(self, ticket, error=False):
+        """Libera el permiso y ajusta el backoff del dominio según el resultado"""
+        with self._cond:
+            state = self._state(ticket.domain)
+            state.active -= 1
+            elapsed = time.monotonic() - ticket.started
+            status = ticket.status or 0
+            if error or ticket.error or status == 429 or status >= 500:
+                state.errors += 1
+                state.backoff = min(self.max_backoff, state.backoff * 2)
+                count("backoff", dominio=ticket.domain, motivo="error")
+            elif elapsed > self.slow_threshold:
+                state.slow += 1
+                state.backoff = min(self.max_backoff, state.backoff * 1.5)
+                count("backoff", dominio=ticket.domain, motivo="lenta")
+            else:
+                state.backoff = max(1.0, state.backoff * 0.8)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, url, priority=PRIORITY_NORMAL):
+        """Context manager con un permiso para navegar a `url` (API sincrónica)"""
+        with span("planificador.espera"):
+            ticket = self.acquire(url, priority)
+        try:
+            yield ticket
+        except BaseException:
+            ticket.error = True
+            raise
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def slot_async(self, url, priority=PRIORITY_NORMAL):
+        """Context manager con un permiso para navegar a `url` (API asincrónica)"""
+        with span("planificador.espera"):
+            ticket = await self.acquire_async(url, priority)
+        try:
+            yield ticket
+        except BaseException:
+            ticket.error = True
+            raise
+        finally:
+            self.release(ticket)
+
+    def summary(self):
+        with self._cond:
+            return ", ".join(
+                f"{domain}: {s.requests} navegaciones, espera {s.waited:.1f}s, {s.errors} errores, "
+                f"{s.slow} lentas, backoff x{s.backoff:.1f}"
+                for domain, s in self._domains.items() if s.requests
+            ) or "sin navegaciones"
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Devuelve el planificador del proceso, compartido por todos los hilos y event loops"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler()
+        return _scheduler
@@ -0,0 +1,164 @@
+import hashlib
+import math
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache import CACHE_DIR, connect, normalize_text
+
+# Parámetros de URL que solo sirven para rastreo y no cambian el artículo
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "cmpid"}
+
+
+def canonical_url(url):
+    """URL comparable: sin www, fragmento, barra final ni parámetros de rastreo"""
+    partes = urlsplit(url.strip())
+    host = partes.netloc.lower().removeprefix("www.")
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(partes.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit(("https", host, partes.path.rstrip("/") or "/", query, ""))
+
+
+def content_hash(text):
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """
+    Filtro de pertenencia compacto: "no está" es seguro, "está" puede ser un falso
+    positivo (con probabilidad ~`error_rate`) y se confirma en SQLite.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class SeenIndex:
+    """
+    Índice persistente de noticias vistas, clave URL canónica.
+
+    Guarda cuándo se vio cada URL y, si el artículo se descargó, el hash de su contenido
+    y los validadores HTTP (ETag / Last-Modified) para revalidarlo sin volver a cargarlo.
+    Un filtro de Bloom en memoria responde la mayoría de las consultas de URLs nuevas
+    sin tocar la base.
+    """
+
+    def __init__(self, path=CACHE_DIR / "noticias_vistas.sqlite"):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS vistas (
+                    url TEXT PRIMARY KEY,
+                    hash TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    primera_vez REAL NOT NULL,
+                    ultima_vez REAL NOT NULL
+                )""")
+        self.stats = {"consultas": 0, "filtro": 0, "nuevas": 0, "descargas_evitadas": 0,
+                      "revalidadas": 0, "sin_cambios": 0, "cambiadas": 0}
+        self._build_filter()
+
+    def _build_filter(self, minimum=10000):
+        urls = [row[0] for row in self._conn.execute("SELECT url FROM vistas")]
+        self._filter = BloomFilter(max(minimum, 2 * len(urls)))
+        for url in urls:
+            self._filter.add(url)
+
+    def seen(self, url):
+        """True si la URL ya apareció en una búsqueda o se descargó"""
+        return self.get(url) is not None
+
+    def get(self, url):
+        """Registro de la URL ({url, hash, etag, last_modified, ...}) o None"""
+        url = canonical_url(url)
+        self.stats["consultas"] += 1
+        if url not in self._filter:
+            self.stats["filtro"] += 1
+            return None
+        with self._lock:
+            cursor = self._conn.execute("SELECT * FROM vistas WHERE url = ?", (url,))
+            row = cursor.fetchone()
+        return dict(zip([c[0] for c in cursor.description], row)) if row else None
+
+    def filter_new(self, results):
+        """Resultados (con atributo `url`) que nunca se habían visto; los marca como vistos"""
+        nuevos = [result for result in results if not self.seen(result.url)]
+        for result in nuevos:
+            self.mark(result.url)
+        self.stats["nuevas"] += len(nuevos)
+        return nuevos
+
+    def mark(self, url, text=None, etag=None, last_modified=None):
+        """
+        Registra una URL; con `text` guarda el hash del artículo.
+        Retorna True si el contenido es nuevo o cambió respecto al guardado.
+        """
+        url = canonical_url(url)
+        nuevo_hash = content_hash(text) if text is not None else None
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT hash FROM vistas WHERE url = ?", (url,)).fetchone()
+            self._conn.execute("""
+                INSERT INTO vistas VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    hash = COALESCE(excluded.hash, vistas.hash),
+                    etag = COALESCE(excluded.etag, vistas.etag),
+                    last_modified = COALESCE(excluded.last_modified, vistas.last_modified),
+                    ultima_vez = excluded.ultima_vez
+            """, (url, nuevo_hash, etag, last_modified, now, now))
+        if row is None:
+            self._filter.add(url)
+            if self._filter.count > self._filter.capacity:
+                self._build_filter()
+        cambio = nuevo_hash is not None and (row is None or row[0] != nuevo_hash)
+        if nuevo_hash is not None:
+            self.stats["cambiadas" if cambio else "sin_cambios"] += 1
+        return cambio
+
+    def count_avoided(self, revalidated=False):
+        """Registra una descarga de artículo evitada"""
+        self.stats["descargas_evitadas"] += 1
+        if revalidated:
+            self.stats["revalidadas"] += 1
+
+    def summary(self):
+        s = self.stats
+        return (f"{s['consultas']} consultas ({s['filtro']} resueltas por el filtro), "
+                f"{s['nuevas']} resultados nuevos, {s['descargas_evitadas']} descargas evitadas "
+                f"({s['revalidadas']} por revalidación), {s['sin_cambios']} artículos sin cambios")
+
+    def close(self):
+        self._conn.close()
+
+
+_seen_index = None
+
+
+def get_seen_index():
+    """Devuelve el índice de noticias vistas del proceso"""
+    global _seen_index
+    if _seen_index is None:
+        _seen_index = SeenIndex()
+    return _seen_index
@@ -0,0 +1,88 @@
+"""
+session_state.py
+
+Estado del navegador (cookies y localStorage) guardado por sitio entre ejecuciones.
+
+Un contexto nuevo de Playwright empieza sin cookies: cada búsqueda vuelve a ver el aviso
+de cookies y paga la espera de `_manejar_cookies`. Con el estado de una ejecución anterior
+el sitio ya recuerda las cookies aceptadas y el scraper puede ir directo al listado.
+"""
+
+import os
+import re
+import threading
+import time
+
+from cache import CACHE_DIR
+
+
+class SessionStore:
+    """
+    Un archivo `{directorio}/{sitio}.json` por sitio con el `storage_state` de Playwright.
+
+    El estado se escribe en un archivo temporal que reemplaza al anterior con `os.replace`,
+    así que otro proceso nunca lee uno a medias. Los estados con más de `max_age` segundos
+    sin renovarse se descartan; el scraper invalida el de un sitio cuando este lo rechaza.
+    """
+
+    def __init__(self, directorio=CACHE_DIR / "sesiones", max_age=7 * 24 * 3600):
+        self.directorio = directorio
+        self.max_age = max_age
+        self.loads = 0
+        self.saves = 0
+        self.invalidations = 0
+
+    def path(self, sitio):
+        nombre = re.sub(r"[^\w.-]+", "_", sitio.lower())
+        return os.path.join(self.directorio, f"{nombre}.json")
+
+    def load(self, sitio):
+        """Ruta del estado guardado para `storage_state`; None si no hay uno vigente"""
+        path = self.path(sitio)
+        try:
+            edad = time.time() - os.path.getmtime(path)
+        except OSError:
+            return None
+        if edad > self.max_age:
+            self.invalidate(sitio, "expiró")
+            return None
+        self.loads += 1
+        return path
+
+    def save(self, sitio, context):
+        """Guarda cookies y localStorage del contexto; un fallo solo se informa"""
+        path = self.path(sitio)
+        temporal = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            context.storage_state(path=temporal)
+            os.replace(temporal, path)
+            self.saves += 1
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la sesión de {sitio}: {e}")
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+
+    def invalidate(self, sitio, motivo=""):
+        """Borra el estado de un sitio; la próxima búsqueda pasa otra vez por la portada"""
+        try:
+            os.remove(self.path(sitio))
+        except FileNotFoundError:
+            return
+        self.invalidations += 1
+        print(f"🍪 Sesión de {sitio} descartada{f' ({motivo})' if motivo else ''}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """Devuelve el almacén de sesiones del proceso"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
@@ -0,0 +1,106 @@
+import random
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from tracing import span
+
+
+class WaitStrategy:
+    """
+    Esperas basadas en señales reales de la página en lugar de pausas fijas.
+
+    - Esperas de correctitud: red inactiva, número de tarjetas estable y cambio de la
+      primera tarjeta después de paginar.
+    - Pausa "cortés" (jitter aleatorio) opcional e independiente de las anteriores.
+
+    Cada espera registra su duración en `timings` para ajustar la política por sitio.
+    """
+
+    def __init__(self, jitter=False, timeout=20000, poll_interval=250, stable_checks=3, idle_timeout=5000):
+        self.jitter = jitter
+        self.timeout = timeout  # ms
+        self.idle_timeout = idle_timeout  # ms; tope de network_idle, que algunos sitios nunca alcanzan
+        self.poll_interval = poll_interval  # ms
+        self.stable_checks = stable_checks
+        self.timings = defaultdict(list)
+
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            with span(f"espera.{name}"):
+                yield
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+
+    def network_idle(self, page, timeout=None):
+        """Espera a que la red quede inactiva; algunos sitios nunca lo logran, así que no falla"""
+        with self._timed("network_idle"):
+            try:
+                page.wait_for_load_state("networkidle", timeout=timeout or self.idle_timeout)
+            except Exception:
+                pass
+
+    def stable_count(self, page, selector, timeout=None):
+        """Espera a que aparezca `selector` y su cantidad deje de cambiar; retorna la cantidad"""
+        timeout = timeout or self.timeout
+        with self._timed("stable_count"):
+            page.wait_for_selector(selector, timeout=timeout)
+            deadline = time.monotonic() + timeout / 1000
+            last = page.locator(selector).count()
+            same = 1
+            while same < self.stable_checks and time.monotonic() < deadline:
+                page.wait_for_timeout(self.poll_interval)
+                count = page.locator(selector).count()
+                same = same + 1 if count == last else 1
+                last = count
+            return last
+
+    @staticmethod
+    def first_text(page, selector):
+        """Texto de la primera coincidencia de `selector` (cadena vacía si no hay)"""
+        return page.evaluate(
+            "sel => { const el = document.querySelector(sel); return el ? el.innerText : ''; }",
+            selector)
+
+    def first_changed(self, page, selector, previous, timeout=None):
+        """Espera a que la primera tarjeta sea distinta de `previous` (nueva página cargada)"""
+        timeout = timeout or self.timeout
+        deadline = time.monotonic() + timeout / 1000
+        with self._timed("first_changed"):
+            while True:
+                try:
+                    page.wait_for_function(
+                        "([sel, prev]) => { const el = document.querySelector(sel); return !!el && el.innerText !== prev; }",
+                        arg=[selector, previous],
+                        timeout=max(1, (deadline - time.monotonic()) * 1000))
+                    return
+                except Exception as e:
+                    # Si la paginación es una navegación completa el contexto de JS se destruye:
+                    # se espera el nuevo documento y se vuelve a comprobar
+                    if "context was destroyed" not in str(e) or time.monotonic() >= deadline:
+                        raise
+                    page.wait_for_load_state("domcontentloaded")
+
+    def polite_pause(self, min_s, max_s):
+        """Pausa aleatoria para no parecer un bot; no hace nada si `jitter` está apagado"""
+        if not self.jitter:
+            return
+        delay = random.uniform(min_s, max_s)
+        print(f"⏱️ Esperando {delay:.1f} segundos...")
+        with self._timed("jitter"):
+            time.sleep(delay)
+
+    def summary(self):
+        """{espera: (cantidad, media s, máximo s)}"""
+        return {
+            name: (len(values), statistics.mean(values), max(values))
+            for name, values in self.timings.items() if values
+        }
+
+    def summary_text(self):
+        return ", ".join(
+            f"{name} {n}× media {mean:.2f}s máx {peak:.2f}s"
+            for name, (n, mean, peak) in self.summary().items()
+        ) or "sin esperas"
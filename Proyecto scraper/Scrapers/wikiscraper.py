@@ -1,114 +1,296 @@
-from playwright.sync_api import sync_playwright
+import urllib.error
+import urllib.request
+from urllib.parse import quote, unquote
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
 from herramientas import process_text
+from Scrapers.browser_pool import get_pool
+from Scrapers.network_policy import text_only
+from Scrapers.scheduler import get_scheduler
+from search_index import get_search_index
+from tracing import count, span, traced
+
+
+# Secciones <h2> que no tienen texto relevante
+BANNED_SECTIONS = {
+    "Contenidos", "Véase también", "Referencias",
+    "Enlaces externos", "Bibliografía"
+}
+MAX_PARAGRAPHS = 3
+USER_AGENT = "Mozilla/5.0 (compatible; Proyecto-Scrapers/1.0)"
+# Elementos HTML sin etiqueta de cierre
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+
+@traced("wiki.descarga")
+def fetch_html(url, timeout=30):
+    """Fetcher por defecto: descarga el HTML del artículo con urllib"""
+    # urllib solo acepta ASCII: "wiki/Bogotá" → "wiki/Bogot%C3%A1" (lo ya codificado se respeta)
+    url = quote(url, safe="/:%#?=&")
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with get_scheduler().slot(url) as permiso, urllib.request.urlopen(request, timeout=timeout) as response:
+        permiso.report(response.status)
+        charset = response.headers.get_content_charset() or "utf-8"
+        data = response.read()
+    count("bytes", len(data), fuente="wikipedia")
+    return data.decode(charset, errors="replace")
+
+
+@dataclass
+class WikiArticle:
+    """Artículo de Wikipedia dividido en introducción y secciones <h2>"""
+    intro: list = field(default_factory=list)
+    sections: dict = field(default_factory=dict)  # título → párrafos, en orden del documento
+
+    def section_text(self, title, max_paragraphs=MAX_PARAGRAPHS):
+        paragraphs = self.intro if title == "Introducción" else self.sections.get(title, [])
+        return "".join(p + "\n\n" for p in paragraphs[:max_paragraphs])
+
+
+class _SectionParser(HTMLParser):
+    """
+    Recorre el HTML una sola vez y reparte los <p> hijos directos de `mw-parser-output`
+    entre la introducción y la sección `mw-heading2` que los precede.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.article = WikiArticle()
+        self._stack = []  # etiquetas abiertas
+        self._root_depth = None  # profundidad del div mw-parser-output
+        self._done = False  # ya se cerró mw-parser-output
+        self._current = self.article.intro
+        self._capture = None  # "p" o "heading" mientras se acumula texto
+        self._capture_depth = 0
+        self._buffer = []
+        self._skip_depth = None  # dentro de style/script/mw-editsection
+
+    def handle_starttag(self, tag, attrs):
+        classes = (dict(attrs).get("class") or "").split()
+        depth = len(self._stack)
+
+        if self._root_depth is None and tag == "div" and "mw-parser-output" in classes:
+            self._root_depth = depth
+        elif not self._done and self._root_depth is not None and depth == self._root_depth + 1 and self._capture is None:
+            if tag == "p":
+                self._start_capture("p", depth)
+            elif (tag == "div" and "mw-heading2" in classes) or tag == "h2":
+                self._start_capture("heading", depth)
+
+        if self._capture and self._skip_depth is None and (
+                tag in ("style", "script") or "mw-editsection" in classes):
+            self._skip_depth = depth
+        if tag == "br" and self._capture and self._skip_depth is None:
+            self._buffer.append("\n")
+
+        if tag not in VOID_TAGS:
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag == "br" and self._capture and self._skip_depth is None:
+            self._buffer.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        while self._stack:
+            open_tag = self._stack.pop()
+            depth = len(self._stack)
+            if self._skip_depth is not None and depth <= self._skip_depth:
+                self._skip_depth = None
+            if self._capture and depth == self._capture_depth:
+                self._end_capture()
+            if self._root_depth is not None and depth <= self._root_depth:
+                self._done = True  # fin del contenido: se ignora el resto
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self._capture and self._skip_depth is None:
+            self._buffer.append(data)
+
+    def _start_capture(self, kind, depth):
+        self._capture = kind
+        self._capture_depth = depth
+        self._buffer = []
+
+    def _end_capture(self):
+        text = "\n".join(" ".join(line.split()) for line in "".join(self._buffer).split("\n")).strip()
+        if self._capture == "heading":
+            self._current = self.article.sections.setdefault(text, [])
+        elif text:
+            self._current.append(text)
+        self._capture = None
+
+
+@traced("wiki.analisis")
+def parse_article(html):
+    """Construye el árbol de secciones de un artículo en una pasada lineal"""
+    parser = _SectionParser()
+    parser.feed(html)
+    parser.close()
+    return parser.article
+
+
+def _indexar(url, secciones):
+    """Agrega secciones [(título, texto)] de un artículo al índice de búsqueda"""
+    articulo = unquote(url.rstrip("/").rsplit("/", 1)[-1]).replace("_", " ")
+    get_search_index().add_many(
+        {"fuente": "wiki", "clave": f"{url}#{seccion}", "titulo": f"{articulo}: {seccion}", "cuerpo": texto,
+         "url": url, "sitio": "wikipedia"}
+        for seccion, texto in secciones if texto
+    )
 
 
 class WikiScraper:
+    """
+    Scraper interactivo de secciones de Wikipedia.
+
+    Modos:
+    - "playwright": navega el artículo con el navegador del pool compartido.
+    - "html": descarga el HTML una vez con `fetcher` (url → html) y lo analiza sin navegador.
+    """
+
+    def __init__(self, mode="playwright", fetcher=None):
+        self.mode = mode
+        self.fetcher = fetcher or fetch_html
+        self.network_policy = text_only()  # Solo para el modo "playwright"
+
     def scraper(self, urls):
         """
         Permite al usuario seleccionar una sección de Wikipedia y extraer su contenido.
-        Usa Playwright para navegar y scrapear dinámicamente.
+        Usa Playwright o el modo HTML según `mode`.
         """
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=False)
-            page = browser.new_page()
-
+        if self.mode == "html":
             for url in urls:
-                page.goto(url, timeout=60000)
+                try:
+                    html = self.fetcher(url)
+                except urllib.error.HTTPError as e:
+                    print("❌ No se encontró el artículo." if e.code == 404 else f"❌ Wikipedia respondió {e.code}.")
+                    continue
+                except (urllib.error.URLError, TimeoutError, ValueError) as e:
+                    print(f"❌ No se pudo descargar el artículo: {e}")
+                    continue
+                article = parse_article(html)
+                count("paginas", fuente="wikipedia")
+                # Con el artículo completo en memoria se indexan todas sus secciones
+                _indexar(url, [(s, article.section_text(s)) for s in ["Introducción", *article.sections]])
+                self._select_and_process(url, list(article.sections), article.section_text)
+            return
 
-                # Obtener secciones <h2>, ignorando algunas que no tienen texto relevante
+        with get_pool().page() as page:
+            if self.network_policy is not None:
+                self.network_policy.apply(page.context)
+            for url in urls:
+                with get_scheduler().slot(url) as permiso, span("wiki.goto"):
+                    response = page.goto(url, timeout=60000)
+                    permiso.report(response.status if response else None)
+                count("paginas", fuente="wikipedia")
                 sections = page.locator("h2").all_inner_texts()
-                banned = {
-                    "Contenidos", "Véase también", "Referencias",
-                    "Enlaces externos", "Bibliografía"
-                }
-                filtered = [s for s in sections if s not in banned]
-                filtered_ = ["Introducción"] + filtered
-
-                if not sections:
-                    print("❌ No se encontraron secciones.")
+                self._select_and_process(url, sections, lambda section: self.playwright_section_text(page, section))
+
+    def _select_and_process(self, url, sections, section_text):
+        """Muestra las secciones, pide una al usuario y procesa su texto"""
+        # Ignorar secciones que no tienen texto relevante
+        filtered = [s for s in sections if s not in BANNED_SECTIONS]
+        filtered_ = ["Introducción"] + filtered
+
+        if not sections:
+            print("❌ No se encontraron secciones.")
+            return
+
+        # Mostrar secciones al usuario
+        print("\n📌 Secciones disponibles:")
+        for i, sec in enumerate(filtered_):
+            print(f"{i + 1}. {sec}")
+
+        try:
+            select = int(input("👉 Elija la sección escribiendo el número: "))
+            selected_section = filtered_[select - 1]
+
+            print(f"\n✅ Sección seleccionada: {selected_section}")
+            print("\n📄 Procesando contenido...\n")
+
+            full_text = section_text(selected_section)
+            if full_text is None:
+                print("❌ No se encontró la sección en el DOM.")
+                return
+
+            # Resultado
+            if not full_text:
+                print("⚠️ No se encontró texto en esta sección.")
+            else:
+                _indexar(url, [(selected_section, full_text)])
+                process_text(url, selected_section, full_text)
+
+        except (ValueError, IndexError):
+            print("❌ Selección inválida. Intente de nuevo.")
+
+    @staticmethod
+    @traced("wiki.seccion")
+    def playwright_section_text(page, selected_section):
+        """Extrae el texto de una sección navegando el DOM con Playwright (None si no existe)"""
+        full_text = ""
+        parrafos = 0
+
+        # Caso especial: Introducción (antes del primer <h2>)
+        if selected_section == "Introducción":
+            paragraphs = page.locator("p")
+            for i in range(paragraphs.count()):
+                nodo = paragraphs.nth(i)
+
+                # Parar si se detecta un encabezado (h2) antes del párrafo
+                prev = nodo.locator("xpath=preceding-sibling::h2")
+                if prev.count() > 0:
+                    break
+
+                text = nodo.inner_text()
+                if not text:
                     continue
 
-                # Mostrar secciones al usuario
-                print("\n📌 Secciones disponibles:")
-                for i, sec in enumerate(filtered_):
-                    print(f"{i + 1}. {sec}")
+                full_text += text + "\n\n"
+                parrafos += 1
+                if parrafos >= MAX_PARAGRAPHS:
+                    break
+            return full_text
 
-                try:
-                    select = int(input("👉 Elija la sección escribiendo el número: "))
-                    selected_section = filtered_[select - 1]
-
-                    print(f"\n✅ Sección seleccionada: {selected_section}")
-                    print("\n📄 Procesando contenido...\n")
-
-                    full_text = ""
-                    count = 0
-
-                    # Caso especial: Introducción (antes del primer <h2>)
-                    if selected_section == "Introducción":
-                        paragraphs = page.locator("p")
-                        for i in range(paragraphs.count()):
-                            nodo = paragraphs.nth(i)
-
-                            # Parar si se detecta un encabezado (h2) antes del párrafo
-                            prev = nodo.locator("xpath=preceding-sibling::h2")
-                            if prev.count() > 0:
-                                break
-
-                            text = nodo.inner_text()
-                            if not text:
-                                continue
-
-                            full_text += text + "\n\n"
-                            count += 1
-                            if count >= 3:
-                                break
-
-                    # Para otras secciones
-                    else:
-                        secciones_divs = page.locator("div.mw-heading.mw-heading2")
-                        matched_div = None
-
-                        # Buscar el div <h2> que coincide con la sección seleccionada
-                        for i in range(secciones_divs.count()):
-                            div = secciones_divs.nth(i)
-                            h2 = div.locator("h2")
-
-                            if h2.count() > 0 and h2.inner_text() == selected_section:
-                                matched_div = div
-                                break
-
-                        if matched_div:
-                            siblings = matched_div.locator("xpath=following-sibling::*")
-
-                            for i in range(siblings.count()):
-                                node = siblings.nth(i)
-
-                                # Parar si se llega a otro título de sección
-                                class_name = node.get_attribute("class") or ""
-                                if "mw-heading2" in class_name:
-                                    break
-
-                                # Agregar párrafos
-                                if node.evaluate("el => el.tagName") == "P":
-                                    text = node.inner_text()
-                                    if not text:
-                                        continue
-
-                                    full_text += text + "\n\n"
-                                    count += 1
-                                    if count >= 3:
-                                        break
-                        else:
-                            print("❌ No se encontró la sección en el DOM.")
-                            continue
-
-                    # Resultado
-                    if not full_text:
-                        print("⚠️ No se encontró texto en esta sección.")
-                    else:
-                        process_text(url, selected_section, full_text)
-
-                except (ValueError, IndexError):
-                    print("❌ Selección inválida. Intente de nuevo.")
-
-            browser.close()
+        # Para otras secciones
+        secciones_divs = page.locator("div.mw-heading.mw-heading2")
+        matched_div = None
+
+        # Buscar el div <h2> que coincide con la sección seleccionada
+        for i in range(secciones_divs.count()):
+            div = secciones_divs.nth(i)
+            h2 = div.locator("h2")
+
+            if h2.count() > 0 and h2.inner_text() == selected_section:
+                matched_div = div
+                break
+
+        if not matched_div:
+            return None
+
+        siblings = matched_div.locator("xpath=following-sibling::*")
+
+        for i in range(siblings.count()):
+            node = siblings.nth(i)
+
+            # Parar si se llega a otro título de sección
+            class_name = node.get_attribute("class") or ""
+            if "mw-heading2" in class_name:
+                break
+
+            # Agregar párrafos
+            if node.evaluate("el => el.tagName") == "P":
+                text = node.inner_text()
+                if not text:
+                    continue
+
+                full_text += text + "\n\n"
+                parrafos += 1
+                if parrafos >= MAX_PARAGRAPHS:
+                    break
+        return full_text
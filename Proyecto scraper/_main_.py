@@ -5,10 +5,18 @@ Módulo principal para ejecutar un sistema de scraping integrado.
 Incluye funciones para buscar productos, información en Wikipedia y noticias en sitios colombianos.
 """
 
+import os
 import time
-from Scrapers.wikiscraper import WikiScraper
-from Scrapers.newscraper import NewScraper
-from Scrapers.retail_scraper import RetailScraper
+from tracing import finish_run
+from Scrapers.registry import COMPONENTS
+
+# Los scrapers y el resumidor se importan con el registro al elegir cada opción: así el
+# menú aparece sin esperar a transformers ni a Playwright (ver benchmarks/bench_startup.py)
+
+# Nombre de cada opción en las trazas exportadas (SCRAPER_TRACE=1)
+ETIQUETAS = {"1": "mercadolibre", "2": "exito", "3": "todas_las_tiendas", "4": "wikipedia", "5": "noticias",
+             "6": "busqueda"}
+
 
 def mostrar_menu():
     """Muestra un menú interactivo al usuario con mejor formato."""
@@ -17,29 +25,40 @@ def mostrar_menu():
     print("=" * 50)
     print("\n1. Buscar producto en Mercado Libre")
     print("2. Buscar producto en Éxito")
-    print("3. Buscar información en Wikipedia")
-    print("4. Buscar noticias")
-    print("5. Salir")
-    return input("\n👉 Seleccione una opción (1-5): ")
+    print("3. Buscar producto en todas las tiendas")
+    print("4. Buscar información en Wikipedia")
+    print("5. Buscar noticias")
+    print("6. Buscar en lo extraído")
+    print("7. Salir")
+    return input("\n👉 Seleccione una opción (1-7): ")
+
+
+MAX_PAGINAS = 20
 
 
 def obtener_numero_paginas():
     """Solicita y valida el número de páginas a scrapear."""
     while True:
         try:
-            paginas = input("\n📄 ¿Cuántas páginas deseas scrapear? (1-5, default 1): ") or "1"
+            paginas = input(f"\n📄 ¿Cuántas páginas deseas scrapear? (1-{MAX_PAGINAS}, default 1): ") or "1"
             paginas = int(paginas)
-            if 1 <= paginas <= 5:
+            if 1 <= paginas <= MAX_PAGINAS:
                 return paginas
-            print("⚠️ Por favor ingrese un número entre 1 y 5")
+            print(f"⚠️ Por favor ingrese un número entre 1 y {MAX_PAGINAS}")
         except ValueError:
             print("⚠️ Debe ingresar un número válido")
 
 
+def obtener_job_id():
+    """Solicita un ID de trabajo opcional; con el mismo ID una búsqueda interrumpida se reanuda."""
+    return input("🆔 ID de trabajo para poder reanudar (Enter para omitir): ").strip() or None
+
+
 def main():
     """Función principal para ejecutar el menú interactivo."""
-    wiki = WikiScraper()
-    retail = RetailScraper()
+    # Precarga opcional del modelo de resúmenes mientras el usuario usa el menú
+    if os.environ.get("SUMMARIZER_WARMUP") == "1":
+        COMPONENTS.get("resumidor").warm_up(background=True)
 
     while True:
         opcion = mostrar_menu()
@@ -47,38 +66,82 @@ def main():
             # Opciones de retail (MercadoLibre o Éxito)
             producto = input(f"\n🔍 ¿Qué producto deseas buscar en {'Mercado Libre' if opcion == '1' else 'Éxito'}? ")
             paginas = obtener_numero_paginas()
+            job_id = obtener_job_id()
             
             print("\n⏳ Buscando productos...")
             start_time = time.time()
-            retail.scrape(
+            COMPONENTS.get("retail").scrape(
                 producto=producto,
                 sitio="mercadolibre" if opcion == "1" else "exito",
-                paginas=paginas
+                paginas=paginas,
+                job_id=job_id
             )
             print(f"⌛ Tiempo de búsqueda: {time.time() - start_time:.2f} segundos")
 
         elif opcion == "3":
+            # Todas las tiendas en paralelo
+            producto = input("\n🔍 ¿Qué producto deseas buscar en todas las tiendas? ")
+            paginas = obtener_numero_paginas()
+            job_id = obtener_job_id()
+
+            print("\n⏳ Buscando productos en paralelo...")
+            start_time = time.time()
+            productos = COMPONENTS.get("retail").scrape_all(producto=producto, paginas=paginas, job_id=job_id)
+            print(f"\n🛒 {len(productos)} productos encontrados en total")
+            try:
+                from price_analytics import summary_text
+                print(f"\n📊 Resumen de precios por sitio:\n{summary_text(productos)}")
+            except ImportError:
+                print("ℹ️ Instala numpy y pandas para ver el resumen de precios por sitio")
+
+            from product_matching import get_product_matcher
+            from product_record import format_cop
+            comparacion = get_product_matcher().cheapest(producto, limit=10)
+            if comparacion:
+                print("\n💸 Mismo producto en varias tiendas (mayor ahorro primero):")
+                for fila in comparacion:
+                    print(f"- {fila['nombre'][:50]}: {format_cop(fila['precio_minimo'])} en "
+                          f"{fila['sitio_mas_barato']} (ahorro {format_cop(fila['ahorro'])})")
+            print(f"⌛ Tiempo de búsqueda: {time.time() - start_time:.2f} segundos")
+
+        elif opcion == "4":
             # Buscar en Wikipedia
             termino = input("\n🔍 ¿Qué término deseas buscar en Wikipedia? ")
             print("\n⏳ Buscando información...")
             start_time = time.time()
             print("🚀 Llamando a scraper...")
-            wiki.scraper([f"https://es.wikipedia.org/wiki/{termino.replace(' ', '_')}"])
+            COMPONENTS.get("wiki").scraper([f"https://es.wikipedia.org/wiki/{termino.replace(' ', '_')}"])
             print(f"⌛ Tiempo de búsqueda: {time.time() - start_time:.2f} segundos")
 
-        elif opcion == "4":
+        elif opcion == "5":
             # Buscar en sitios de noticias
-            NewScraper.launch_scraper()
+            COMPONENTS.load("noticias").launch_scraper()
 
-        elif opcion == "5":
+        elif opcion == "6":
+            # Búsqueda de texto completo en noticias, wiki, productos y salidas guardadas
+            from search_index import get_search_index
+            consulta = input("\n🔍 ¿Qué deseas buscar? ")
+            fuente = input("📚 Fuente (noticia, wiki, producto, salida; Enter para todas): ").strip() or None
+            start_time = time.time()
+            resultados = get_search_index().search(consulta, fuente=fuente)
+            print(f"\n📑 {len(resultados)} resultados en {(time.time() - start_time) * 1000:.1f} ms")
+            for i, r in enumerate(resultados, 1):
+                print(f"\n{i}. [{r['fuente']}] {r['titulo'][:80]}")
+                print(f"   {r['fragmento']}")
+                if r["url"]:
+                    print(f"   🔗 {r['url']}")
+
+        elif opcion == "7":
             # Salir del programa
             print("\n✅ ¡Gracias por usar el sistema de scraping! ¡Hasta luego!")
             break
 
         else:
             # Entrada inválida
-            print("\n❌ Opción no válida. Por favor ingrese un número del 1 al 5.")
+            print("\n❌ Opción no válida. Por favor ingrese un número del 1 al 7.")
 
+        if opcion in ETIQUETAS:
+            finish_run(ETIQUETAS[opcion])
         input("\nPresione Enter para continuar...")
 
 
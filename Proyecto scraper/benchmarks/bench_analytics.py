@@ -0,0 +1,97 @@
+"""
+bench_analytics.py
+
+Mide el post-procesamiento de precios sobre un almacén sintético (por defecto 50.000
+observaciones): carga por columnas desde SQLite y resumen vectorizado con pandas
+(price_analytics), comparado con recorrer las filas en Python convirtiendo texto a
+número en cada una, como hacían los reportes con "$1234 COP".
+
+Uso: python benchmarks/bench_analytics.py [observaciones]
+"""
+
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import price_analytics  # noqa: E402
+from cache import fetch_rows  # noqa: E402
+from product_record import ProductRecord  # noqa: E402
+from product_store import ProductStore  # noqa: E402
+
+SITIOS = ["MercadoLibre", "Exito"]
+
+
+def poblar(store, n):
+    aleatorio = random.Random(42)
+    registros = []
+    for i in range(n):
+        precio = aleatorio.randint(50, 3000) * 1000
+        original = precio + aleatorio.choice([0, 0, aleatorio.randint(1, 500) * 1000])
+        registros.append(ProductRecord(f"Producto {i}", precio, f"https://tienda.co/MCO{i}",
+                                       SITIOS[i % 2], precio_original=original))
+    store.upsert(registros)
+
+
+def cargar_filas(store):
+    return fetch_rows(store._conn, """
+        SELECT p.sitio, p.clave, p.nombre, h.fecha, h.precio, h.precio_original, h.descuento
+        FROM precios h JOIN productos p ON p.id = h.producto_id
+    """)
+
+
+def resumir_filas(filas):
+    """Ruta anterior: una fila a la vez, con texto formateado y try/except por item"""
+    por_sitio = {}
+    for fila in filas:
+        actual = f"${fila['precio']} COP"
+        original = f"${fila['precio_original']} COP" if fila["precio_original"] else ""
+        try:
+            a = float(actual.replace("$", "").replace("COP", ""))
+            o = float(original.replace("$", "").replace("COP", "")) if original else a
+            descuento = round((o - a) / o * 100) if o != a else None
+        except ValueError:
+            descuento = None
+        datos = por_sitio.setdefault(fila["sitio"], {"precios": [], "descuentos": []})
+        datos["precios"].append(a)
+        if descuento is not None:
+            datos["descuentos"].append(descuento)
+    return {sitio: (statistics.median(d["precios"]), statistics.mean(d["descuentos"]) if d["descuentos"] else None)
+            for sitio, d in por_sitio.items()}
+
+
+def medir(funcion, argumento, repeticiones=3):
+    """(mejor tiempo, resultado de la última corrida)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(argumento)
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos), resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    store = ProductStore(Path(tempfile.mkdtemp(prefix="bench_")) / "productos.sqlite")
+    inicio = time.perf_counter()
+    poblar(store, n)
+    print(f"📦 {n:,} observaciones insertadas en {time.perf_counter() - inicio:.2f}s")
+
+    carga_filas, filas = medir(cargar_filas, store)
+    analisis_filas, _ = medir(resumir_filas, filas)
+    carga_lote, df = medir(price_analytics.load_frame, store)
+    analisis_lote, resumen = medir(price_analytics.site_summary, df)
+
+    print(f"\n{'':<14}{'carga ms':>10}{'análisis ms':>13}")
+    print(f"{'🐢 por filas':<14}{carga_filas * 1000:>10.1f}{analisis_filas * 1000:>13.1f}")
+    print(f"{'🚀 vectorizado':<14}{carga_lote * 1000:>10.1f}{analisis_lote * 1000:>13.1f}"
+          f"  (x{analisis_filas / analisis_lote:.1f} en el análisis, que además marca atípicos)")
+    print(f"\n{resumen.to_string()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+bench_browser_pool.py
+
+Compara la latencia por consulta entre lanzar un Chromium nuevo en cada búsqueda
+(comportamiento anterior) y reutilizar los navegadores calientes de `BrowserPool`.
+
+Uso: python benchmarks/bench_browser_pool.py [consultas]
+"""
+
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from playwright.sync_api import sync_playwright  # noqa: E402
+from Scrapers.browser_pool import BrowserPool, LAUNCH_ARGS  # noqa: E402
+
+HTML = "<html><body>" + "".join(f"<div class='item'>Producto {i}</div>" for i in range(50)) + "</body></html>"
+
+
+def consulta(page):
+    """Trabajo mínimo de una consulta: cargar contenido y leer los items"""
+    page.set_content(HTML)
+    return page.locator("div.item").count()
+
+
+def cold(consultas):
+    tiempos = []
+    for _ in range(consultas):
+        inicio = time.perf_counter()
+        p = sync_playwright().start()
+        browser = p.chromium.launch(headless=True, args=LAUNCH_ARGS)
+        context = browser.new_context()
+        consulta(context.new_page())
+        context.close()
+        browser.close()
+        p.stop()
+        tiempos.append(time.perf_counter() - inicio)
+    return tiempos
+
+
+def pooled(consultas):
+    pool = BrowserPool(headless=True)
+    tiempos = []
+    try:
+        for _ in range(consultas):
+            inicio = time.perf_counter()
+            with pool.page() as page:
+                consulta(page)
+            tiempos.append(time.perf_counter() - inicio)
+    finally:
+        pool.close()
+    return tiempos
+
+
+def resumen(nombre, tiempos):
+    ordenados = sorted(tiempos)
+    p95 = ordenados[min(len(ordenados) - 1, int(len(ordenados) * 0.95))]
+    print(f"{nombre:<8} media={statistics.mean(tiempos) * 1000:8.1f} ms  "
+          f"p50={statistics.median(tiempos) * 1000:8.1f} ms  p95={p95 * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f"⏱️ {n} consultas por modo")
+    resumen("cold", cold(n))
+    resumen("pooled", pooled(n))
@@ -0,0 +1,44 @@
+"""
+bench_extraccion.py
+
+Micro-benchmark de extracción de tarjetas de producto sobre HTML guardado
+(benchmarks/fixtures/mercadolibre_busqueda.html): compara la extracción por lotes
+(un solo `evaluate` por página) contra la ruta tarjeta por tarjeta.
+
+Uso: python benchmarks/bench_extraccion.py [repeticiones]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Scrapers.browser_pool import BrowserPool  # noqa: E402
+from Scrapers.retail_scraper import MercadoLibreScraper  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "mercadolibre_busqueda.html"
+
+
+def medir(scraper, page, por_lotes, repeticiones):
+    scraper.extraccion_por_lotes = por_lotes
+    registros = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        registros += len(scraper._extraer_pagina(page))
+    return registros, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    scraper = MercadoLibreScraper()
+    pool = BrowserPool(headless=True)
+    try:
+        with pool.page() as page:
+            page.set_content(FIXTURE.read_text(encoding="utf-8"))
+            for nombre, por_lotes in (("por lotes", True), ("por tarjeta", False)):
+                registros, segundos = medir(scraper, page, por_lotes, repeticiones)
+                print(f"{nombre:<12} {registros:6d} registros en {segundos:6.2f} s  "
+                      f"→ {registros / segundos:10.1f} registros/s")
+    finally:
+        pool.close()
@@ -0,0 +1,94 @@
+"""
+bench_search.py
+
+Latencia de consultas del índice de búsqueda (search_index.py) sobre un corpus
+sintético de noticias, secciones de wiki y productos (por defecto 200.000 documentos).
+El texto sigue una distribución de Zipf sobre un vocabulario amplio, con palabras
+temáticas en una fracción de los documentos, como en un corpus real. Reporta p50/p95
+por tipo de consulta; el objetivo es menos de 10 ms.
+
+Uso: python benchmarks/bench_search.py [documentos] [consultas]
+"""
+
+import itertools
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from search_index import SearchIndex, fts_query  # noqa: E402
+
+VOCABULARIO = (
+    "gobierno elección congreso reforma paz total economía inflación dólar petróleo salud educación "
+    "bogotá medellín cali barranquilla fútbol selección colombia historia filosofía ciencia política "
+    "televisor celular portátil nevera lavadora samsung lg xiaomi lenovo pantalla batería memoria "
+    "presidente ministro alcalde elecciones votación campaña acuerdo proceso justicia tribunal corte"
+).split()
+RELLENO = 50_000  # Palabras del vocabulario general (Zipf)
+FUENTES = ["noticia", "wiki", "producto"]
+CONSULTAS = {
+    "una palabra": ["reforma", "televisores", "elecciones", "bogota"],
+    "varias palabras": ["reforma salud", "televisor samsung", "paz gobierno"],
+    "con filtros": ["inflación dólar", "celular xiaomi batería"],
+}
+
+
+def poblar(indice, n, aleatorio):
+    relleno = [f"p{i}" for i in range(RELLENO)]
+    acumulado = list(itertools.accumulate(1 / rango for rango in range(1, RELLENO + 1)))
+    lote = []
+    for i in range(n):
+        fuente = FUENTES[i % 3]
+        palabras = aleatorio.choices(relleno, cum_weights=acumulado, k=8 if fuente == "producto" else 120)
+        for posicion in aleatorio.sample(range(len(palabras)), 4):
+            if aleatorio.random() < 0.3:
+                palabras[posicion] = aleatorio.choice(VOCABULARIO)
+        lote.append({
+            "clave": f"{fuente}:{i}", "fuente": fuente, "sitio": aleatorio.choice(["a", "b", "c"]),
+            "titulo": " ".join(palabras[:8]), "cuerpo": " ".join(palabras[8:]),
+            "fecha": f"2024-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d} 10:00",
+        })
+        if len(lote) == 10_000:
+            indice.add_many(lote)
+            lote = []
+    indice.add_many(lote)
+    indice.optimize()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    aleatorio = random.Random(7)
+    indice = SearchIndex(Path(tempfile.mkdtemp(prefix="bench_")) / "busqueda.sqlite")
+
+    inicio = time.perf_counter()
+    poblar(indice, n, aleatorio)
+    print(f"📦 {indice.count():,} documentos indexados en {time.perf_counter() - inicio:.1f}s")
+
+    print(f"\n{'consulta':<18}{'coincidencias':>15}{'p50 ms':>9}{'p95 ms':>9}")
+    peor = 0.0
+    for tipo, consultas in CONSULTAS.items():
+        filtros = {"fuente": "noticia", "desde": "2024-06-01"} if tipo == "con filtros" else {}
+        tiempos = []
+        for _ in range(repeticiones):
+            for consulta in consultas:
+                t = time.perf_counter()
+                indice.search(consulta, **filtros)
+                tiempos.append((time.perf_counter() - t) * 1000)
+        tiempos.sort()
+        coincidencias = statistics.mean(indice._conn.execute(
+            "SELECT COUNT(*) FROM documentos_fts WHERE documentos_fts MATCH ?", (fts_query(c),)).fetchone()[0]
+            for c in consultas)
+        p95 = tiempos[min(len(tiempos) - 1, round(0.95 * (len(tiempos) - 1)))]
+        peor = max(peor, p95)
+        print(f"{tipo:<18}{coincidencias:>15,.0f}{statistics.median(tiempos):>9.2f}{p95:>9.2f}")
+    print(f"\n{'✅' if peor < 10 else '⚠️'} p95 más alto: {peor:.2f} ms (objetivo < 10 ms)")
+    print("ℹ️ BM25 puntúa cada coincidencia: el costo crece con las coincidencias de la consulta")
+
+
+if __name__ == "__main__":
+    main()
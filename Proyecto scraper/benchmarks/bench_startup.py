@@ -0,0 +1,82 @@
+"""
+bench_startup.py
+
+Mide el arranque en frío del menú (`import _main_`) con `python -X importtime` en un
+proceso nuevo por repetición, muestra los módulos que más tardan en importarse y
+termina con código 1 si:
+
+- la mediana del tiempo acumulado de `_main_` supera el presupuesto, o
+- el arranque importa algún módulo pesado que debería cargarse solo al usarse
+  (transformers, torch, playwright).
+
+Sirve como verificación en CI: `python benchmarks/bench_startup.py --presupuesto 300`.
+
+Uso: python benchmarks/bench_startup.py [--repeticiones N] [--presupuesto ms] [--top N]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+PRESUPUESTO_MS = float(os.environ.get("STARTUP_BUDGET_MS", 300))
+PROHIBIDOS = ("transformers", "torch", "playwright")
+
+# import time: self [us] | cumulative | imported package
+LINEA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def medir_arranque():
+    """Importa `_main_` en un proceso nuevo; retorna {módulo: (propio µs, acumulado µs, nivel)}"""
+    resultado = subprocess.run([sys.executable, "-X", "importtime", "-c", "import _main_"],
+                               cwd=RAIZ, capture_output=True, text=True)
+    if resultado.returncode != 0:
+        raise RuntimeError(f"No se pudo importar _main_:\n{resultado.stderr[-2000:]}")
+    modulos = {}
+    for linea in resultado.stderr.splitlines():
+        coincidencia = LINEA.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, nombre = coincidencia.groups()
+            modulos[nombre] = (int(propio), int(acumulado), len(sangria) // 2)
+    return modulos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto", type=float, default=PRESUPUESTO_MS,
+                        help="máximo aceptable para importar _main_ (ms); también STARTUP_BUDGET_MS")
+    parser.add_argument("--top", type=int, default=10, help="módulos más lentos a mostrar")
+    args = parser.parse_args()
+
+    corridas = [medir_arranque() for _ in range(args.repeticiones)]
+    totales = [corrida["_main_"][1] / 1000 for corrida in corridas]
+    mediana = statistics.median(totales)
+    ultima = corridas[-1]
+
+    print(f"\n⏱️ Arranque en frío de _main_: mediana {mediana:.1f} ms "
+          f"(mín {min(totales):.1f}, máx {max(totales):.1f}) en {args.repeticiones} corridas")
+    print(f"\n{'módulo':<40}{'propio ms':>11}{'acumulado ms':>14}")
+    for nombre, (propio, acumulado, _) in sorted(ultima.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{nombre:<40}{propio / 1000:>11.1f}{acumulado / 1000:>14.1f}")
+
+    fallos = []
+    pesados = sorted(nombre for nombre in ultima if nombre.split(".")[0] in PROHIBIDOS)
+    if pesados:
+        fallos.append(f"el arranque importa módulos pesados: {', '.join(pesados[:5])}")
+    if mediana > args.presupuesto:
+        fallos.append(f"{mediana:.1f} ms supera el presupuesto de {args.presupuesto:.0f} ms")
+
+    for fallo in fallos:
+        print(f"\n❌ {fallo}")
+    if not fallos:
+        print(f"\n✅ Dentro del presupuesto de {args.presupuesto:.0f} ms")
+    sys.exit(1 if fallos else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+bench_suite.py
+
+Benchmark de extremo a extremo de todos los scrapers contra el servidor de fixtures
+local (benchmarks/fixture_server.py), sin acceso a la red:
+
+- retail: Mercado Libre (paginación por URL y por clics) y Éxito.
+- noticias: búsqueda en los tres medios y extracción de los artículos encontrados.
+- wiki: modo HTML y modo Playwright.
+
+Por escenario reporta páginas/s, items/s, latencia p50/p95 por fase y el RSS máximo
+del proceso y de sus hijos (navegadores). Con --json guarda los resultados junto con
+el commit actual para compararlos entre versiones.
+
+Uso: python benchmarks/bench_suite.py [--repeticiones N] [--paginas N] [--latencia ms]
+                                      [--solo retail,noticias,wiki] [--json salida.json]
+"""
+
+import argparse
+import asyncio
+import functools
+import inspect
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import cache  # noqa: E402
+import product_store  # noqa: E402
+import search_index  # noqa: E402
+from benchmarks.fixture_server import PAGINAS_POR_CONSULTA, PRODUCTOS_POR_PAGINA, FixtureServer  # noqa: E402
+from Scrapers.browser_pool import AsyncBrowserPool, close_pool, get_pool  # noqa: E402
+from Scrapers.newscraper import NewScraper  # noqa: E402
+from Scrapers.retail_scraper import ExitoScraper, MercadoLibreScraper  # noqa: E402
+from Scrapers import session_state  # noqa: E402
+from Scrapers.scheduler import DomainPolicy, get_scheduler  # noqa: E402
+from Scrapers.wikiscraper import WikiScraper, fetch_html, parse_article  # noqa: E402
+
+SECCIONES = ["Introducción", "Historia", "Filosofía", "Implementaciones"]
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, round(p / 100 * (len(ordenados) - 1)))]
+
+
+def rss_maximo_mb():
+    """
+    (proceso, hijos) en MB; ru_maxrss está en KB en Linux y en bytes en macOS.
+    Los hijos (navegadores) solo se cuentan cuando terminan, así que el valor de un
+    escenario incluye los navegadores cerrados hasta ese momento.
+    """
+    if resource is None:
+        return None, None
+    escala = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / escala,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / escala)
+
+
+class Fases:
+    """Duración de cada llamada agrupada por fase; envuelve métodos sincrónicos o asincrónicos"""
+
+    def __init__(self):
+        self.tiempos = defaultdict(list)
+
+    @contextmanager
+    def medir(self, fase):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[fase].append(time.perf_counter() - inicio)
+
+    def envolver(self, obj, metodo, fase):
+        original = getattr(obj, metodo)
+        if inspect.iscoroutinefunction(original):
+            @functools.wraps(original)
+            async def medido(*args, **kwargs):
+                with self.medir(fase):
+                    return await original(*args, **kwargs)
+        else:
+            @functools.wraps(original)
+            def medido(*args, **kwargs):
+                with self.medir(fase):
+                    return original(*args, **kwargs)
+        setattr(obj, metodo, medido)
+
+    def resumen(self):
+        return {
+            fase: {"n": len(v), "p50_ms": percentil(v, 50) * 1000, "p95_ms": percentil(v, 95) * 1000}
+            for fase, v in self.tiempos.items()
+        }
+
+
+def escenario(nombre, funcion, repeticiones):
+    """Ejecuta `funcion(fases)` → (páginas, items) varias veces y arma el resultado"""
+    fases = Fases()
+    paginas = items = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        with fases.medir("total"):
+            p, i = funcion(fases)
+        paginas += p
+        items += i
+    segundos = time.perf_counter() - inicio
+    rss, rss_hijos = rss_maximo_mb()
+    return {
+        "escenario": nombre,
+        "repeticiones": repeticiones,
+        "segundos": segundos,
+        "paginas_s": paginas / segundos,
+        "items_s": items / segundos,
+        "fases": fases.resumen(),
+        "rss_max_mb": rss,
+        "rss_hijos_max_mb": rss_hijos,
+    }
+
+
+def bench_retail(server, clase, paginas, directorio, por_url=True, consulta="televisor samsung"):
+    scraper = server.configure_retail(clase())
+    scraper.paginacion_por_url = por_url
+    scraper.report_dir = str(directorio)
+
+    def correr(fases):
+        fases.envolver(scraper, "_realizar_busqueda", "busqueda")
+        fases.envolver(scraper, "_ir_a_siguiente_pagina", "siguiente_pagina")
+        fases.envolver(scraper, "_extraer_pagina", "extraccion")
+        try:
+            productos = scraper.scrape(consulta, paginas, force_refresh=True)
+        finally:
+            # Si no se quitan, la siguiente repetición envuelve al envoltorio y mide doble
+            for metodo in ("_realizar_busqueda", "_ir_a_siguiente_pagina", "_extraer_pagina"):
+                delattr(scraper, metodo)
+        # Un listado más corto que lo pedido entrega menos páginas
+        return -(-len(productos) // PRODUCTOS_POR_PAGINA), len(productos)
+    return correr
+
+
+def bench_noticias(server):
+    def correr(fases):
+        async def run():
+            scrap = NewScraper(pool=AsyncBrowserPool(headless=True))
+            scrap.OUTLETS = server.news_outlets(NewScraper.OUTLETS)
+            fases.envolver(scrap, "search_outlet", "busqueda_medio")
+            fases.envolver(scrap, "extract_article", "extraccion_articulo")
+            try:
+                resultados = await scrap.search("paz total", force_refresh=True)
+
+                async def articulo(resultado):
+                    async with scrap._page() as page:
+                        with fases.medir("carga_articulo"):
+                            await page.goto(resultado.url, timeout=scrap.TIMEOUT)
+                        return await scrap.extract_article(page, resultado.outlet)
+
+                articulos = await asyncio.gather(*(articulo(r) for r in resultados))
+                return len(scrap.OUTLETS) + len(articulos), len(resultados) + sum(len(a.paragraphs) for a in articulos)
+            finally:
+                await scrap.pool.close()
+        return asyncio.run(run())
+    return correr
+
+
+def bench_wiki_html(server):
+    def correr(fases):
+        with fases.medir("descarga"):
+            html = fetch_html(server.wiki_url())
+        with fases.medir("analisis"):
+            articulo = parse_article(html)
+        with fases.medir("secciones"):
+            textos = [articulo.section_text(s) for s in SECCIONES]
+        return 1, sum(1 for t in textos if t)
+    return correr
+
+
+def bench_wiki_playwright(server):
+    def correr(fases):
+        with get_pool().page() as page:
+            with fases.medir("descarga"):
+                page.goto(server.wiki_url(), timeout=60000)
+            with fases.medir("secciones"):
+                textos = [WikiScraper.playwright_section_text(page, s) for s in SECCIONES]
+        return 1, sum(1 for t in textos if t)
+    return correr
+
+
+def commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def imprimir(resultados):
+    print(f"\n{'escenario':<26}{'págs/s':>9}{'items/s':>10}{'RSS MB':>9}{'hijos MB':>10}")
+    for r in resultados:
+        rss = f"{r['rss_max_mb']:.0f}" if r["rss_max_mb"] is not None else "-"
+        hijos = f"{r['rss_hijos_max_mb']:.0f}" if r["rss_hijos_max_mb"] is not None else "-"
+        print(f"{r['escenario']:<26}{r['paginas_s']:>9.2f}{r['items_s']:>10.1f}{rss:>9}{hijos:>10}")
+        for fase, datos in r["fases"].items():
+            print(f"    {fase:<22}{datos['n']:>5}×  p50 {datos['p50_ms']:8.1f} ms  p95 {datos['p95_ms']:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--paginas", type=int, default=3)
+    parser.add_argument("--latencia", type=float, default=50, help="latencia simulada por respuesta (ms)")
+    parser.add_argument("--solo", default="retail,noticias,wiki")
+    parser.add_argument("--json", help="archivo donde guardar los resultados")
+    args = parser.parse_args()
+    grupos = set(args.solo.split(","))
+
+    # Cachés, almacén y reportes en un directorio temporal para no tocar los datos reales
+    temporal = Path(tempfile.mkdtemp(prefix="bench_"))
+    cache._result_cache = cache.ResultCache(temporal / "resultados.sqlite")
+    product_store._store = product_store.ProductStore(temporal / "productos.sqlite")
+    search_index._index = search_index.SearchIndex(temporal / "busqueda.sqlite")
+    session_state._store = session_state.SessionStore(temporal / "sesiones")
+    reportes = temporal / "reportes_retail"
+    get_pool(headless=True)
+
+    resultados = []
+    with FixtureServer(latency=args.latencia / 1000) as server:
+        # El planificador no debe limitar al servidor local: se mide al scraper, no la cortesía
+        get_scheduler().policies[get_scheduler().domain_of(server.url)] = DomainPolicy(
+            rate=1000, burst=1000, max_concurrent=16)
+        escenarios = []
+        if "retail" in grupos:
+            escenarios += [
+                ("mercadolibre (url)", bench_retail(server, MercadoLibreScraper, args.paginas, reportes)),
+                ("mercadolibre (clics)", bench_retail(server, MercadoLibreScraper, args.paginas, reportes, por_url=False)),
+                ("exito (url)", bench_retail(server, ExitoScraper, args.paginas, reportes)),
+            ]
+            # Más páginas pedidas que las del listado: debe terminar sin esperas ni reintentos
+            corta, paginas_corta = next(iter(PAGINAS_POR_CONSULTA.items()))
+            escenarios += [
+                (f"{sitio} (fin del listado)", bench_retail(server, clase, paginas_corta + 2, reportes, consulta=corta))
+                for sitio, clase in (("mercadolibre", MercadoLibreScraper), ("exito", ExitoScraper))
+            ]
+        if "noticias" in grupos:
+            escenarios.append(("noticias", bench_noticias(server)))
+        if "wiki" in grupos:
+            escenarios += [("wiki (html)", bench_wiki_html(server)),
+                           ("wiki (playwright)", bench_wiki_playwright(server))]
+        try:
+            for nombre, funcion in escenarios:
+                print(f"\n▶️ {nombre}")
+                resultados.append(escenario(nombre, funcion, args.repeticiones))
+        finally:
+            close_pool()
+
+    imprimir(resultados)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"commit": commit_actual(), "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "parametros": vars(args), "resultados": resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados guardados en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+bench_wiki.py
+
+Compara la extracción de secciones de Wikipedia con Playwright contra el modo HTML
+(una descarga + una pasada del parser) usando benchmarks/fixtures/wikipedia_python.html,
+sin acceso a la red.
+
+Uso: python benchmarks/bench_wiki.py [repeticiones]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from Scrapers.browser_pool import BrowserPool  # noqa: E402
+from Scrapers.wikiscraper import WikiScraper, parse_article  # noqa: E402
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "wikipedia_python.html"
+SECCIONES = ["Introducción", "Historia", "Filosofía", "Implementaciones"]
+
+
+def bench_html(html, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        article = parse_article(html)
+        for seccion in SECCIONES:
+            article.section_text(seccion)
+    return time.perf_counter() - inicio
+
+
+def bench_playwright(html, repeticiones):
+    pool = BrowserPool(headless=True)
+    try:
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            with pool.page() as page:
+                page.set_content(html)
+                for seccion in SECCIONES:
+                    WikiScraper.playwright_section_text(page, seccion)
+        return time.perf_counter() - inicio
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    html = FIXTURE.read_text(encoding="utf-8")
+    for nombre, funcion in (("html", bench_html), ("playwright", bench_playwright)):
+        segundos = funcion(html, repeticiones)
+        print(f"{nombre:<11} {segundos / repeticiones * 1000:9.1f} ms por artículo "
+              f"({len(SECCIONES)} secciones)")
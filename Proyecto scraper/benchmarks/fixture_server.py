@@ -0,0 +1,335 @@
+"""
+fixture_server.py
+
+Servidor HTTP local con páginas sintéticas que imitan a los sitios reales con los mismos
+selectores que usan los scrapers, para medir rendimiento sin depender de la red:
+
+- /ml/...            Mercado Libre: portada con buscador, listado paginado por URL
+                     (_Desde_N_NoIndex_True) y botón "Siguiente".
+- /exito/...         Éxito: portada con buscador y /s?q=...&page=N con botón "Siguiente".
+                     Las consultas de `PAGINAS_POR_CONSULTA` tienen menos páginas; después
+                     de la última Mercado Libre muestra su aviso de "sin resultados" y
+                     Éxito un listado vacío.
+- /eltiempo/, /semana/, /elespectador/
+                     Búsqueda de noticias y artículos (con ETag para revalidación).
+- /wiki/{título}     Artículo de Wikipedia guardado en fixtures/wikipedia_python.html.
+
+Uso directo: python benchmarks/fixture_server.py [puerto]
+"""
+
+import hashlib
+import html
+import random
+import re
+import sys
+import threading
+import time
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+PRODUCTOS_POR_PAGINA = 48
+TOTAL_PAGINAS = 10
+PAGINAS_POR_CONSULTA = {"cable hdmi": 2}  # Listados más cortos que las páginas pedidas
+RESULTADOS_NOTICIAS = 10
+
+COOKIES = """<div id="cookies"><button onclick="this.parentNode.remove()">Aceptar cookies</button></div>"""
+TIPOS = ["Portátil", "Televisor", "Celular", "Audífonos", "Nevera", "Lavadora", "Tablet", "Monitor"]
+MARCAS = ["Samsung", "Lenovo", "Xiaomi", "LG", "Apple", "Huawei", "HP", "Sony"]
+
+
+def _pagina(titulo, cuerpo, head=""):
+    return (f"<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(titulo)}</title>{head}</head><body>{cuerpo}</body></html>")
+
+
+def _miles(valor):
+    return f"{valor:,}".replace(",", ".")
+
+
+def productos_sinteticos(consulta, pagina, cantidad=PRODUCTOS_POR_PAGINA):
+    """Productos deterministas para (consulta, página): mismos datos en cada ejecución"""
+    rng = random.Random(f"{consulta}|{pagina}")
+    productos = []
+    for i in range(cantidad):
+        precio = rng.randrange(80, 6000) * 1000 + 900
+        descuento = rng.choice([0, 0, 10, 15, 25, 40])
+        productos.append({
+            "id": 1_000_000 + (pagina - 1) * cantidad + i,
+            "nombre": f"{rng.choice(TIPOS)} {consulta.title()} {rng.choice(MARCAS)} Ref {rng.randrange(100, 999)}",
+            "marca": rng.choice(MARCAS),
+            "precio": precio,
+            "precio_original": round(precio / (1 - descuento / 100), -2) if descuento else None,
+            "descuento": descuento,
+        })
+    return productos
+
+
+def total_paginas(consulta):
+    return PAGINAS_POR_CONSULTA.get(consulta.lower(), TOTAL_PAGINAS)
+
+
+def _tarjeta_ml(p):
+    anterior = ""
+    if p["precio_original"]:
+        anterior = (f"<s class=\"andes-money-amount andes-money-amount--previous\">"
+                    f"<span class=\"andes-money-amount__fraction\">{_miles(int(p['precio_original']))}</span></s>")
+    descuento = f"<span class=\"andes-money-amount__discount\">{p['descuento']}% OFF</span>" if p["descuento"] else ""
+    return (f"<div class=\"poly-card__content\"><h3><a class=\"poly-component__title\" "
+            f"href=\"https://articulo.mercadolibre.com.co/MCO-{p['id']}-producto-_JM\">{html.escape(p['nombre'])}</a></h3>"
+            f"{anterior}<div class=\"poly-price__current\"><span class=\"andes-money-amount\">"
+            f"<span class=\"andes-money-amount__fraction\">{_miles(p['precio'])}</span></span>{descuento}</div></div>")
+
+
+def _tarjeta_exito(p):
+    anterior = f"<p class=\"price-dashed\">$ {_miles(int(p['precio_original']))}</p>" if p["precio_original"] else ""
+    descuento = ""
+    if p["descuento"]:
+        descuento = (f"<div class=\"priceSection_container-promotion_discount__x\">"
+                     f"<span data-percentage=\"true\">{p['descuento']}%</span></div>")
+    return (f"<article class=\"productCard_productCard__x\">"
+            f"<a data-testid=\"product-link\" href=\"/producto-{p['id']}/p\">"
+            f"<h3 class=\"styles_brand__x\">{p['marca']}</h3>"
+            f"<h3 class=\"styles_name__x\">{html.escape(p['nombre'])}</h3></a>"
+            f"{anterior}<p class=\"ProductPrice_container__price__x\">$ {_miles(p['precio'])}</p>{descuento}"
+            f"<span data-fs-product-details-seller__name=\"true\">Vendido por: Éxito</span></article>")
+
+
+def _articulo(outlet, slug):
+    """Título y párrafos deterministas de un artículo"""
+    rng = random.Random(f"{outlet}|{slug}")
+    palabras = slug.replace("-", " ").split()
+    relleno = ["gobierno", "ciudad", "economía", "informe", "proyecto", "región", "semana", "datos",
+               "anuncio", "mercado", "estudio", "sector", "nacional", "reforma", "empresa"]
+    parrafos = [
+        " ".join(rng.choice(relleno + palabras) for _ in range(rng.randrange(40, 90))).capitalize() + "."
+        for _ in range(rng.randrange(6, 14))
+    ]
+    return f"Noticia sobre {' '.join(palabras)}", parrafos
+
+
+# Plantillas de búsqueda y artículo por medio, con los selectores de NewScraper.OUTLETS
+NOTICIAS = {
+    "eltiempo": {
+        "resultado": "<h3 class=\"c-article__title\"><a href=\"{url}\">{titulo}</a></h3>",
+        "titulo": "<h1>{titulo}</h1>",
+        "parrafo": "<div class=\"paragraph\">{texto}</div>",
+        "contenedor": "<article>{parrafos}</article>",
+    },
+    "semana": {
+        "resultado": "<a href=\"{url}\"><div class=\"queryly_item_title\">{titulo}</div></a>",
+        "titulo": "<h1 class=\"text-smoke-700\">{titulo}</h1>",
+        "parrafo": "<p data-type=\"text\">{texto}</p>",
+        "contenedor": "<article>{parrafos}</article>",
+    },
+    "elespectador": {
+        "resultado": "<h2 class=\"Card-Title\"><a href=\"{url}\">{titulo}</a></h2>",
+        "titulo": "<h1 class=\"Title\">{titulo}</h1>",
+        "parrafo": "<p>{texto}</p>",
+        "contenedor": "<div class=\"Article-Content\">{parrafos}</div>",
+    },
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FixtureServer/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        partes = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(partes.query).items()}
+        ruta = unquote(partes.path)
+        self.server.requests += 1
+        try:
+            for patron, metodo in self.RUTAS:
+                coincidencia = re.fullmatch(patron, ruta)
+                if coincidencia:
+                    return getattr(self, metodo)(query, *coincidencia.groups())
+            self._responder(404, _pagina("No encontrado", "<h1>404</h1>"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    RUTAS = [
+        (r"/ml/?", "_ml_portada"),
+        (r"/ml/buscar", "_ml_buscar"),
+        (r"/ml/listado/([^/_]+)(?:_Desde_(\d+)_NoIndex_True)?", "_ml_listado"),
+        (r"/exito/?", "_exito_portada"),
+        (r"/exito/s", "_exito_busqueda"),
+        (r"/(eltiempo)/buscar", "_noticias_busqueda"),
+        (r"/(semana)/buscador/?", "_noticias_busqueda"),
+        (r"/(elespectador)/buscador/([^/]+)", "_noticias_busqueda"),
+        (r"/(eltiempo|semana|elespectador)/articulo/([^/]+)", "_noticia"),
+        (r"/wiki/(.+)", "_wiki"),
+    ]
+
+    def _responder(self, status, cuerpo="", headers=None):
+        datos = cuerpo.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (headers or {}).items():
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _redirigir(self, destino):
+        self.send_response(302)
+        self.send_header("Location", destino)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    # Mercado Libre
+    def _ml_portada(self, query):
+        self._responder(200, _pagina("Mercado Libre (fixture)", COOKIES + (
+            "<form action=\"/ml/buscar\"><input class=\"nav-search-input\" name=\"as_word\"></form>")))
+
+    def _ml_buscar(self, query):
+        slug = "-".join(query.get("as_word", "").lower().split())
+        self._redirigir(f"/ml/listado/{quote(slug)}")
+
+    def _ml_listado(self, query, slug, desde=None):
+        pagina = (int(desde) - 1) // PRODUCTOS_POR_PAGINA + 1 if desde else 1
+        consulta = slug.replace("-", " ")
+        if pagina > total_paginas(consulta):
+            self._responder(200, _pagina(f"{slug} | Mercado Libre (fixture)", (
+                "<div class=\"ui-search-rescue\"><h3>No hay publicaciones que coincidan con tu búsqueda.</h3></div>")))
+            return
+        tarjetas = "".join(_tarjeta_ml(p) for p in productos_sinteticos(consulta, pagina))
+        siguiente = ""
+        if pagina < total_paginas(consulta):
+            url = f"/ml/listado/{quote(slug)}_Desde_{pagina * PRODUCTOS_POR_PAGINA + 1}_NoIndex_True"
+            siguiente = (f"<ul><li class=\"andes-pagination__button andes-pagination__button--next\">"
+                         f"<a href=\"{url}\">Siguiente</a></li></ul>")
+        self._responder(200, _pagina(f"{slug} | Mercado Libre (fixture)",
+                                     f"{COOKIES}<section class=\"ui-search-results\">{tarjetas}</section>{siguiente}"))
+
+    # Éxito
+    def _exito_portada(self, query):
+        self._responder(200, _pagina("Éxito (fixture)", COOKIES + (
+            "<form action=\"/exito/s\"><input data-fs-search-input=\"true\" name=\"q\">"
+            "<button type=\"submit\" aria-label=\"Submit Search\">Buscar</button></form>")))
+
+    def _exito_busqueda(self, query):
+        consulta = query.get("q", "")
+        pagina = int(query.get("page", 0)) + 1
+        tarjetas = ""
+        if pagina <= total_paginas(consulta):
+            tarjetas = "".join(_tarjeta_exito(p) for p in productos_sinteticos(consulta, pagina))
+        siguiente = ""
+        if pagina < total_paginas(consulta):
+            url = f"/exito/s?q={quote(consulta)}&sort=score_desc&page={pagina}"
+            siguiente = (f"<button aria-label=\"Próxima Pagina\" "
+                         f"onclick=\"window.location.href='{url}'\">Siguiente</button>")
+        self._responder(200, _pagina(f"{consulta} | Éxito (fixture)",
+                                     f"{COOKIES}<section>{tarjetas}</section>{siguiente}"))
+
+    # Noticias
+    def _noticias_busqueda(self, query, outlet, palabra=None):
+        palabra = palabra or query.get("q") or query.get("query") or ""
+        slug = "-".join(re.split(r"[\s+-]+", palabra.lower()))
+        plantilla = NOTICIAS[outlet]["resultado"]
+        resultados = "".join(
+            plantilla.format(url=f"/{outlet}/articulo/{slug}-{i}", titulo=html.escape(_articulo(outlet, f"{slug}-{i}")[0]))
+            for i in range(1, RESULTADOS_NOTICIAS + 1)
+        )
+        self._responder(200, _pagina(f"Buscar {palabra}", f"<main>{resultados}</main>"))
+
+    def _noticia(self, query, outlet, slug):
+        titulo, parrafos = _articulo(outlet, slug)
+        etag = '"' + hashlib.md5("".join(parrafos).encode("utf-8")).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        plantilla = NOTICIAS[outlet]
+        cuerpo = plantilla["titulo"].format(titulo=html.escape(titulo)) + plantilla["contenedor"].format(
+            parrafos="".join(plantilla["parrafo"].format(texto=html.escape(p)) for p in parrafos))
+        head = ("<meta name=\"author\" content=\"Redacción\">"
+                "<meta property=\"article:published_time\" content=\"2024-05-01T08:00:00-05:00\">")
+        self._responder(200, _pagina(titulo, cuerpo, head), {"ETag": etag})
+
+    # Wikipedia
+    def _wiki(self, query, titulo):
+        self._responder(200, self.server.wiki_html)
+
+
+class FixtureServer:
+    """
+    Servidor de fixtures en un hilo aparte. `latency` (segundos) se agrega a cada
+    respuesta para simular la red. Se usa como context manager:
+
+        with FixtureServer() as server:
+            server.configure_retail(scraper)
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.latency = latency
+        self._httpd.requests = 0
+        self._httpd.wiki_html = (FIXTURES / "wikipedia_python.html").read_text(encoding="utf-8")
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self._httpd.requests
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    def configure_retail(self, scraper):
+        """Apunta un MercadoLibreScraper o ExitoScraper al servidor"""
+        if hasattr(scraper, "listado_url"):
+            scraper.base_url = f"{self.url}/ml"
+            scraper.listado_url = f"{self.url}/ml/listado"
+        else:
+            scraper.base_url = f"{self.url}/exito"
+        return scraper
+
+    def news_outlets(self, outlets):
+        """Copia de NewScraper.OUTLETS apuntando al servidor"""
+        locales = deepcopy(outlets)
+        for outlet, config in locales.items():
+            ruta = urlsplit(config["search_url"])
+            config["base_url"] = self.url
+            config["search_url"] = f"{self.url}/{outlet}{ruta.path}" + (f"?{ruta.query}" if ruta.query else "")
+            config["domain"] = f"{urlsplit(self.url).netloc}/{outlet}/"
+        return locales
+
+    def wiki_url(self, titulo="Python"):
+        return f"{self.url}/wiki/{quote(titulo)}"
+
+
+if __name__ == "__main__":
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    with FixtureServer(port=puerto) as server:
+        print(f"Fixtures en {server.url} (Ctrl+C para salir)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
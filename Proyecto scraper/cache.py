@@ -0,0 +1,219 @@
+"""
+cache.py
+
+Cachés persistentes en SQLite compartidas entre ejecuciones.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+
+
+def connect(path):
+    """Abre una base SQLite en modo WAL para poder compartirla entre procesos"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def fetch_rows(conn, sql, params=()):
+    """Ejecuta una consulta y retorna las filas como diccionarios columna → valor"""
+    cursor = conn.execute(sql, params)
+    columnas = [c[0] for c in cursor.description]
+    return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+
+def fold_accents(text):
+    """Minúsculas y sin tildes ('Televisión' → 'television'), para comparar nombres y consultas"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def normalize_text(text):
+    """Colapsa espacios para que el mismo texto con otro formato tenga la misma clave"""
+    return " ".join(text.split())
+
+
+class SummaryCache:
+    """
+    Caché en disco de resúmenes de IA.
+
+    La clave es un hash del texto normalizado más el modelo y los parámetros de
+    generación. Cuando se superan `max_entries` o `max_bytes` se expulsan las entradas
+    usadas hace más tiempo (LRU).
+    """
+
+    def __init__(self, path=CACHE_DIR / "resumenes.sqlite", max_entries=2000, max_bytes=50 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS resumenes (
+                    clave TEXT PRIMARY KEY,
+                    resumen TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    creado REAL NOT NULL,
+                    ultimo_acceso REAL NOT NULL
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resumenes_acceso ON resumenes(ultimo_acceso)")
+
+    @staticmethod
+    def key(text, model, **params):
+        data = json.dumps({"text": normalize_text(text), "model": model, "params": params},
+                          sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT resumen FROM resumenes WHERE clave = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE resumenes SET ultimo_acceso = ? WHERE clave = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, summary):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resumenes VALUES (?, ?, ?, ?, ?)",
+                (key, summary, len(summary.encode("utf-8")), now, now))
+            self._evict()
+
+    def _evict(self):
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM resumenes").fetchone()
+        if entries <= self.max_entries and size <= self.max_bytes:
+            return
+        # Recorre de la menos reciente a la más reciente hasta volver a los límites
+        to_delete = []
+        for clave, tamano in self._conn.execute("SELECT clave, tamano FROM resumenes ORDER BY ultimo_acceso"):
+            if entries <= self.max_entries and size <= self.max_bytes:
+                break
+            to_delete.append((clave,))
+            entries -= 1
+            size -= tamano
+        self._conn.executemany("DELETE FROM resumenes WHERE clave = ?", to_delete)
+
+    def stats(self):
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM resumenes").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self):
+        self._conn.close()
+
+
+_summary_cache = None
+
+
+def get_summary_cache():
+    """Devuelve la caché de resúmenes del proceso"""
+    global _summary_cache
+    if _summary_cache is None:
+        _summary_cache = SummaryCache()
+    return _summary_cache
+
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+
+class ResultCache:
+    """
+    Caché de páginas de resultados de búsqueda, clave (sitio, consulta normalizada, página).
+
+    Cada sitio define su TTL al consultar; las entradas vencidas cuentan como fallo.
+    Al superar `max_entries` se expulsan las páginas guardadas hace más tiempo. La base
+    usa WAL, así que varios procesos (por ejemplo los de `scrape_all`) pueden compartirla.
+    """
+
+    DEFAULT_TTL = 30 * 60
+
+    def __init__(self, path=CACHE_DIR / "resultados.sqlite", max_entries=5000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS resultados (
+                    sitio TEXT NOT NULL,
+                    consulta TEXT NOT NULL,
+                    pagina INTEGER NOT NULL,
+                    datos TEXT NOT NULL,
+                    guardado REAL NOT NULL,
+                    PRIMARY KEY (sitio, consulta, pagina)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_resultados_guardado ON resultados(guardado)")
+
+    def get(self, site, query, page, ttl=None):
+        """Registros de una página o None si no está o venció"""
+        ttl = self.DEFAULT_TTL if ttl is None else ttl
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT datos FROM resultados WHERE sitio = ? AND consulta = ? AND pagina = ? AND guardado >= ?",
+                (site, normalize_query(query), page, time.time() - ttl)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def get_pages(self, site, query, pages, ttl=None):
+        """Páginas 1..pages en orden, o None si falta alguna"""
+        result = []
+        for page in range(1, pages + 1):
+            records = self.get(site, query, page, ttl)
+            if records is None:
+                return None
+            result.append(records)
+        return result
+
+    def put(self, site, query, page, records):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)",
+                (site, normalize_query(query), page, json.dumps(records, ensure_ascii=False), time.time()))
+            entries = self._conn.execute("SELECT COUNT(*) FROM resultados").fetchone()[0]
+            if entries > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM resultados WHERE rowid IN "
+                    "(SELECT rowid FROM resultados ORDER BY guardado LIMIT ?)",
+                    (entries - self.max_entries,))
+
+    def invalidate(self, site, query=None):
+        with self._lock, self._conn:
+            if query is None:
+                self._conn.execute("DELETE FROM resultados WHERE sitio = ?", (site,))
+            else:
+                self._conn.execute("DELETE FROM resultados WHERE sitio = ? AND consulta = ?",
+                                   (site, normalize_query(query)))
+
+    def close(self):
+        self._conn.close()
+
+
+_result_cache = None
+
+
+def get_result_cache():
+    """Devuelve la caché de resultados del proceso"""
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = ResultCache()
+    return _result_cache
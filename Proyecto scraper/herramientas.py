@@ -1,6 +1,271 @@
+import gc
 import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
 from pathlib import Path
-from transformers import pipeline  # type: ignore
+from cache import get_summary_cache
+from search_index import get_search_index
+from tracing import count, span, traced
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODEL_NAME = "sshleifer/distilbart-cnn-12-6"
+CHUNK_TOKENS = 900  # Margen bajo el límite de 1024 tokens del modelo
+
+
+@dataclass
+class SummaryReport:
+    """Métricas de un resumen de documento largo"""
+    chunks: int
+    levels: int
+    latency_s: float
+    peak_rss_mb: float = None  # RSS máximo del proceso mientras se resumía el documento
+    rss_change_mb: float = None  # RSS al terminar menos RSS al empezar
+    peak_python_mb: float = None  # Solo con trace_memory (tracemalloc no ve los tensores de torch)
+
+    def __str__(self):
+        pico = f", pico de RSS {self.peak_rss_mb:.0f} MB" if self.peak_rss_mb is not None else ""
+        cambio = f" (al terminar {self.rss_change_mb:+.0f} MB)" if self.rss_change_mb is not None else ""
+        python = f", pico de memoria Python {self.peak_python_mb:.1f} MB" if self.peak_python_mb is not None else ""
+        return f"{self.chunks} fragmentos en {self.levels} niveles, {self.latency_s:.1f} s{pico}{cambio}{python}"
+
+
+def _rss_mb():
+    """RSS actual del proceso en MB (Linux); None donde no se puede leer"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _max_rss_mb():
+    """Pico de RSS de toda la vida del proceso (`ru_maxrss`: bytes en macOS, KB en el resto)"""
+    if resource is None:
+        return None
+    escala = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / escala
+
+
+class SummarizerService:
+    """
+    Servicio de resúmenes que mantiene el modelo cargado entre llamadas.
+
+    - El pipeline se carga una sola vez por proceso, en el primer uso o con `warm_up()`.
+    - `device` sigue la convención de transformers (-1 CPU, 0.. GPU) y `num_threads`
+      limita los hilos de torch en CPU.
+    - Con `idle_timeout` (segundos) el modelo se descarga tras ese tiempo sin uso y se
+      vuelve a cargar en la siguiente llamada.
+    - Con `trace_memory` los resúmenes largos miden además el pico de memoria Python con
+      tracemalloc, que hace más lenta cada asignación; por defecto solo se mide el RSS.
+    """
+
+    def __init__(self, model=MODEL_NAME, device=-1, num_threads=None, idle_timeout=None, trace_memory=False):
+        self.model = model
+        self.device = device
+        self.num_threads = num_threads
+        self.idle_timeout = idle_timeout
+        self.trace_memory = trace_memory
+        self.loads = 0
+        self._pipeline = None
+        self._lock = threading.RLock()
+        self._timer = None
+
+    @property
+    def loaded(self):
+        return self._pipeline is not None
+
+    def _load(self):
+        # Con el lock, un warm_up en segundo plano y la primera llamada no cargan dos modelos
+        with self._lock:
+            if self._pipeline is None:
+                with span("ia.carga_modelo"):
+                    # transformers tarda segundos en importarse; solo se paga al cargar el modelo
+                    from transformers import pipeline  # type: ignore
+                    if self.num_threads:
+                        import torch  # type: ignore
+                        torch.set_num_threads(self.num_threads)
+                    self._pipeline = pipeline("summarization", model=self.model, device=self.device)
+                self.loads += 1
+            return self._pipeline
+
+    def warm_up(self, background=False):
+        """Carga el modelo y ejecuta una inferencia corta para dejarlo listo"""
+        if background:
+            threading.Thread(target=self.warm_up, daemon=True).start()
+            return
+        self.summarize_many(["Python es un lenguaje de programación creado por Guido van Rossum."],
+                            max_length=20, min_length=5)
+
+    def summarize(self, text, max_length=130, min_length=30):
+        return self.summarize_many([text], max_length=max_length, min_length=min_length)[0]
+
+    @traced("ia.lote")
+    def summarize_many(self, texts, max_length=130, min_length=30, batch_size=8):
+        """Resume varios textos en lotes con el mismo modelo cargado"""
+        if not texts:
+            return []
+        count("textos_resumidos", len(texts))
+        with self._lock:
+            self._cancel_unload()
+            try:
+                summarizer = self._load()
+                outputs = summarizer(
+                    list(texts),
+                    max_length=max_length,
+                    min_length=min_length,
+                    do_sample=False,
+                    batch_size=batch_size,
+                    truncation=True
+                )
+            finally:
+                self._schedule_unload()
+        return [output['summary_text'] for output in outputs]
+
+    @traced("ia.resumen_largo")
+    def summarize_long(self, text, max_length=130, min_length=30, batch_size=4, chunk_tokens=CHUNK_TOKENS):
+        """
+        Resume textos de cualquier largo con map-reduce.
+
+        Divide el texto en fragmentos del tamaño del modelo (por párrafos y, si hace falta,
+        por tokens), los resume en lotes de `batch_size` y resume la concatenación de los
+        resúmenes parciales. Los parciales se reducen a medida que se acumulan, así que la
+        memoria no crece con el largo del documento.
+        Retorna (resumen, SummaryReport).
+        """
+        tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        rss_inicial = _rss_mb()
+        max_inicial = _max_rss_mb()
+        muestras = [rss_inicial]
+        start = time.perf_counter()
+        tokenizer = self._load().tokenizer
+
+        def resumir(textos):
+            # El RSS se muestrea después de cada lote: los tensores se liberan al terminarlo
+            resumenes = self.summarize_many(textos, max_length, min_length, batch_size)
+            muestras.append(_rss_mb())
+            return resumenes
+
+        chunks = 0
+        levels = 1
+        partials = []
+        batch = []
+        for chunk in self._chunks(text, tokenizer, chunk_tokens):
+            batch.append(chunk)
+            chunks += 1
+            if len(batch) == batch_size:
+                partials += resumir(batch)
+                batch = []
+                # Reduce los parciales en cuanto ya no caben en un fragmento
+                if self._token_count(tokenizer, "\n\n".join(partials)) > chunk_tokens:
+                    partials = resumir(list(self._chunks("\n\n".join(partials), tokenizer, chunk_tokens)))
+                    levels += 1
+        if batch:
+            partials += resumir(batch)
+
+        while len(partials) > 1:
+            partials = resumir(list(self._chunks("\n\n".join(partials), tokenizer, chunk_tokens)))
+            levels += 1
+        summary = partials[0] if partials else ""
+
+        report = SummaryReport(chunks, levels, time.perf_counter() - start)
+        muestras = [m for m in muestras if m is not None]
+        if muestras:
+            report.peak_rss_mb = max(muestras)
+            report.rss_change_mb = muestras[-1] - muestras[0]
+        # Si el pico de toda la vida del proceso subió, ocurrió durante este documento
+        # (también dentro de un lote, entre dos muestras)
+        max_final = _max_rss_mb()
+        if max_final is not None and max_inicial is not None and max_final > max_inicial:
+            report.peak_rss_mb = max(report.peak_rss_mb or 0, max_final)
+        if tracemalloc.is_tracing():
+            report.peak_python_mb = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        if tracing:
+            tracemalloc.stop()
+        return summary, report
+
+    @staticmethod
+    def _token_count(tokenizer, text):
+        return len(tokenizer.encode(text, add_special_tokens=False))
+
+    @classmethod
+    def _chunks(cls, text, tokenizer, chunk_tokens):
+        """Genera fragmentos de hasta `chunk_tokens` tokens respetando párrafos cuando se puede"""
+        current = []
+        current_tokens = 0
+        for paragraph in text.split("\n"):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = cls._token_count(tokenizer, paragraph)
+
+            # Párrafo más largo que un fragmento: se corta por tokens
+            if tokens > chunk_tokens:
+                if current:
+                    yield "\n\n".join(current)
+                    current, current_tokens = [], 0
+                ids = tokenizer.encode(paragraph, add_special_tokens=False)
+                for i in range(0, len(ids), chunk_tokens):
+                    yield tokenizer.decode(ids[i:i + chunk_tokens])
+                continue
+
+            if current and current_tokens + tokens > chunk_tokens:
+                yield "\n\n".join(current)
+                current, current_tokens = [], 0
+            current.append(paragraph)
+            current_tokens += tokens
+        if current:
+            yield "\n\n".join(current)
+
+    def unload(self):
+        """Libera el modelo de memoria"""
+        with self._lock:
+            self._cancel_unload()
+            if self._pipeline is not None:
+                self._pipeline = None
+                gc.collect()
+
+    def _cancel_unload(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _schedule_unload(self):
+        if self.idle_timeout:
+            self._timer = threading.Timer(self.idle_timeout, self.unload)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+_summarizer = None
+
+
+def get_summarizer():
+    """
+    Devuelve el servicio de resúmenes del proceso.
+    Se configura con SUMMARIZER_DEVICE, SUMMARIZER_THREADS, SUMMARIZER_IDLE_TIMEOUT y
+    SUMMARIZER_TRACEMALLOC=1 (pico de memoria Python en los resúmenes largos).
+    """
+    global _summarizer
+    if _summarizer is None:
+        threads = os.environ.get("SUMMARIZER_THREADS")
+        idle = os.environ.get("SUMMARIZER_IDLE_TIMEOUT")
+        _summarizer = SummarizerService(
+            device=int(os.environ.get("SUMMARIZER_DEVICE", "-1")),
+            num_threads=int(threads) if threads else None,
+            idle_timeout=float(idle) if idle else None,
+            trace_memory=os.environ.get("SUMMARIZER_TRACEMALLOC") == "1"
+        )
+    return _summarizer
 
 
 def process_text(url: str, seccion: str, texto: str):
@@ -34,30 +299,37 @@ def process_text(url: str, seccion: str, texto: str):
 def ia_summary(text: str) -> str:
     """
     Usa un modelo preentrenado de Hugging Face para generar un resumen del texto.
+    Los resúmenes se guardan en una caché en disco por contenido, modelo y parámetros.
     """
     if not text:
         print("⚠️ No hay texto para resumir.")
         return ""
 
-    print("\n⏳ Resumiendo texto con IA...\n")
-
-    summarizer = pipeline(
-        "summarization",
-        model="sshleifer/distilbart-cnn-12-6"
-    )
+    summarizer = get_summarizer()
+    cache = get_summary_cache()
+    key = cache.key(text, summarizer.model, max_length=130, min_length=30, mode="map-reduce")
+    final_summary = cache.get(key)
 
-    summary = summarizer(text[:1024], max_length=130, min_length=30, do_sample=False)
-    final_summary = summary[0]['summary_text']
+    if final_summary is not None:
+        print("\n⚡ Resumen obtenido de la caché\n")
+        count("resumenes_cache")
+    else:
+        print("\n⏳ Resumiendo texto con IA...\n")
+        final_summary, report = summarizer.summarize_long(text, max_length=130, min_length=30)
+        print(f"📊 {report}\n")
+        cache.put(key, final_summary)
 
     print(f"📄 Resumen:\n\n{final_summary}\n")
     return final_summary
 
 
+@traced("reportes.guardar")
 def save_as(url: str, seccion: str, modo: str, texto: str):
     """
     Guarda el contenido en archivos:
     - .txt plano
     - .json estructurado
+    y lo agrega al índice de búsqueda (fuente "salida").
     """
     carpeta = Path(__file__).resolve().parent / "reportes"
     carpeta.mkdir(exist_ok=True)
@@ -79,4 +351,7 @@ def save_as(url: str, seccion: str, modo: str, texto: str):
     with open(carpeta / "salida.json", "w", encoding="utf-8") as f_json:
         json.dump(data, f_json, ensure_ascii=False, indent=2)
 
-    print("📁 Contenido exportado a 'resultados/salida.txt' y 'resultados/salida.json'")
\ No newline at end of file
+    print("📁 Contenido exportado a 'resultados/salida.txt' y 'resultados/salida.json'")
+
+    # Los archivos se sobrescriben en cada llamada; el índice conserva todo lo exportado
+    get_search_index().add("salida", f"{url}#{seccion}#{modo}", f"{seccion} ({modo})", texto, url=url)
\ No newline at end of file
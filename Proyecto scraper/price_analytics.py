@@ -0,0 +1,110 @@
+"""
+price_analytics.py
+
+Post-procesamiento por lotes de los precios de un crawl o del almacén de productos:
+descuentos, estadísticas de precio, detección de precios atípicos y resumen por sitio,
+con operaciones vectorizadas de pandas/NumPy sobre todas las filas a la vez.
+
+Requiere numpy y pandas; el scraper no los necesita, por eso este módulo solo se
+importa cuando se pide un análisis.
+"""
+
+import numpy as np
+import pandas as pd
+
+from product_record import ProductRecord
+from product_store import canonical_key, get_product_store
+
+COLUMNAS = ["sitio", "clave", "producto", "fecha", "precio", "precio_original", "descuento"]
+
+
+def to_frame(registros):
+    """DataFrame tipado desde `ProductRecord` o filas de reporte; descarta las que no tienen precio"""
+    registros = [ProductRecord.from_dict(r) if isinstance(r, dict) else r for r in registros]
+    df = pd.DataFrame({
+        "sitio": [r.sitio for r in registros],
+        "clave": [canonical_key(r.enlace) for r in registros],
+        "producto": [r.producto for r in registros],
+        "fecha": [r.fecha for r in registros],
+        "precio": [r.precio for r in registros],
+        "precio_original": [r.precio_original for r in registros],
+        "descuento": [r.descuento for r in registros],
+    }, columns=COLUMNAS)
+    return _tipar(df)
+
+
+def load_frame(store=None, sitio=None, desde=None, hasta=None):
+    """DataFrame con las observaciones del almacén (una consulta, sin objetos por fila)"""
+    columnas = (store or get_product_store()).price_columns(sitio, desde, hasta)
+    columnas["producto"] = columnas.pop("nombre")
+    return _tipar(pd.DataFrame(columnas, columns=COLUMNAS))
+
+
+def _tipar(df):
+    df = df[df["precio"].notna()].reset_index(drop=True)
+    return df.astype({"precio": "int64", "precio_original": "float64", "descuento": "float64"}).assign(
+        sitio=df["sitio"].astype("category"),
+        fecha=pd.to_datetime(df["fecha"], errors="coerce"),
+    )
+
+
+def add_discounts(df):
+    """
+    Agrega `descuento_calculado` (a partir de precio y precio original) y completa
+    `descuento` con él cuando el sitio no lo mostraba.
+    """
+    original = df["precio_original"].to_numpy()
+    precio = df["precio"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        calculado = np.where(original > precio, np.round((original - precio) * 100 / original, 1), np.nan)
+    return df.assign(descuento_calculado=calculado,
+                     descuento=df["descuento"].fillna(pd.Series(calculado, index=df.index)))
+
+
+def price_stats(df, por="sitio"):
+    """Cantidad, mínimo, cuartiles, media, máximo y desviación del precio por grupo"""
+    grupos = df.groupby(por, observed=True)["precio"]
+    return pd.DataFrame({
+        "n": grupos.size(),
+        "minimo": grupos.min(),
+        "p25": grupos.quantile(0.25),
+        "mediana": grupos.median(),
+        "media": grupos.mean().round(0),
+        "p75": grupos.quantile(0.75),
+        "maximo": grupos.max(),
+        "desviacion": grupos.std().round(0),
+    })
+
+
+def flag_outliers(df, por="sitio", umbral=3.5):
+    """
+    Serie booleana: precios atípicos dentro de su grupo según el z-score modificado
+    (mediana y MAD) del logaritmo del precio. Con `por="clave"` compara cada producto con
+    su propio historial; con `por="sitio"` marca accesorios o errores de precio en un listado.
+    """
+    logaritmo = np.log(df["precio"].clip(lower=1).astype("float64"))
+    grupos = logaritmo.groupby(df[por], observed=True)
+    desvio = logaritmo - grupos.transform("median")
+    mad = desvio.abs().groupby(df[por], observed=True).transform("median")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = 0.6745 * desvio / mad
+    return (z.abs() > umbral).fillna(False) & (mad > 0)
+
+
+def site_summary(df, umbral=3.5):
+    """Resumen por sitio: productos, precios, porcentaje con descuento, descuento medio y atípicos"""
+    df = add_discounts(df).assign(atipico=lambda d: flag_outliers(d, "sitio", umbral))
+    grupos = df.groupby("sitio", observed=True)
+    resumen = price_stats(df)[["n", "minimo", "mediana", "maximo"]]
+    resumen["con_descuento_pct"] = (df["descuento"].notna().groupby(df["sitio"], observed=True).mean() * 100).round(1)
+    resumen["descuento_medio"] = grupos["descuento"].mean().round(1)
+    resumen["atipicos"] = grupos["atipico"].sum()
+    return resumen
+
+
+def summary_text(registros):
+    """Tabla de `site_summary` lista para imprimir a partir de los registros de un crawl"""
+    df = to_frame(registros)
+    if df.empty:
+        return "Sin precios para analizar"
+    return site_summary(df).to_string()
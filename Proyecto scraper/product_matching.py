@@ -0,0 +1,258 @@
+"""
+product_matching.py
+
+Emparejamiento de productos equivalentes entre sitios (el mismo televisor en Mercado
+Libre y en Éxito) para comparar precios.
+
+- `normalize_title` reduce un título a tokens normalizados: sin tildes ni mayúsculas,
+  con las unidades unificadas (55" = 55 pulgadas → 55pulg, 1 TB → 1tb), la marca y los
+  números de modelo (un55du7000, sm-a155 → sma155).
+- `ProductMatcher` guarda un índice invertido token → productos en la misma base del
+  almacén. Cada producto nuevo solo se compara con los que comparten un token poco
+  frecuente (modelo, medida o palabra rara), así que el costo crece casi linealmente con
+  el catálogo en vez de comparar todos contra todos. Los productos enlazados forman un
+  grupo (unión de conjuntos) que se actualiza en cada `update()`.
+- `cheapest()` retorna, por grupo presente en varios sitios, dónde está más barato.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass
+
+from cache import connect, fetch_rows, fold_accents
+from product_store import get_product_store
+
+MARCAS = {
+    "acer", "apple", "asus", "bose", "challenger", "dell", "electrolux", "haceb", "hisense", "honor", "hp",
+    "huawei", "jbl", "kalley", "lenovo", "lg", "mabe", "microsoft", "motorola", "nintendo", "oppo", "oster",
+    "panasonic", "philips", "realme", "samsung", "samurai", "sony", "tcl", "vivo", "whirlpool", "xiaomi",
+}
+PALABRAS_VACIAS = {
+    "a", "al", "con", "de", "del", "el", "en", "envio", "gratis", "la", "las", "los", "nuevo", "original",
+    "para", "por", "sin", "un", "una", "y",
+}
+UNIDADES = [
+    (r"(\d+(?:[.,]\d+)?)\s*(?:\"|''|”|pulgadas|pulg|inch)", "pulg"),
+    (r"(\d+)\s*(?:tb|terabytes?)\b", "tb"),
+    (r"(\d+)\s*(?:gb|gigas?)\b", "gb"),
+    (r"(\d+)\s*(?:mah)\b", "mah"),
+    (r"(\d+)\s*(?:hz|hertz)\b", "hz"),
+    (r"(\d+)\s*(?:w|watts?|vatios)\b", "w"),
+    (r"(\d+(?:[.,]\d+)?)\s*(?:l|lt|lts|litros?)\b", "l"),
+    (r"(\d+(?:[.,]\d+)?)\s*(?:kg|kilos?)\b", "kg"),
+    (r"(\d+)\s*(?:mp|megapixeles)\b", "mp"),
+]
+_UNIDAD = re.compile(r"^\d+(?:\.\d+)?(" + "|".join(sufijo for _, sufijo in UNIDADES) + ")$")
+
+
+@dataclass(frozen=True)
+class TitleKey:
+    """Título normalizado: tokens, marca, números de modelo y medidas ((unidad, valores), ...)"""
+    tokens: frozenset
+    marca: str = None
+    modelos: frozenset = frozenset()
+    medidas: tuple = ()
+
+
+def _es_modelo(token):
+    """Código de modelo: letras y al menos dos dígitos (un55du7000, sma155, a15); no medidas ni 1080p"""
+    digitos = sum(c.isdigit() for c in token)
+    return (len(token) >= 3 and digitos >= 2 and digitos < len(token) and not _UNIDAD.match(token)
+            and not re.fullmatch(r"\d+p", token))
+
+
+def normalize_title(nombre):
+    """Título → `TitleKey`"""
+    texto = fold_accents(nombre or "")
+    for patron, sufijo in UNIDADES:
+        texto = re.sub(patron, lambda m: f" {m.group(1).replace(',', '.')}{sufijo} ", texto)
+    texto = re.sub(r"(?<=[a-z0-9])-(?=[a-z0-9])", "", texto)  # sm-a155 → sma155
+    tokens = frozenset(t.strip(".") for t in re.findall(r"[a-z0-9.]+", texto)) - PALABRAS_VACIAS - {""}
+
+    medidas = {}
+    for token in tokens:
+        unidad = _UNIDAD.match(token)
+        if unidad:
+            medidas.setdefault(unidad.group(1), set()).add(token)
+    modelos = frozenset(t for t in tokens if _es_modelo(t))
+    marca = next((t for t in tokens if t in MARCAS), None)
+    return TitleKey(tokens, marca, modelos, tuple((u, frozenset(v)) for u, v in sorted(medidas.items())))
+
+
+def same_model(a, b):
+    """Comparten un modelo; uno puede ser prefijo del otro (un55du7000 y un55du7000gxzl)"""
+    return any(x.startswith(y) or y.startswith(x) for x in a.modelos for y in b.modelos
+               if min(len(x), len(y)) >= 5 or x == y)
+
+
+def compatible(a, b):
+    """Reglas duras: marcas, modelos o medidas distintas descartan la pareja"""
+    if a.marca and b.marca and a.marca != b.marca:
+        return False
+    if a.modelos and b.modelos and not same_model(a, b):
+        return False
+    medidas_b = dict(b.medidas)
+    return all(valores & medidas_b.get(unidad, valores) for unidad, valores in a.medidas)
+
+
+class ProductMatcher:
+    """
+    Índice invertido incremental sobre los productos del almacén.
+
+    `update()` indexa los productos que aún no lo están y los enlaza con sus equivalentes:
+    similitud de Jaccard ponderada por IDF de al menos `umbral` (la mitad si comparten un
+    número de modelo) y sin marcas, modelos ni medidas en conflicto.
+    Los tokens presentes en más de `max_df` productos no generan candidatos.
+    """
+
+    def __init__(self, store=None, umbral=0.6, max_df=300):
+        store = store or get_product_store()
+        self.umbral = umbral
+        self.max_df = max_df
+        self._lock = threading.Lock()
+        self._conn = connect(store.path)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS firmas (
+                    producto_id INTEGER PRIMARY KEY REFERENCES productos(id),
+                    grupo INTEGER NOT NULL,
+                    tokens TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS indice (
+                    token TEXT NOT NULL,
+                    producto_id INTEGER NOT NULL,
+                    PRIMARY KEY (token, producto_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS idx_firmas_grupo ON firmas(grupo);
+            """)
+
+    def update(self):
+        """
+        Indexa y enlaza los productos nuevos del almacén; retorna cuántos se indexaron.
+        La transacción toma el bloqueo de escritura antes de leer, así que dos procesos
+        (por ejemplo los de `scrape_all`) no indexan el mismo producto a la vez.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            nuevos = self._conn.execute("""
+                SELECT id, nombre FROM productos
+                WHERE id NOT IN (SELECT producto_id FROM firmas)
+                ORDER BY id
+            """).fetchall()
+            if not nuevos:
+                return 0
+            df = dict(self._conn.execute("SELECT token, COUNT(*) FROM indice GROUP BY token"))
+            total = self._conn.execute("SELECT COUNT(*) FROM firmas").fetchone()[0]
+            claves = {}  # producto_id → TitleKey de candidatos ya leídos
+
+            for producto_id, nombre in nuevos:
+                clave = normalize_title(nombre)
+                total += 1
+                self._conn.execute("INSERT INTO firmas VALUES (?, ?, ?)",
+                                   (producto_id, producto_id, " ".join(sorted(clave.tokens))))
+                for candidato in self._candidatos(clave, df, producto_id):
+                    if candidato not in claves:
+                        claves[candidato] = self._clave(candidato)
+                    if self._equivalentes(clave, claves[candidato], df, total):
+                        self._unir(producto_id, candidato)
+                self._conn.executemany("INSERT OR IGNORE INTO indice VALUES (?, ?)",
+                                       [(token, producto_id) for token in clave.tokens])
+                for token in clave.tokens:
+                    df[token] = df.get(token, 0) + 1
+                claves[producto_id] = clave
+            return len(nuevos)
+
+    def _candidatos(self, clave, df, producto_id):
+        raros = [t for t in clave.tokens if 0 < df.get(t, 0) <= self.max_df]
+        if not raros:
+            return []
+        marcadores = ",".join("?" * len(raros))
+        return [fila[0] for fila in self._conn.execute(
+            f"SELECT DISTINCT producto_id FROM indice WHERE token IN ({marcadores}) AND producto_id != ?",
+            (*raros, producto_id))]
+
+    def _clave(self, producto_id):
+        tokens = self._conn.execute("SELECT tokens FROM firmas WHERE producto_id = ?", (producto_id,)).fetchone()[0]
+        return normalize_title(tokens)
+
+    def _equivalentes(self, a, b, df, total):
+        if not compatible(a, b):
+            return False
+        peso = {t: math.log(1 + total / (df.get(t, 0) + 1)) for t in a.tokens | b.tokens}
+        similitud = sum(peso[t] for t in a.tokens & b.tokens) / sum(peso.values())
+        return similitud >= (self.umbral / 2 if same_model(a, b) else self.umbral)
+
+    def _unir(self, a, b):
+        grupo_a, grupo_b = (self._conn.execute("SELECT grupo FROM firmas WHERE producto_id = ?", (p,)).fetchone()[0]
+                            for p in (a, b))
+        if grupo_a != grupo_b:
+            self._conn.execute("UPDATE firmas SET grupo = ? WHERE grupo = ?", (min(grupo_a, grupo_b),
+                                                                               max(grupo_a, grupo_b)))
+
+    def equivalents(self, sitio, clave):
+        """Productos del mismo grupo que (sitio, clave), con su último precio"""
+        return fetch_rows(self._conn, """
+            SELECT p.sitio, p.clave, p.nombre, p.enlace,
+                   (SELECT precio FROM precios WHERE producto_id = p.id ORDER BY fecha DESC LIMIT 1) AS precio
+            FROM productos p JOIN firmas f ON f.producto_id = p.id
+            WHERE f.grupo = (SELECT f2.grupo FROM firmas f2 JOIN productos p2 ON p2.id = f2.producto_id
+                             WHERE p2.sitio = ? AND p2.clave = ?)
+            ORDER BY precio
+        """, (sitio, clave))
+
+    def cheapest(self, consulta=None, min_sitios=2, limit=20):
+        """
+        Grupos presentes en al menos `min_sitios` sitios con el sitio más barato, el precio
+        mínimo y máximo y el ahorro. `consulta` filtra los grupos que tienen un producto con
+        todos sus tokens (se ignoran los que no aparecen en ningún título).
+        """
+        filtro, params = "", []
+        if consulta:
+            tokens = [t for t in normalize_title(consulta).tokens
+                      if self._conn.execute("SELECT 1 FROM indice WHERE token = ? LIMIT 1", (t,)).fetchone()]
+            if tokens:
+                marcadores = ",".join("?" * len(tokens))
+                filtro = f"""WHERE f.grupo IN (
+                    SELECT grupo FROM firmas WHERE producto_id IN (
+                        SELECT producto_id FROM indice WHERE token IN ({marcadores})
+                        GROUP BY producto_id HAVING COUNT(*) = ?))"""
+                params = [*tokens, len(tokens)]
+        return fetch_rows(self._conn, f"""
+            WITH miembros AS (
+                SELECT f.grupo, p.sitio, p.nombre, p.enlace, h.precio,
+                       ROW_NUMBER() OVER (PARTITION BY f.grupo ORDER BY h.precio) AS orden
+                FROM firmas f
+                JOIN productos p ON p.id = f.producto_id
+                JOIN precios h ON h.producto_id = p.id
+                 AND h.fecha = (SELECT MAX(fecha) FROM precios WHERE producto_id = p.id)
+                {filtro}
+            ), grupos AS (
+                SELECT grupo, COUNT(DISTINCT sitio) AS sitios, MIN(precio) AS precio_minimo,
+                       MAX(precio) AS precio_maximo
+                FROM miembros GROUP BY grupo HAVING sitios >= ?
+            )
+            SELECT m.nombre, m.sitio AS sitio_mas_barato, m.enlace, g.precio_minimo, g.precio_maximo,
+                   g.precio_maximo - g.precio_minimo AS ahorro, g.sitios
+            FROM grupos g JOIN miembros m ON m.grupo = g.grupo AND m.orden = 1
+            ORDER BY ahorro DESC
+            LIMIT ?
+        """, (*params, min_sitios, limit))
+
+    def summary(self):
+        productos, grupos = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT grupo) FROM firmas").fetchone()
+        return f"{productos} productos indexados en {grupos} grupos"
+
+    def close(self):
+        self._conn.close()
+
+
+_matcher = None
+
+
+def get_product_matcher():
+    """Devuelve el índice de emparejamiento del proceso (sobre el almacén de productos)"""
+    global _matcher
+    if _matcher is None:
+        _matcher = ProductMatcher()
+    return _matcher
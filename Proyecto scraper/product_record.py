@@ -0,0 +1,109 @@
+"""
+product_record.py
+
+Registro tipado de un producto retail: precios enteros en COP, descuento numérico
+(porcentaje) y fecha como datetime. Usa `__slots__` para que un crawl grande ocupe poco
+en memoria. `to_dict()` es el formato de los reportes, la caché y el almacén;
+`from_dict()` también acepta los reportes anteriores, que guardaban texto como
+"$1234 COP" y "12%".
+"""
+
+import re
+from datetime import datetime
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M"
+
+
+def parse_cop(valor):
+    """'$1.234.567 COP', '1234' o 1234 → 1234; None si no hay precio"""
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return int(valor)
+    digitos = re.sub(r"\D", "", str(valor))
+    return int(digitos) if digitos else None
+
+
+def parse_discount(valor):
+    """'12%', '12% OFF', '-12 %' o 12 → 12.0; None si no hay descuento"""
+    if valor is None or valor == "" or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    numero = re.search(r"\d+(?:[.,]\d+)?", str(valor))
+    return float(numero.group().replace(",", ".")) if numero else None
+
+
+def parse_fecha(valor):
+    """'2024-05-01 13:45', ISO 8601 o datetime → datetime; None si no se reconoce"""
+    if valor is None or isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.strptime(valor, FORMATO_FECHA)
+    except (TypeError, ValueError):
+        try:
+            return datetime.fromisoformat(valor)
+        except (TypeError, ValueError):
+            return None
+
+
+def discount_pct(precio_original, precio):
+    """Porcentaje de descuento con un decimal; None si no hay rebaja"""
+    if not precio_original or precio is None or precio >= precio_original:
+        return None
+    return round((precio_original - precio) * 100 / precio_original, 1)
+
+
+def format_cop(precio):
+    """1234567 → '$1.234.567 COP' (para mostrar; los reportes guardan el entero)"""
+    return "" if precio is None else f"${precio:,} COP".replace(",", ".")
+
+
+class ProductRecord:
+    """Producto observado en un listado"""
+
+    __slots__ = ("producto", "precio", "precio_original", "descuento", "enlace", "sitio", "fecha", "vendedor")
+
+    def __init__(self, producto, precio, enlace, sitio, fecha=None, precio_original=None, descuento=None,
+                 vendedor=None):
+        self.producto = producto
+        self.precio = precio
+        self.precio_original = precio_original if precio_original != precio else None
+        self.descuento = descuento if descuento is not None else discount_pct(precio_original, precio)
+        self.enlace = enlace
+        self.sitio = sitio
+        self.fecha = fecha or datetime.now().replace(second=0, microsecond=0)
+        self.vendedor = vendedor
+
+    @classmethod
+    def from_dict(cls, datos):
+        """Registro desde una fila de reporte, de la caché o de un checkpoint (formato nuevo o anterior)"""
+        return cls(
+            producto=datos.get("producto") or "Producto sin nombre",
+            precio=parse_cop(datos.get("precio_actual")),
+            enlace=datos.get("enlace"),
+            sitio=datos.get("sitio", ""),
+            fecha=parse_fecha(datos.get("fecha")),
+            precio_original=parse_cop(datos.get("precio_original")),
+            descuento=parse_discount(datos.get("descuento")),
+            vendedor=datos.get("vendedor") or None,
+        )
+
+    def to_dict(self):
+        """Fila de reporte: precios enteros, descuento numérico y fecha en FORMATO_FECHA"""
+        datos = {
+            "producto": self.producto,
+            "precio_actual": self.precio,
+            "precio_original": self.precio_original,
+            "descuento": self.descuento,
+            "enlace": self.enlace,
+            "sitio": self.sitio,
+            "fecha": self.fecha.strftime(FORMATO_FECHA) if self.fecha else None,
+        }
+        if self.vendedor is not None:
+            datos["vendedor"] = self.vendedor
+        return datos
+
+    def __repr__(self):
+        return f"ProductRecord({self.sitio!r}, {self.producto[:40]!r}, {format_cop(self.precio)!r})"
+
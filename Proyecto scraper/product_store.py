@@ -0,0 +1,248 @@
+"""
+product_store.py
+
+Almacén persistente de productos retail con historial de precios en SQLite.
+"""
+
+import csv
+import json
+import re
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from cache import CACHE_DIR, connect, fetch_rows
+from product_record import FORMATO_FECHA, ProductRecord
+
+
+def canonical_key(enlace):
+    """
+    Identificador estable de un producto a partir de su enlace:
+    el código MCO en Mercado Libre y la ruta sin parámetros en los demás sitios.
+    """
+    if not enlace:
+        return None
+    codigo = re.search(r"MCO-?(\d+)", enlace, re.IGNORECASE)
+    if codigo:
+        return f"MCO{codigo.group(1)}"
+    partes = urlsplit(enlace)
+    return f"{partes.netloc.lower().removeprefix('www.')}{partes.path.rstrip('/')}"
+
+
+def _limite_fecha(valor, fin_del_dia=False):
+    """
+    Límite de una ventana en el formato de `precios.fecha` ('2024-05-01 13:45').
+    Una fecha sin hora como final de la ventana incluye todo ese día.
+    """
+    if valor is None:
+        return None
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_FECHA)
+    if isinstance(valor, date):
+        valor = valor.isoformat()
+    valor = str(valor).strip().replace("T", " ")
+    if fin_del_dia and len(valor) == len("2024-05-01"):
+        return f"{valor} 23:59"
+    return valor
+
+
+class ProductStore:
+    """
+    Productos identificados por (sitio, clave canónica) y un historial de precios de solo
+    inserción, con índices por sitio, producto y fecha.
+    """
+
+    def __init__(self, path=CACHE_DIR / "productos.sqlite"):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS productos (
+                    id INTEGER PRIMARY KEY,
+                    sitio TEXT NOT NULL,
+                    clave TEXT NOT NULL,
+                    nombre TEXT NOT NULL,
+                    enlace TEXT,
+                    vendedor TEXT,
+                    primera_vez TEXT NOT NULL,
+                    ultima_vez TEXT NOT NULL,
+                    UNIQUE (sitio, clave)
+                );
+                CREATE TABLE IF NOT EXISTS precios (
+                    producto_id INTEGER NOT NULL REFERENCES productos(id),
+                    fecha TEXT NOT NULL,
+                    precio INTEGER NOT NULL,
+                    precio_original INTEGER,
+                    descuento REAL,
+                    UNIQUE (producto_id, fecha)
+                );
+                CREATE INDEX IF NOT EXISTS idx_productos_sitio ON productos(sitio);
+                CREATE INDEX IF NOT EXISTS idx_productos_nombre ON productos(nombre);
+                CREATE INDEX IF NOT EXISTS idx_precios_producto_fecha ON precios(producto_id, fecha);
+                CREATE INDEX IF NOT EXISTS idx_precios_fecha ON precios(fecha);
+            """)
+
+    def upsert(self, registros):
+        """
+        Inserta o actualiza productos y agrega su precio al historial; acepta `ProductRecord`
+        o filas de reporte (dict). Retorna cuántos se guardaron.
+        """
+        guardados = 0
+        with self._lock, self._conn:
+            for registro in registros:
+                if isinstance(registro, dict):
+                    registro = ProductRecord.from_dict(registro)
+                clave = canonical_key(registro.enlace)
+                precio = registro.precio
+                if not clave or precio is None:
+                    continue
+                fecha = (registro.fecha or datetime.now()).strftime(FORMATO_FECHA)
+                self._conn.execute("""
+                    INSERT INTO productos (sitio, clave, nombre, enlace, vendedor, primera_vez, ultima_vez)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (sitio, clave) DO UPDATE SET
+                        nombre = excluded.nombre,
+                        enlace = excluded.enlace,
+                        vendedor = COALESCE(excluded.vendedor, productos.vendedor),
+                        primera_vez = MIN(productos.primera_vez, excluded.primera_vez),
+                        ultima_vez = MAX(productos.ultima_vez, excluded.ultima_vez)
+                """, (registro.sitio, clave, registro.producto, registro.enlace, registro.vendedor, fecha, fecha))
+                producto_id = self._conn.execute(
+                    "SELECT id FROM productos WHERE sitio = ? AND clave = ?",
+                    (registro.sitio, clave)).fetchone()[0]
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO precios VALUES (?, ?, ?, ?, ?)",
+                    (producto_id, fecha, precio, registro.precio_original, registro.descuento))
+                guardados += 1
+        return guardados
+
+    def latest_prices(self, sitio=None, nombre=None, limit=50):
+        """Último precio de cada producto, filtrando por sitio y/o texto del nombre"""
+        filtros, params = [], []
+        if sitio:
+            filtros.append("p.sitio = ?")
+            params.append(sitio)
+        if nombre:
+            filtros.append("p.nombre LIKE ?")
+            params.append(f"%{nombre}%")
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        return fetch_rows(self._conn, f"""
+            SELECT p.sitio, p.clave, p.nombre, p.enlace, h.precio, h.precio_original, h.fecha
+            FROM productos p
+            JOIN precios h ON h.producto_id = p.id
+             AND h.fecha = (SELECT MAX(fecha) FROM precios WHERE producto_id = p.id)
+            {where}
+            ORDER BY h.precio
+            LIMIT ?
+        """, (*params, limit))
+
+    def price_range(self, sitio, clave, desde=None, hasta=None):
+        """Precio mínimo, máximo y número de observaciones de un producto en una ventana"""
+        desde = _limite_fecha(desde) or "0000"
+        hasta = _limite_fecha(hasta, fin_del_dia=True) or "9999"
+        rows = fetch_rows(self._conn, """
+            SELECT MIN(h.precio) AS minimo, MAX(h.precio) AS maximo, COUNT(*) AS observaciones
+            FROM precios h JOIN productos p ON p.id = h.producto_id
+            WHERE p.sitio = ? AND p.clave = ? AND h.fecha BETWEEN ? AND ?
+        """, (sitio, clave, desde, hasta))
+        return rows[0]
+
+    def price_history(self, sitio, clave):
+        return fetch_rows(self._conn, """
+            SELECT h.fecha, h.precio, h.precio_original, h.descuento
+            FROM precios h JOIN productos p ON p.id = h.producto_id
+            WHERE p.sitio = ? AND p.clave = ?
+            ORDER BY h.fecha
+        """, (sitio, clave))
+
+    def price_columns(self, sitio=None, desde=None, hasta=None):
+        """
+        Observaciones de precio por columnas ({columna: lista}) con una sola consulta, para
+        cargar decenas de miles de filas en arreglos sin crear un objeto por fila
+        (ver price_analytics.PriceBatch.from_store).
+        """
+        filtros, params = [], []
+        desde, hasta = _limite_fecha(desde), _limite_fecha(hasta, fin_del_dia=True)
+        for condicion, valor in (("h.fecha >= ?", desde), ("h.fecha <= ?", hasta), ("p.sitio = ?", sitio)):
+            if valor:
+                filtros.append(condicion)
+                params.append(valor)
+        where = f"WHERE {' AND '.join(filtros)}" if filtros else ""
+        cursor = self._conn.execute(f"""
+            SELECT p.sitio, p.clave, p.nombre, h.fecha, h.precio, h.precio_original,
+                   CAST(h.descuento AS REAL) AS descuento
+            FROM precios h JOIN productos p ON p.id = h.producto_id
+            {where}
+        """, params)
+        columnas = [c[0] for c in cursor.description]
+        valores = list(zip(*cursor.fetchall())) or [()] * len(columnas)
+        return {columna: list(valores[i]) for i, columna in enumerate(columnas)}
+
+    def biggest_drops(self, dias=30, sitio=None, limit=10):
+        """Productos cuyo precio más bajó entre la primera y la última observación de la ventana"""
+        desde = (datetime.now() - timedelta(days=dias)).strftime(FORMATO_FECHA)
+        filtro_sitio = "AND p.sitio = ?" if sitio else ""
+        params = (desde, sitio, limit) if sitio else (desde, limit)
+        return fetch_rows(self._conn, f"""
+            WITH ventana AS (
+                SELECT h.producto_id, h.precio,
+                       ROW_NUMBER() OVER (PARTITION BY h.producto_id ORDER BY h.fecha) AS primero,
+                       ROW_NUMBER() OVER (PARTITION BY h.producto_id ORDER BY h.fecha DESC) AS ultimo
+                FROM precios h
+                WHERE h.fecha >= ?
+            )
+            SELECT p.sitio, p.clave, p.nombre, p.enlace,
+                   a.precio AS precio_inicial, b.precio AS precio_final,
+                   a.precio - b.precio AS baja,
+                   ROUND(100.0 * (a.precio - b.precio) / a.precio, 1) AS baja_pct
+            FROM ventana a
+            JOIN ventana b ON b.producto_id = a.producto_id AND b.ultimo = 1
+            JOIN productos p ON p.id = a.producto_id
+            WHERE a.primero = 1 AND b.precio < a.precio {filtro_sitio}
+            ORDER BY baja_pct DESC
+            LIMIT ?
+        """, params)
+
+    def import_reports(self, directorio="reportes_retail"):
+        """
+        Importa los reportes existentes (.jsonl, .json y .csv). Si un reporte existe en
+        varios formatos se lee uno solo; las observaciones repetidas se ignoran.
+        """
+        total = 0
+        vistos = set()
+        for extension in (".jsonl", ".json", ".csv"):
+            for archivo in sorted(Path(directorio).glob(f"*{extension}")):
+                if archivo.stem in vistos:
+                    continue
+                vistos.add(archivo.stem)
+                try:
+                    total += self.upsert(self._leer_reporte(archivo))
+                except (OSError, ValueError, csv.Error) as e:
+                    print(f"⚠️ No se pudo importar {archivo.name}: {e}")
+        print(f"📥 {total} observaciones de precio importadas desde {directorio}")
+        return total
+
+    @staticmethod
+    def _leer_reporte(archivo):
+        with open(archivo, encoding="utf-8", newline="") as f:
+            if archivo.suffix == ".jsonl":
+                return [json.loads(linea) for linea in f if linea.strip()]
+            if archivo.suffix == ".json":
+                return json.load(f)
+            return list(csv.DictReader(f))
+
+    def close(self):
+        self._conn.close()
+
+
+_store = None
+
+
+def get_product_store():
+    """Devuelve el almacén de productos del proceso"""
+    global _store
+    if _store is None:
+        _store = ProductStore()
+    return _store
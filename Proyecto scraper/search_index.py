@@ -0,0 +1,204 @@
+"""
+search_index.py
+
+Índice de búsqueda de texto completo (SQLite FTS5) sobre lo que extraen los scrapers:
+títulos y cuerpos de noticias, secciones de Wikipedia, nombres de productos y las
+salidas de `herramientas.save_as`.
+
+- Tokenizador unicode61 sin tildes: "elección" y "eleccion" son el mismo término.
+- Las consultas en español quitan palabras vacías y reducen plurales a un prefijo
+  ("televisores" → televisor*), así que encuentran singular y plural.
+- Ranking BM25 con más peso al título que al cuerpo, sobre las `MAX_PUNTUADOS`
+  coincidencias más recientes para mantener las consultas por debajo de 10 ms.
+- Filtros por fuente (noticia, wiki, producto, salida), sitio y rango de fechas.
+- Se actualiza de forma incremental: cada documento tiene una clave única y volver a
+  agregarlo solo reescribe el índice si cambió su contenido.
+"""
+
+import re
+import threading
+from datetime import datetime
+
+from cache import CACHE_DIR, connect, fold_accents
+from product_record import FORMATO_FECHA
+
+PESO_TITULO = 10.0
+PESO_CUERPO = 1.0
+MAX_PUNTUADOS = 2000  # Coincidencias puntuadas con BM25 por consulta (las más recientes)
+PALABRAS_VACIAS = {
+    "a", "al", "como", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "o", "para", "por",
+    "que", "se", "su", "sus", "un", "una", "unos", "unas", "y",
+}
+
+
+def _raiz(token):
+    """Raíz ligera en español: quita el plural (noticias → noticia, televisores → televisor)"""
+    if len(token) > 5 and token.endswith("es") and token[-3] not in "aeiou":
+        return token[:-2]
+    if len(token) > 4 and token.endswith("s") and token[-2] in "aeiou":
+        return token[:-1]
+    return token
+
+
+def fts_query(consulta):
+    """Texto libre → expresión MATCH de FTS5 (todas las palabras, con prefijo); None si no queda ninguna"""
+    tokens = [t for t in re.findall(r"[a-z0-9]+", fold_accents(consulta or "")) if t not in PALABRAS_VACIAS]
+    if not tokens:
+        return None
+    return " ".join(f'"{_raiz(t)}"*' if len(t) > 3 else f'"{t}"' for t in tokens)
+
+
+def _fecha(valor):
+    """datetime, 'YYYY-MM-DD HH:MM' o ISO 8601 → FORMATO_FECHA (texto ordenable); None si no hay"""
+    if not valor:
+        return None
+    if isinstance(valor, datetime):
+        return valor.strftime(FORMATO_FECHA)
+    valor = str(valor).replace("T", " ")
+    return valor[:16] if re.match(r"\d{4}-\d{2}-\d{2}", valor) else None
+
+
+class SearchIndex:
+    """Índice FTS5 con una tabla de documentos (metadatos y texto) y su índice externo"""
+
+    def __init__(self, path=CACHE_DIR / "busqueda.sqlite"):
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        with self._conn:
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS documentos (
+                    id INTEGER PRIMARY KEY,
+                    clave TEXT NOT NULL UNIQUE,
+                    fuente TEXT NOT NULL,
+                    sitio TEXT,
+                    url TEXT,
+                    fecha TEXT,
+                    titulo TEXT NOT NULL,
+                    cuerpo TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS idx_documentos_fuente_fecha ON documentos(fuente, fecha);
+                CREATE VIRTUAL TABLE IF NOT EXISTS documentos_fts USING fts5(
+                    titulo, cuerpo, content='documentos', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                CREATE TRIGGER IF NOT EXISTS documentos_ai AFTER INSERT ON documentos BEGIN
+                    INSERT INTO documentos_fts(rowid, titulo, cuerpo) VALUES (new.id, new.titulo, new.cuerpo);
+                END;
+                CREATE TRIGGER IF NOT EXISTS documentos_ad AFTER DELETE ON documentos BEGIN
+                    INSERT INTO documentos_fts(documentos_fts, rowid, titulo, cuerpo)
+                    VALUES ('delete', old.id, old.titulo, old.cuerpo);
+                END;
+                -- Solo si cambió el texto: actualizar la fecha no reescribe el índice
+                DROP TRIGGER IF EXISTS documentos_au;
+                CREATE TRIGGER documentos_au AFTER UPDATE OF titulo, cuerpo ON documentos
+                WHEN old.titulo IS NOT new.titulo OR old.cuerpo IS NOT new.cuerpo BEGIN
+                    INSERT INTO documentos_fts(documentos_fts, rowid, titulo, cuerpo)
+                    VALUES ('delete', old.id, old.titulo, old.cuerpo);
+                    INSERT INTO documentos_fts(rowid, titulo, cuerpo) VALUES (new.id, new.titulo, new.cuerpo);
+                END;
+                INSERT INTO documentos_fts(documentos_fts, rank) VALUES ('rank', 'bm25({PESO_TITULO}, {PESO_CUERPO})');
+            """)
+
+    def add_many(self, documentos):
+        """
+        Agrega o actualiza documentos en una sola transacción. Cada uno es un dict con
+        clave, fuente, titulo y opcionalmente cuerpo, url, sitio y fecha. Retorna cuántos
+        se escribieron (los que no cambiaron no tocan el índice).
+        """
+        filas = [(d["clave"], d["fuente"], d.get("sitio"), d.get("url"), _fecha(d.get("fecha")),
+                  d.get("titulo") or "", d.get("cuerpo") or "") for d in documentos]
+        if not filas:
+            return 0
+        with self._lock, self._conn:
+            cursor = self._conn.executemany("""
+                INSERT INTO documentos (clave, fuente, sitio, url, fecha, titulo, cuerpo)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (clave) DO UPDATE SET
+                    sitio = excluded.sitio, url = excluded.url, fecha = excluded.fecha,
+                    titulo = excluded.titulo, cuerpo = excluded.cuerpo
+                WHERE documentos.titulo != excluded.titulo OR documentos.cuerpo != excluded.cuerpo
+                   OR documentos.fecha IS NOT excluded.fecha
+            """, filas)
+            return cursor.rowcount  # Sin las filas que escriben los triggers en el índice
+
+    def add(self, fuente, clave, titulo, cuerpo="", url=None, sitio=None, fecha=None):
+        return self.add_many([{"fuente": fuente, "clave": clave, "titulo": titulo, "cuerpo": cuerpo,
+                               "url": url, "sitio": sitio, "fecha": fecha}])
+
+    def add_products(self, registros):
+        """Indexa el nombre de cada `ProductRecord` (clave: sitio + enlace)"""
+        return self.add_many({
+            "fuente": "producto", "clave": f"producto:{r.sitio}:{r.enlace}", "titulo": r.producto,
+            "cuerpo": r.vendedor or "", "url": r.enlace, "sitio": r.sitio, "fecha": r.fecha,
+        } for r in registros)
+
+    def search(self, consulta, fuente=None, sitio=None, desde=None, hasta=None, limit=10, exhaustive=False):
+        """
+        Documentos que contienen todas las palabras de `consulta`, ordenados por BM25.
+        Cada resultado incluye un fragmento con los términos encontrados entre [ ].
+
+        BM25 cuesta unos microsegundos por coincidencia, así que una palabra muy común en
+        cientos de miles de documentos sería lo más lento. Si hay más de `MAX_PUNTUADOS`
+        coincidencias se puntúan solo las más recientes (los ids crecen al indexar);
+        `exhaustive=True` puntúa siempre todas.
+        """
+        expresion = fts_query(consulta)
+        if expresion is None:
+            return []
+        condiciones, params = ["documentos_fts MATCH ?"], [expresion]
+        for condicion, valor in (("d.fuente = ?", fuente), ("d.sitio = ?", sitio),
+                                 ("d.fecha >= ?", _fecha(desde)), ("d.fecha <= ?", _fecha(hasta))):
+            if valor:
+                condiciones.append(condicion)
+                params.append(valor)
+        # CROSS JOIN obliga a SQLite a recorrer primero las coincidencias y no los filtros
+        desde_fts = "FROM documentos_fts CROSS JOIN documentos d ON d.id = documentos_fts.rowid"
+
+        if not exhaustive:
+            # Recorrer las coincidencias por rowid es mucho más barato que puntuarlas;
+            # sin filtros ni siquiera hace falta leer la tabla de documentos
+            origen = desde_fts if len(condiciones) > 1 else "FROM documentos_fts"
+            corte = self._conn.execute(f"""
+                SELECT documentos_fts.rowid {origen} WHERE {' AND '.join(condiciones)}
+                ORDER BY documentos_fts.rowid DESC LIMIT 1 OFFSET ?
+            """, (*params, MAX_PUNTUADOS - 1)).fetchone()
+            if corte:
+                condiciones.append("documentos_fts.rowid >= ?")
+                params.append(corte[0])
+
+        cursor = self._conn.execute(f"""
+            SELECT d.fuente, d.sitio, d.titulo, d.url, d.fecha, documentos_fts.rank AS puntaje,
+                   snippet(documentos_fts, -1, '[', ']', '…', 16) AS fragmento
+            {desde_fts}
+            WHERE {' AND '.join(condiciones)}
+            ORDER BY documentos_fts.rank
+            LIMIT ?
+        """, (*params, limit))
+        columnas = [c[0] for c in cursor.description]
+        return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+    def count(self, fuente=None):
+        if fuente:
+            return self._conn.execute("SELECT COUNT(*) FROM documentos WHERE fuente = ?", (fuente,)).fetchone()[0]
+        return self._conn.execute("SELECT COUNT(*) FROM documentos").fetchone()[0]
+
+    def optimize(self):
+        """Fusiona los segmentos del índice (conviene tras cargas grandes)"""
+        with self._lock, self._conn:
+            self._conn.execute("INSERT INTO documentos_fts(documentos_fts) VALUES ('optimize')")
+
+    def close(self):
+        self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_search_index():
+    """Devuelve el índice de búsqueda del proceso"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
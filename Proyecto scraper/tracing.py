@@ -0,0 +1,262 @@
+"""
+tracing.py
+
+Trazas livianas por fase (spans) y contadores para los scrapers y el resumidor.
+
+Está apagado por defecto: `span()` devuelve un context manager vacío compartido y
+`count()` retorna de inmediato, así que la instrumentación no cuesta casi nada.
+Se enciende con la variable de entorno SCRAPER_TRACE=1 o con `enable()`.
+Los datos se exportan a JSON lines y al formato de texto de Prometheus, y
+`summary_table()` arma una tabla con el resumen de la ejecución.
+"""
+
+import functools
+import inspect
+import json
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from pathlib import Path
+
+TRACE_DIR = Path(__file__).resolve().parent / "trazas"
+MAX_SPANS = 100_000  # Spans individuales guardados para JSONL; las estadísticas no tienen límite
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+_parent = ContextVar("span_parent", default=None)
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "attrs", "start", "wall", "token")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.token = _parent.set(self.name)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self.start
+        _parent.reset(self.token)
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.tracer._record(self.name, self.wall, duration, _parent.get(), self.attrs)
+        return False
+
+    def set(self, **attrs):
+        """Agrega atributos al span en curso (por ejemplo la cantidad de items)"""
+        self.attrs.update(attrs)
+
+
+class Tracer:
+    """Acumula spans y contadores de una ejecución; seguro entre hilos y tareas asyncio"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.spans = []
+            self.durations = defaultdict(list)
+            self.counters = Counter()
+            self.started = time.time()
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name, attrs)
+
+    def count(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+
+    def _record(self, name, wall, duration, parent, attrs):
+        with self._lock:
+            self.durations[name].append(duration)
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append({"nombre": name, "inicio": wall, "duracion_s": duration,
+                                   "padre": parent, "attrs": attrs})
+
+    def snapshot(self):
+        """Estado serializable (para traer las trazas de un proceso hijo)"""
+        with self._lock:
+            return {"spans": list(self.spans),
+                    "counters": [(name, list(labels), value) for (name, labels), value in self.counters.items()]}
+
+    def merge(self, snapshot):
+        """Agrega el `snapshot()` de otro proceso"""
+        if not snapshot:
+            return
+        with self._lock:
+            for record in snapshot["spans"]:
+                self.durations[record["nombre"]].append(record["duracion_s"])
+                if len(self.spans) < MAX_SPANS:
+                    self.spans.append(record)
+            for name, labels, value in snapshot["counters"]:
+                self.counters[(name, tuple(tuple(label) for label in labels))] += value
+
+    def stats(self):
+        """{span: (n, total s, media s, p50 s, p95 s, máx s)}"""
+        with self._lock:
+            items = {name: sorted(values) for name, values in self.durations.items() if values}
+        return {
+            name: (len(v), sum(v), sum(v) / len(v), _quantile(v, 0.5), _quantile(v, 0.95), v[-1])
+            for name, v in items.items()
+        }
+
+    def export_jsonl(self, path):
+        """Un objeto por línea: cada span y cada contador"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(path, "w", encoding="utf-8") as f:
+            for record in self.spans:
+                f.write(json.dumps({"tipo": "span", **record}, ensure_ascii=False, default=str) + "\n")
+            for (name, labels), value in self.counters.items():
+                f.write(json.dumps({"tipo": "contador", "nombre": name, "labels": dict(labels), "valor": value},
+                                   ensure_ascii=False) + "\n")
+        return path
+
+    def prometheus_text(self, prefix="scraper"):
+        """Spans como summary (p50/p95, suma y cantidad) y contadores como counter"""
+        lines = [f"# HELP {prefix}_span_seconds Duración de cada fase instrumentada",
+                 f"# TYPE {prefix}_span_seconds summary"]
+        for name, (n, total, _, p50, p95, _) in sorted(self.stats().items()):
+            label = f'span="{_escape(name)}"'
+            lines += [f'{prefix}_span_seconds{{{label},quantile="0.5"}} {p50:.6f}',
+                      f'{prefix}_span_seconds{{{label},quantile="0.95"}} {p95:.6f}',
+                      f"{prefix}_span_seconds_sum{{{label}}} {total:.6f}",
+                      f"{prefix}_span_seconds_count{{{label}}} {n}"]
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} counter")
+                declared.add(metric)
+            rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+            lines.append(f"{metric}{{{rendered}}} {value}" if rendered else f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path, prefix="scraper"):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.prometheus_text(prefix), encoding="utf-8")
+        return path
+
+    def summary_table(self):
+        stats = self.stats()
+        if not stats and not self.counters:
+            return "Sin trazas registradas"
+        lines = [f"{'fase':<28}{'n':>6}{'total s':>10}{'media ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'máx ms':>10}"]
+        for name, (n, total, mean, p50, p95, peak) in sorted(stats.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28}{n:>6}{total:>10.2f}{mean * 1000:>10.1f}{p50 * 1000:>10.1f}"
+                         f"{p95 * 1000:>10.1f}{peak * 1000:>10.1f}")
+        with self._lock:
+            counters = sorted(self.counters.items())
+        if counters:
+            lines.append("")
+            for (name, labels), value in counters:
+                rendered = ", ".join(f"{k}={v}" for k, v in labels)
+                lines.append(f"{name:<28}{value:>12,}  {rendered}")
+        return "\n".join(lines)
+
+
+def _quantile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, round(q * (len(sorted_values) - 1)))]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_tracer = Tracer(enabled=os.environ.get("SCRAPER_TRACE") == "1")
+
+
+def get_tracer():
+    return _tracer
+
+
+def enable(enabled=True):
+    _tracer.enabled = enabled
+
+
+def enabled():
+    return _tracer.enabled
+
+
+def span(name, **attrs):
+    """Context manager que mide una fase; no hace nada si el tracing está apagado"""
+    if not _tracer.enabled:
+        return _NOOP
+    return _Span(_tracer, name, attrs)
+
+
+def count(name, value=1, **labels):
+    """Suma `value` al contador `name` con esas etiquetas"""
+    if _tracer.enabled:
+        _tracer.count(name, value, **labels)
+
+
+def traced(name):
+    """Decorador que envuelve una función o corrutina en un span"""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return await function(*args, **kwargs)
+                with _Span(_tracer, name, {}):
+                    return await function(*args, **kwargs)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return function(*args, **kwargs)
+                with _Span(_tracer, name, {}):
+                    return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def finish_run(label="ejecucion", directory=TRACE_DIR):
+    """
+    Imprime la tabla de la ejecución, la exporta a `{directory}/{label}_{fecha}.jsonl` y
+    `.prom`, y reinicia el tracer. Retorna las rutas escritas (None si está apagado).
+    """
+    if not _tracer.enabled:
+        return None
+    print(f"\n📈 Trazas de {label}:\n{_tracer.summary_table()}")
+    name = re.sub(r"[^\w.-]+", "_", label)
+    base = Path(directory) / f"{name}_{time.strftime('%Y%m%d_%H%M%S')}"
+    paths = (_tracer.export_jsonl(base.with_suffix(".jsonl")), _tracer.export_prometheus(base.with_suffix(".prom")))
+    print(f"💾 Trazas exportadas a:\n- {paths[0]}\n- {paths[1]}")
+    _tracer.reset()
+    return paths